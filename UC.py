@@ -1,7 +1,30 @@
 import numpy as np
 from time import sleep
 
+
+def check_uc_params(C: float, Ns: int, Np: int, Nm: int, Vnom: float, SoC: float) -> None:
+    """
+    Valida os parâmetros de um banco de supercapacitores (regras de Uc.setParams) sem criar o objeto
+    :param float C: Capacitância por célula (F)
+    :param int Ns: Número de capacitores em série
+    :param int Np: Número de strings em paralelo
+    :param int Nm: Número de módulos em série
+    :param float Vnom: Tensão nominal por célula (V)
+    :param float SoC: Estado de carga inicial do banco (%)
+    :raises ValueError: Se os parâmetros forem inválidos
+    """
+    if any(x <= 0 for x in [C, Ns, Np, Nm, Vnom]):
+        raise ValueError("Todos os parâmetros devem ser positivos")
+
+    if not 0 <= SoC <= 100:
+        raise ValueError("SoC deve estar entre 0% e 100%")
+
+
 class Uc():
+    # Atributos fixos: sem __dict__ por instância
+    __slots__ = ("_C", "_Ns", "_Np", "_Nm", "_v_cap", "_SoC_max", "_SoC_min", "_v_total",
+                 "_v_banco", "_C_eq", "_total_energy", "_stored_energy", "_SoC")
+
     def __init__(self):
         """Inicializa um banco de supercapacitores com valores padrão"""
         self._C = 3140                                                              
@@ -34,11 +57,7 @@ class Uc():
         :param float SoC: Estado de carga inicial do banco (%)
         :raises ValueError: Se os parâmetros forem inválidos
         """
-        if any(x <= 0 for x in [C, Ns, Np, Nm, Vnom]):
-            raise ValueError("Todos os parâmetros devem ser positivos")
-        
-        if not 0 <= SoC <= 100:
-            raise ValueError("SoC deve estar entre 0% e 100%")
+        check_uc_params(C, Ns, Np, Nm, Vnom, SoC)
 
         self._C = C
         self._Ns = Ns
@@ -56,6 +75,28 @@ class Uc():
         
         self._stored_energy = 0.5 * self._C_eq * (self._v_banco**2)
 
+    _STATE_KEYS = ("C", "Ns", "Np", "Nm", "v_cap", "SoC_max", "SoC_min", "v_total",
+                   "v_banco", "C_eq", "total_energy", "stored_energy", "SoC")
+
+    def getState(self) -> dict:
+        """
+        Retorna uma cópia do estado completo do banco (parâmetros e energia armazenada)
+        :return dict: Estado do banco de supercapacitores
+        """
+        return {key: getattr(self, "_" + key) for key in self._STATE_KEYS}
+
+    def setState(self, state: dict) -> None:
+        """
+        Restaura o estado do banco a partir de um dicionário gerado por getState
+        :param dict state: Estado (completo ou parcial) do banco
+        :raises ValueError: Se alguma chave for desconhecida
+        """
+        unknown = set(state) - set(self._STATE_KEYS)
+        if unknown:
+            raise ValueError(f"Chaves de estado desconhecidas: {sorted(unknown)}")
+        for key, value in state.items():
+            setattr(self, "_" + key, value)
+
     def energy2soc(self, energy: float) -> float:
         """
         Calcula SoC baseado na energia armazenada no banco de UC.
@@ -1,9 +1,41 @@
-import pandas as pd
 import numpy as np
+from lut import LUT, default_lut
+
+
+def check_batt_params(C: float, Ns: int, Np: int, Nm: int, Vnom: float, SoC: float,
+                      min_SoC: float = 10, max_SoC: float = 90) -> None:
+    """
+    Valida os parâmetros de uma bateria (regras de Batt.setParams) sem criar o objeto
+    :param float C: Taxa de descarga da bateria (Ah)
+    :param int Ns: Número de baterias em série
+    :param int Np: Número de baterias em paralelo
+    :param int Nm: Número de módulos
+    :param float Vnom: Tensão nominal por célula (V)
+    :param float SoC: Estado de carga inicial da bateria (%)
+    :param float min_SoC: SoC mínimo permitido (%)
+    :param float max_SoC: SoC máximo permitido (%)
+    :raises ValueError: Se os parâmetros forem inválidos
+    """
+    if any(x <= 0 for x in [C, Ns, Np, Nm, Vnom]):
+        raise ValueError("Todos os parâmetros devem ser positivos")
+
+    if not min_SoC <= SoC <= max_SoC:
+        raise ValueError(f"SoC deve estar entre {min_SoC}% e {max_SoC}%")
+
 
 class Batt():
-    def __init__(self):
-        """Inicializa uma bateria com valores padrão"""
+    # Atributos fixos: sem __dict__ por instância
+    __slots__ = ("_lut", "_lut_method", "_C", "_Ns", "_Np", "_Nm", "_Vnom", "_SoC", "_min_SoC", "_max_SoC",
+                 "_v_cel", "_v_banco", "_total_energy", "_SoC_Energy")
+
+    def __init__(self, lut: LUT | None = None, lut_method: str | None = None):
+        """
+        Inicializa uma bateria com valores padrão
+        :param LUT lut: Tabela SoC x Tensão da célula; usa a LUT padrão compartilhada se None
+        :param str lut_method: Método de consulta da LUT ("nearest" ou "linear"); usa o padrão da tabela se None
+        """
+        self._lut = lut
+        self._lut_method = lut_method
         self._C = 40
         self._Ns = 16
         self._Np = 3
@@ -28,11 +60,7 @@ class Batt():
         :param float SoC: Estado de carga inicial da bateria (%)
         :raises ValueError: Se os parâmetros forem inválidos
         """
-        if any(x <= 0 for x in [C, Ns, Np, Nm, Vnom]):
-            raise ValueError("Todos os parâmetros devem ser positivos")
-        
-        if not self._min_SoC <= SoC <= self._max_SoC:
-            raise ValueError(f"SoC deve estar entre {self._min_SoC}% e {self._max_SoC}%")
+        check_batt_params(C, Ns, Np, Nm, Vnom, SoC, self._min_SoC, self._max_SoC)
 
         self._C = C
         self._Ns = Ns
@@ -45,21 +73,70 @@ class Batt():
         self._total_energy = (Np * C) * (Ns * Nm * Vnom)  # Wh
         self._SoC_Energy = (SoC/100) * self._total_energy
 
-    def LUT(self, SoC: float) -> float:
-        """
-        Calcula a tensão da bateria de acordo com o SoC usando interpolação
-        :param float SoC: Estado de carga da célula (%)
-        :return float: Tensão correspondente (V)
-        """
-        try:
-            df = pd.read_csv("data\\LUT_batt.csv", sep=";")
-            df["SoC"] = 100 - df["SoC"]  # Inverte SoC para corresponder ao padrão de carga
-            indice_proximo = (df['SoC'] - SoC).abs().idxmin()
-            tensao = df.loc[indice_proximo, 'Tensao']
-            return float(tensao)
-        except Exception as e:
-            print(f"Erro ao ler LUT: {e}")
-            return self._Vnom  # Retorna tensão nominal em caso de erro
+    _STATE_KEYS = ("C", "Ns", "Np", "Nm", "Vnom", "SoC", "min_SoC", "max_SoC",
+                   "v_cel", "v_banco", "total_energy", "SoC_Energy")
+
+    def getState(self) -> dict:
+        """
+        Retorna uma cópia do estado completo da bateria (parâmetros e energia armazenada)
+        :return dict: Estado da bateria
+        """
+        return {key: getattr(self, "_" + key) for key in self._STATE_KEYS}
+
+    def setState(self, state: dict) -> None:
+        """
+        Restaura o estado da bateria a partir de um dicionário gerado por getState
+        :param dict state: Estado (completo ou parcial) da bateria
+        :raises ValueError: Se alguma chave for desconhecida
+        """
+        unknown = set(state) - set(self._STATE_KEYS)
+        if unknown:
+            raise ValueError(f"Chaves de estado desconhecidas: {sorted(unknown)}")
+        for key, value in state.items():
+            setattr(self, "_" + key, value)
+
+    def setLUT(self, lut: LUT, lut_method: str | None = None) -> None:
+        """
+        Substitui a LUT da célula (ex.: outra química) e recalcula a tensão do banco
+        :param LUT lut: Tabela SoC x Tensão da célula
+        :param str lut_method: Método de consulta da LUT ("nearest" ou "linear"); usa o padrão da tabela se None
+        """
+        self._lut = lut
+        self._lut_method = lut_method
+        self._v_cel = self.LUT(self._SoC)
+        self._v_banco = self._v_cel * self._Ns * self._Nm
+
+    def getLUT(self) -> LUT | None:
+        """
+        Retorna a LUT em uso pela bateria
+        :return LUT: Tabela SoC x Tensão da célula, ou None se não puder ser carregada
+        """
+        if self._lut is None:
+            try:
+                self._lut = default_lut()
+            except Exception as e:
+                print(f"Erro ao ler LUT: {e}")
+                return None
+        return self._lut
+
+    def getLUTMethod(self) -> str:
+        """
+        Retorna o método de consulta efetivo da LUT
+        :return str: "nearest" ou "linear"
+        """
+        lut = self.getLUT()
+        return self._lut_method or (lut.method if lut is not None else "nearest")
+
+    def LUT(self, SoC):
+        """
+        Calcula a tensão da bateria de acordo com o SoC consultando a LUT pré-carregada
+        :param float|array SoC: Estado(s) de carga da célula (%)
+        :return float|array: Tensão correspondente (V)
+        """
+        lut = self.getLUT()
+        if lut is None:
+            return self._Vnom if np.ndim(SoC) == 0 else np.full(np.shape(SoC), self._Vnom)  # Retorna tensão nominal em caso de erro
+        return lut(SoC, self._lut_method)
 
     def Energy2SoC(self, energy: float) -> float:
         """
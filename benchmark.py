@@ -0,0 +1,275 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from drive_cycle import total_power
+from engine import HAS_NUMBA, simulate_arrays, simulate_segments
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC
+
+SIZES = (1_000, 100_000, 10_000_000)
+THRESHOLD = 600                 # kW
+MAX_CALLS = 100_000             # Chamadas dos métodos escalares por caso
+MAX_SIMULATION = 1_000_000      # Maior perfil de Simulation.simulate (buffer, vetores do kernel e DataFrame: ~0.25 GB por milhão de amostras)
+
+
+def synthetic_cycle(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Ciclo de condução sintético e reprodutível: trechos de parada, tração e frenagem
+    com duração geométrica e níveis de potência log-normais, mais ruído
+    :param int n: Número de amostras
+    :param int seed: Semente do gerador
+    :return pd.DataFrame: Colunas "Traction Power" e "Braking Power" (kW)
+    """
+    rng = np.random.default_rng(seed)
+    n_segments = max(1, n // 20 + 1)
+    lengths = rng.geometric(1 / 30, n_segments)
+    while lengths.sum() < n:
+        lengths = np.concatenate([lengths, rng.geometric(1 / 30, n_segments)])
+
+    # 0: parado, 1: tração, 2: frenagem
+    mode = rng.choice(3, lengths.shape[0], p=(0.3, 0.45, 0.25))
+    level = rng.lognormal(np.log(400), 0.6, lengths.shape[0])
+    mode = np.repeat(mode, lengths)[:n]
+    level = np.repeat(level, lengths)[:n]
+    power = np.maximum(level * (1 + 0.1 * rng.standard_normal(n)), 0)
+
+    return pd.DataFrame({
+        "Traction Power": np.where(mode == 1, power, 0.0),
+        "Braking Power": np.where(mode == 2, power, 0.0),
+    })
+
+
+def _configured(data: pd.DataFrame) -> Simulation:
+    """Simulação dimensionada para o perfil, como em main.py (limiar de 600 kW, 1260 V / 960 V)"""
+    simulation = Simulation()
+    batt_params, uc_params = simulation.size_energy_storage(data, THRESHOLD, VOLTAGE_CONFIGS_BAT[1260], VOLTAGE_CONFIGS_UC[960], verbose=False)
+    simulation.setParam_Batt(batt_params["C"], batt_params["Ns"], batt_params["Np"], batt_params["Nm"], batt_params["Vnom"], 50)
+    simulation.setParam_UC(uc_params["C"], uc_params["Ns"], uc_params["Np"], uc_params["Nm"], uc_params["Vnom"], 20)
+    return simulation
+
+
+def _cases(data: pd.DataFrame, max_calls: int, max_simulation: int) -> list:
+    """
+    Casos de medição para um perfil
+    :return list: Tuplas (nome, amostras processadas, função sem argumentos) ou (nome, amostras, motivo) para casos pulados
+    """
+    n = len(data)
+    calls = min(n, max_calls)
+    powers = total_power(data)
+    rng = np.random.default_rng(1)
+    SoC = rng.uniform(0, 100, calls).tolist()
+
+    simulation = _configured(data)
+    batt = simulation._batt
+    uc = simulation._uc
+    batt_state = batt.getState()
+    uc_state = uc.getState()
+
+    # Correntes realistas: as mesmas que setCurrent calcula para o perfil dividido pelo limiar
+    split = [simulation.supervisory_control(power, THRESHOLD) for power in powers[:calls].tolist()]
+    i_bat = [batt.setCurrent(power_bat)[0] for power_bat, _ in split]
+    i_uc = [uc.setCurrent(power_uc)[0] for _, power_uc in split]
+    powers_list = powers[:calls].tolist()
+
+    def lut_scalar():
+        for value in SoC:
+            batt.LUT(value)
+
+    SoC_vector = rng.uniform(0, 100, n)
+
+    def lut_vector():
+        batt.LUT(SoC_vector)
+
+    def batt_update():
+        batt.setState(batt_state)
+        for current in i_bat:
+            batt.updateEnergy(current, 1)
+
+    def uc_update():
+        uc.setState(uc_state)
+        for current in i_uc:
+            uc.updateEnergy(current, 1)
+
+    def control():
+        for power in powers_list:
+            simulation.supervisory_control(power, THRESHOLD)
+
+    def sizing():
+        simulation.size_energy_storage(data, THRESHOLD, VOLTAGE_CONFIGS_BAT[1260], VOLTAGE_CONFIGS_UC[960], verbose=False)
+
+    def kernel():
+        batt.setState(batt_state)
+        uc.setState(uc_state)
+        simulate_arrays(powers, THRESHOLD, batt, uc)
+
+    def segments():
+        batt.setState(batt_state)
+        uc.setState(uc_state)
+        simulate_segments(powers, THRESHOLD, batt, uc)
+
+    def simulate():
+        batt.setState(batt_state)
+        uc.setState(uc_state)
+        simulation.simulate(data, "Dados", THRESHOLD)
+
+    loop_data = data.iloc[:calls]
+
+    def simulate_loop():
+        batt.setState(batt_state)
+        uc.setState(uc_state)
+        simulation.simulate(loop_data, "Dados", THRESHOLD, kernel=False)
+
+    cases = [
+        ("Batt.LUT", calls, lut_scalar),
+        ("Batt.LUT (vetor)", n, lut_vector),
+        ("Batt.updateEnergy", calls, batt_update),
+        ("Uc.updateEnergy", calls, uc_update),
+        ("supervisory_control", calls, control),
+        ("size_energy_storage", n, sizing),
+        ("engine.simulate_arrays", n, kernel),
+        ("engine.simulate_segments", n, segments),
+    ]
+    if n <= max_simulation:
+        cases.append(("Simulation.simulate", n, simulate))
+    else:
+        cases.append(("Simulation.simulate", n, f"perfil acima de {max_simulation} amostras"))
+    cases.append(("Simulation.simulate (laço)", calls, simulate_loop))
+    return cases
+
+
+def _time(func, repeat: int) -> float:
+    """Menor tempo de execução entre as repetições (s)"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func) -> int:
+    """Pico de memória alocada durante a execução (bytes), medido em uma execução separada"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _metadata() -> dict:
+    """Ambiente da medição, para comparar apenas resultados equivalentes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": HAS_NUMBA,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+    }
+
+
+def run_benchmarks(sizes=SIZES, repeat: int = 3, memory: bool = True, seed: int = 0,
+                   max_calls: int = MAX_CALLS, max_simulation: int = MAX_SIMULATION, verbose: bool = True) -> dict:
+    """
+    Mede tempo, vazão e pico de memória do caminho crítico da simulação em ciclos sintéticos
+    :param iterable sizes: Tamanhos dos ciclos sintéticos (amostras)
+    :param int repeat: Repetições por caso (vale o menor tempo)
+    :param bool memory: Mede o pico de memória (execução extra com tracemalloc)
+    :param int seed: Semente dos ciclos sintéticos
+    :param int max_calls: Limite de chamadas dos métodos escalares (Batt.LUT, updateEnergy, supervisory_control, laço)
+    :param int max_simulation: Maior perfil medido com Simulation.simulate
+    :param bool verbose: Imprime cada resultado
+    :return dict: Metadados do ambiente e lista de resultados
+    """
+    # Compila o kernel (numba) fora da medição
+    warmup = synthetic_cycle(1000, seed)
+    simulation = _configured(warmup)
+    simulate_arrays(total_power(warmup), THRESHOLD, simulation._batt, simulation._uc)
+
+    results = []
+    for n in sizes:
+        data = synthetic_cycle(int(n), seed)
+        for name, samples, func in _cases(data, max_calls, max_simulation):
+            row = {"benchmark": name, "tamanho_ciclo": int(n), "amostras": int(samples)}
+            if isinstance(func, str):
+                row.update({"tempo_s": None, "amostras_por_s": None, "memoria_pico_MB": None, "pulado": func})
+            else:
+                elapsed = _time(func, repeat)
+                row["tempo_s"] = elapsed
+                row["amostras_por_s"] = samples / elapsed if elapsed > 0 else None
+                row["memoria_pico_MB"] = _peak_memory(func) / 2**20 if memory else None
+            results.append(row)
+            if verbose:
+                if "pulado" in row:
+                    print(f"{name:28s} n={n:>10d}  pulado: {row['pulado']}")
+                else:
+                    memory_text = f"{row['memoria_pico_MB']:10.1f} MB" if memory else ""
+                    print(f"{name:28s} n={n:>10d}  {row['tempo_s']:10.4f} s  {row['amostras_por_s']:14.0f} amostras/s  {memory_text}")
+
+    return {"metadados": _metadata(), "resultados": results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Compara a vazão de duas medições
+    :param dict current: Medição atual (run_benchmarks)
+    :param dict baseline: Medição de referência
+    :param float tolerance: Queda relativa de vazão considerada regressão
+    :return pd.DataFrame: Vazões, razão atual/referência e indicação de regressão por caso
+    """
+    keys = ["benchmark", "tamanho_ciclo"]
+    current = pd.DataFrame(current["resultados"]).set_index(keys)
+    baseline = pd.DataFrame(baseline["resultados"]).set_index(keys)
+    table = pd.DataFrame({
+        "referencia": baseline["amostras_por_s"],
+        "atual": current["amostras_por_s"],
+    }).dropna()
+    table["razao"] = table["atual"] / table["referencia"]
+    table["regressao"] = table["razao"] < 1 - tolerance
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Medição de desempenho do caminho crítico da simulação")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(SIZES), help="Tamanhos dos ciclos sintéticos (amostras)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições por caso (vale o menor tempo)")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória")
+    parser.add_argument("--semente", type=int, default=0, help="Semente dos ciclos sintéticos")
+    parser.add_argument("--max-chamadas", type=int, default=MAX_CALLS, help="Limite de chamadas dos métodos escalares")
+    parser.add_argument("--max-simulacao", type=int, default=MAX_SIMULATION, help="Maior perfil medido com Simulation.simulate")
+    parser.add_argument("--saida", default=os.path.join("resultados", "benchmark.json"), help="Arquivo JSON de saída")
+    parser.add_argument("--comparar", default=None, help="Medição de referência (JSON) para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Queda relativa de vazão considerada regressão")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.tamanhos, args.repeticoes, not args.sem_memoria, args.semente,
+                            args.max_chamadas, args.max_simulacao)
+
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            table = compare(report, json.load(f), args.tolerancia)
+        print(table.to_string())
+        if table["regressao"].any():
+            sys.exit(1)
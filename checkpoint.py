@@ -0,0 +1,82 @@
+import bisect
+
+import numpy as np
+
+from batt import Batt
+from UC import Uc
+
+
+class Checkpoints():
+    def __init__(self, dt, interval: float):
+        """
+        Estados de Batt e Uc guardados em intervalos fixos durante uma simulação, para retomar a partir
+        do ponto mais próximo antes de uma mudança de parâmetro em vez de simular de novo desde t = 0.
+        Cada ponto guarda o estado de entrada do passo, antes das mudanças aplicadas naquele passo.
+        :param float|array dt: Intervalo de tempo de cada passo do perfil (s), um por amostra
+        :param float interval: Intervalo entre pontos de restauração (s)
+        :raises ValueError: Se o intervalo não for positivo
+        """
+        if not interval > 0:
+            raise ValueError("O intervalo entre pontos de restauração deve ser positivo")
+        dt = np.asarray(dt, dtype=float)
+        self.interval = interval
+        self.starts = np.cumsum(dt) - dt                  # Instante de início de cada passo (s)
+        end = self.starts[-1] + dt[-1] if dt.shape[0] else 0.0
+        self.grid = np.unique(np.searchsorted(self.starts, np.arange(0.0, end, interval), side="left"))
+        self._indices = []                                # Passos com estado guardado, em ordem crescente
+        self._states = {}
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def index(self, time: float) -> int:
+        """
+        Primeiro passo que começa em time ou depois
+        :param float time: Instante (s)
+        :return int: Índice do passo
+        """
+        return int(np.searchsorted(self.starts, time, side="left"))
+
+    def save(self, index: int, batt: Batt, uc: Uc) -> None:
+        """
+        Guarda o estado dos bancos na entrada do passo index
+        :param int index: Índice do passo
+        :param Batt batt: Bateria
+        :param Uc uc: Banco de supercapacitores
+        """
+        if index not in self._states:
+            bisect.insort(self._indices, index)
+        self._states[index] = (batt.getState(), uc.getState())
+
+    def nearest(self, index: int) -> int:
+        """
+        Ponto de restauração mais próximo antes do passo index (ou nele)
+        :param int index: Índice do passo
+        :return int: Índice do ponto
+        :raises ValueError: Se não houver ponto guardado até index
+        """
+        position = bisect.bisect_right(self._indices, index)
+        if position == 0:
+            raise ValueError(f"Nenhum ponto de restauração até o passo {index}")
+        return self._indices[position - 1]
+
+    def restore(self, index: int, batt: Batt, uc: Uc) -> None:
+        """
+        Restaura nos bancos o estado guardado no passo index
+        :param int index: Índice de um ponto guardado
+        :param Batt batt: Bateria
+        :param Uc uc: Banco de supercapacitores
+        """
+        bat, cap = self._states[index]
+        batt.setState(bat)
+        uc.setState(cap)
+
+    def discard_after(self, index: int) -> None:
+        """
+        Descarta os pontos depois do passo index (invalidados por uma mudança a partir dali)
+        :param int index: Índice do passo
+        """
+        position = bisect.bisect_right(self._indices, index)
+        for key in self._indices[position:]:
+            del self._states[key]
+        del self._indices[position:]
@@ -0,0 +1,332 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from drive_cycle import load_drive_cycle, time_steps
+
+# Parâmetros padrão das estatísticas de operação
+STATS_PARAMS = {
+    "resolution": 1.0,                              # Largura das faixas do histograma de potência (kW)
+    "percentiles": (50, 90, 95, 99),                # Percentis da potência total, ponderados pelo tempo
+    "durations": (1, 10, 30, 60, 300),              # Janelas da curva de potência sustentada (s)
+    "thresholds": (500, 1000, 1500),                # Limiares de tempo e energia acima do limiar (kW)
+    "chunk_size": 100_000,                          # Amostras por bloco lido
+}
+
+LOG_CHANNELS = {"volts": "fa00_altoutvolts", "amps": "fa08_m2amps"}
+
+
+class CycleStats():
+    def __init__(self, resolution: float = STATS_PARAMS["resolution"], durations=STATS_PARAMS["durations"],
+                 thresholds=STATS_PARAMS["thresholds"]):
+        """
+        Estatísticas de operação de um ciclo de condução acumuladas em uma única passagem, bloco a bloco, com memória
+        limitada: energias, picos, histograma da potência ponderado pelo tempo (percentis e curva de duração),
+        potência média máxima sustentada em cada janela e tempo/energia acima de cada limiar.
+        Estatísticas de arquivos diferentes são combinadas com merge.
+        :param float resolution: Largura das faixas do histograma de potência (kW); erro máximo dos percentis
+        :param iterable durations: Janelas da curva de potência sustentada (s)
+        :param iterable thresholds: Limiares de potência (kW)
+        """
+        self.resolution = float(resolution)
+        self.durations = tuple(float(duration) for duration in durations)
+        self.thresholds = tuple(float(threshold) for threshold in thresholds)
+
+        self.samples = 0
+        self.duration = 0.0                         # s
+        self.E_tracao = 0.0                         # kWh
+        self.E_frenagem = 0.0                       # kWh
+        self.P_tracao_max = 0.0                     # kW
+        self.P_frenagem_max = 0.0                   # kW
+        self._hist = np.zeros(0)                    # Tempo em cada faixa de potência total (s)
+        self._origin = 0                            # Faixa de _hist[0] (múltiplos de resolution)
+        self._above_time = np.zeros(len(self.thresholds))
+        self._above_energy = np.zeros(len(self.thresholds))
+        self._sustained = np.full((len(self.durations), 2), np.nan)  # Potência sustentada de tração e de frenagem (kW)
+        # Fim do trecho já acumulado: instantes e energia acumulada das fronteiras das últimas max(durations) s
+        self._tail_time = np.zeros(1)
+        self._tail_energy = np.zeros(1)
+
+        self.V_tracao_max = np.nan                  # V
+        self.V_frenagem_max = np.nan                # V
+        self.I_max = np.nan                         # A
+        self.I_min = np.nan                         # A
+
+    def update(self, traction, braking, dt=1, volts=None, amps=None) -> None:
+        """
+        Acrescenta um bloco de amostras, na ordem do registro
+        :param array traction: Potência de tração (kW)
+        :param array braking: Potência de frenagem (kW, positiva)
+        :param float|array dt: Intervalo de tempo de cada amostra (s)
+        :param array volts: Tensão do registrador (V); sem estatísticas elétricas se None
+        :param array amps: Corrente do registrador (A, positiva em tração); sem estatísticas elétricas se None
+        """
+        traction = np.asarray(traction, dtype=float)
+        braking = np.asarray(braking, dtype=float)
+        n = traction.shape[0]
+        if n == 0:
+            return
+        dts = np.broadcast_to(np.asarray(dt, dtype=float), (n,))
+        power = traction - braking
+
+        self.samples += n
+        self.E_tracao += np.dot(traction, dts) / 3600
+        self.E_frenagem += np.dot(braking, dts) / 3600
+        self.P_tracao_max = max(self.P_tracao_max, float(traction.max()))
+        self.P_frenagem_max = max(self.P_frenagem_max, float(braking.max()))
+
+        # Histograma da potência total ponderado pelo tempo, ampliado quando o bloco sai da faixa atual
+        bins = np.floor(power / self.resolution).astype(np.int64)
+        low, high = int(bins.min()), int(bins.max())
+        if self._hist.shape[0] == 0:
+            self._origin, self._hist = low, np.zeros(high - low + 1)
+        elif low < self._origin or high >= self._origin + self._hist.shape[0]:
+            origin = min(low, self._origin)
+            hist = np.zeros(max(high, self._origin + self._hist.shape[0] - 1) - origin + 1)
+            hist[self._origin - origin:self._origin - origin + self._hist.shape[0]] = self._hist
+            self._origin, self._hist = origin, hist
+        self._hist[low - self._origin:high - self._origin + 1] += np.bincount(bins - low, weights=dts, minlength=high - low + 1)
+
+        excess = np.abs(power)[:, None] - np.asarray(self.thresholds)[None, :]
+        self._above_time += dts @ (excess > 0)
+        self._above_energy += dts @ np.maximum(excess, 0) / 3600
+
+        self._update_sustained(power, dts)
+        self.duration += float(np.sum(dts))
+
+        if volts is not None and amps is not None:
+            volts = np.asarray(volts, dtype=float)
+            amps = np.asarray(amps, dtype=float)
+            if np.any(amps > 0):
+                self.V_tracao_max = np.fmax(self.V_tracao_max, volts[amps > 0].max())
+            if np.any(amps < 0):
+                self.V_frenagem_max = np.fmax(self.V_frenagem_max, volts[amps < 0].max())
+            self.I_max = np.fmax(self.I_max, amps.max())
+            self.I_min = np.fmin(self.I_min, amps.min())
+
+    def _update_sustained(self, power: np.ndarray, dts: np.ndarray) -> None:
+        """
+        Potência média máxima em cada janela: a energia acumulada é linear por partes, então o máximo ocorre com
+        o início ou o fim da janela em uma fronteira entre amostras (fronteiras do bloco e das últimas janelas)
+        """
+        time = np.concatenate((self._tail_time, self._tail_time[-1] + np.cumsum(dts)))
+        energy = np.concatenate((self._tail_energy, self._tail_energy[-1] + np.cumsum(power * dts)))
+        for k, duration in enumerate(self.durations):
+            ends = time[time >= time[0] + duration]                             # Fim em uma fronteira
+            starts = time[time + duration <= time[-1]]                          # Início em uma fronteira
+            if ends.shape[0]:
+                means = np.concatenate(((np.interp(ends, time, energy) - np.interp(ends - duration, time, energy)),
+                                        (np.interp(starts + duration, time, energy) - np.interp(starts, time, energy))))
+                means /= duration
+                self._sustained[k] = np.fmax(self._sustained[k], (means.max(), -means.min()))
+
+        keep = np.searchsorted(time, time[-1] - max(self.durations, default=0.0), side="right") - 1
+        self._tail_time, self._tail_energy = time[max(keep, 0):], energy[max(keep, 0):]
+
+    def merge(self, other: "CycleStats") -> "CycleStats":
+        """
+        Combina as estatísticas de outro registro (ex.: outro arquivo); as janelas não atravessam registros
+        :param CycleStats other: Estatísticas com os mesmos parâmetros
+        :return CycleStats: Estatísticas combinadas (nova instância)
+        :raises ValueError: Se os parâmetros forem diferentes
+        """
+        if (self.resolution, self.durations, self.thresholds) != (other.resolution, other.durations, other.thresholds):
+            raise ValueError("Só é possível combinar estatísticas com os mesmos parâmetros")
+        merged = CycleStats(self.resolution, self.durations, self.thresholds)
+        for name in ("samples", "duration", "E_tracao", "E_frenagem"):
+            setattr(merged, name, getattr(self, name) + getattr(other, name))
+        for name in ("P_tracao_max", "P_frenagem_max", "V_tracao_max", "V_frenagem_max", "I_max"):
+            setattr(merged, name, np.fmax(getattr(self, name), getattr(other, name)))
+        merged.I_min = np.fmin(self.I_min, other.I_min)
+        merged._above_time = self._above_time + other._above_time
+        merged._above_energy = self._above_energy + other._above_energy
+        merged._sustained = np.fmax(self._sustained, other._sustained)
+
+        parts = [(stats._origin, stats._hist) for stats in (self, other) if stats._hist.shape[0]]
+        if parts:
+            origin = min(start for start, _ in parts)
+            merged._origin = origin
+            merged._hist = np.zeros(max(start + hist.shape[0] for start, hist in parts) - origin)
+            for start, hist in parts:
+                merged._hist[start - origin:start - origin + hist.shape[0]] += hist
+        return merged
+
+    def percentile(self, q) -> np.ndarray:
+        """
+        Percentis da potência total ponderados pelo tempo, interpolados dentro da faixa do histograma
+        :param float|array q: Percentis (0 a 100)
+        :return np.ndarray: Potência (kW), com erro de até uma faixa (resolution)
+        """
+        cumulative = np.concatenate(([0.0], np.cumsum(self._hist)))
+        edges = (self._origin + np.arange(cumulative.shape[0])) * self.resolution
+        if cumulative[-1] == 0:
+            return np.full(np.shape(q), np.nan)
+        return np.interp(np.asarray(q, dtype=float) / 100 * cumulative[-1], cumulative, edges)
+
+    def duration_curve(self) -> pd.DataFrame:
+        """
+        Curva de duração da potência: tempo em que a potência total fica em cada nível ou acima dele
+        :return pd.DataFrame: Colunas "P" (kW, borda inferior da faixa) e "t_acima" (s), em ordem decrescente de potência
+        """
+        power = (self._origin + np.arange(self._hist.shape[0])) * self.resolution
+        return pd.DataFrame({"P": power[::-1], "t_acima": np.cumsum(self._hist[::-1])})
+
+    def sustained_power(self) -> pd.DataFrame:
+        """
+        Curva de potência sustentada: maior potência média de tração e de frenagem em cada janela
+        :return pd.DataFrame: Colunas "P_tracao" e "P_frenagem" (kW), indexadas pela janela (s); NaN se o registro
+                              for mais curto que a janela
+        """
+        return pd.DataFrame(self._sustained, index=pd.Index(self.durations, name="janela"), columns=["P_tracao", "P_frenagem"])
+
+    def summary(self, percentiles=STATS_PARAMS["percentiles"]) -> dict:
+        """
+        Linha da tabela de estatísticas
+        :param iterable percentiles: Percentis da potência total
+        :return dict: Estatísticas escalares (energias em kWh, potências em kW, tempos em s)
+        """
+        row = {
+            "amostras": self.samples,
+            "duracao_s": self.duration,
+            "E_tracao": self.E_tracao,
+            "E_frenagem": self.E_frenagem,
+            "E_liquida": self.E_tracao - self.E_frenagem,
+            "P_tracao_max": self.P_tracao_max,
+            "P_frenagem_max": self.P_frenagem_max,
+        }
+        row.update({f"P_p{q:g}": value for q, value in zip(percentiles, self.percentile(list(percentiles)))})
+        for duration, (traction, braking) in zip(self.durations, self._sustained):
+            row[f"P_tracao_{duration:g}s"] = traction
+            row[f"P_frenagem_{duration:g}s"] = braking
+        for threshold, time, energy in zip(self.thresholds, self._above_time, self._above_energy):
+            row[f"t_acima_{threshold:g}kW"] = time
+            row[f"E_acima_{threshold:g}kW"] = energy
+        row.update({"V_tracao_max": self.V_tracao_max, "V_frenagem_max": self.V_frenagem_max,
+                    "I_max": self.I_max, "I_min": self.I_min})
+        return row
+
+
+def read_chunks(path: str, chunk_size: int = STATS_PARAMS["chunk_size"], channels: dict = LOG_CHANNELS):
+    """
+    Lê um registro em blocos: planilha agregada (.xlsx, "Dados" e "Log" pelo cache binário mapeado em memória)
+    ou CSV com as colunas "Traction Power" e "Braking Power" (e, opcionalmente, "Time" e os canais do registrador)
+    :param str path: Caminho do registro
+    :param int chunk_size: Amostras por bloco
+    :param dict channels: Colunas de tensão e corrente do registrador (LOG_CHANNELS)
+    :return generator: Blocos com "traction", "braking", "time" (ou None) e, se existirem, "volts" e "amps"
+    """
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xls"):
+        sheets = load_drive_cycle(path, ("Dados", "Log"))
+        data, log = sheets["Dados"], sheets["Log"]
+        for begin in range(0, len(data), chunk_size):
+            end = min(begin + chunk_size, len(data))
+            chunk = {"traction": data["Traction Power"].to_numpy()[begin:end],
+                     "braking": data["Braking Power"].to_numpy()[begin:end],
+                     "time": log["Time"].to_numpy()[begin:end] if "Time" in log and len(log) == len(data) else None}
+            if all(column in log for column in channels.values()) and len(log) == len(data):
+                chunk["volts"] = log[channels["volts"]].to_numpy()[begin:end]
+                chunk["amps"] = log[channels["amps"]].to_numpy()[begin:end]
+            yield chunk
+    else:
+        for data in pd.read_csv(path, chunksize=chunk_size):
+            chunk = {"traction": data["Traction Power"].to_numpy(), "braking": data["Braking Power"].to_numpy(),
+                     "time": pd.to_datetime(data["Time"]).to_numpy() if "Time" in data else None}
+            if all(column in data for column in channels.values()):
+                chunk["volts"] = data[channels["volts"]].to_numpy()
+                chunk["amps"] = data[channels["amps"]].to_numpy()
+            yield chunk
+
+
+def _with_steps(chunks, dt: float = 1):
+    """
+    Acrescenta o intervalo de cada amostra aos blocos: pela coluna de tempo, com a última amostra de cada bloco
+    valendo até a primeira do bloco seguinte (drive_cycle.time_steps; a última do registro recebe o intervalo
+    mediano do último bloco), ou o intervalo fixo dt
+    """
+    pending = None
+    for chunk in chunks:
+        if chunk["time"] is None:
+            yield {**chunk, "dt": dt}
+            continue
+        if pending is not None:
+            times = np.append(pending["time"], chunk["time"][:1])
+            yield {**pending, "dt": time_steps(times)[:-1]}
+        pending = chunk
+    if pending is not None:
+        yield {**pending, "dt": time_steps(pending["time"])}
+
+
+def file_stats(path: str, params: dict | None = None, dt: float = 1) -> CycleStats:
+    """
+    Estatísticas de operação de um registro, bloco a bloco
+    :param str path: Caminho do registro (.xlsx agregado ou .csv)
+    :param dict params: Parâmetros (STATS_PARAMS); valores ausentes usam o padrão
+    :param float dt: Intervalo entre amostras (s) se o registro não tiver a coluna de tempo
+    :return CycleStats: Estatísticas acumuladas
+    """
+    params = {**STATS_PARAMS, **(params or {})}
+    stats = CycleStats(params["resolution"], params["durations"], params["thresholds"])
+    for chunk in _with_steps(read_chunks(path, params["chunk_size"]), dt):
+        stats.update(chunk["traction"], chunk["braking"], chunk["dt"], chunk.get("volts"), chunk.get("amps"))
+    return stats
+
+
+def _file_stats_task(args: tuple) -> CycleStats:
+    """Executa file_stats no processo trabalhador"""
+    return file_stats(*args)
+
+
+def stats_table(paths, params: dict | None = None, dt: float = 1, processes: int | None = None,
+                total: bool = True) -> pd.DataFrame:
+    """
+    Tabela de estatísticas de operação de vários registros, calculadas em paralelo (um registro por processo)
+    :param iterable paths: Caminhos dos registros
+    :param dict params: Parâmetros (STATS_PARAMS); valores ausentes usam o padrão
+    :param float dt: Intervalo entre amostras (s) dos registros sem coluna de tempo
+    :param int processes: Número de processos; usa todos os núcleos se None e roda em série se 1
+    :param bool total: Acrescenta a linha "total" com todos os registros combinados
+    :return pd.DataFrame: Uma linha por registro (índice: nome do arquivo)
+    """
+    params = {**STATS_PARAMS, **(params or {})}
+    paths = list(paths)
+    tasks = [(path, params, dt) for path in paths]
+    if processes == 1 or len(tasks) <= 1:
+        results = [_file_stats_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes or os.cpu_count(), len(tasks))) as executor:
+            results = list(executor.map(_file_stats_task, tasks))
+
+    rows = {os.path.basename(path): stats.summary(params["percentiles"]) for path, stats in zip(paths, results)}
+    if total and len(results) > 1:
+        combined = results[0]
+        for stats in results[1:]:
+            combined = combined.merge(stats)
+        rows["total"] = combined.summary(params["percentiles"])
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("arquivo")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estatísticas de operação de registros de ciclos de condução")
+    parser.add_argument("arquivos", nargs="*", default=[os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"),
+                                                        os.path.join("data", "UMAX_18-10-24.xlsx")],
+                        help="Registros (.xlsx agregado ou .csv)")
+    parser.add_argument("--resolucao", type=float, default=STATS_PARAMS["resolution"], help="Largura das faixas do histograma de potência (kW)")
+    parser.add_argument("--percentis", type=float, nargs="+", default=list(STATS_PARAMS["percentiles"]), help="Percentis da potência total")
+    parser.add_argument("--janelas", type=float, nargs="+", default=list(STATS_PARAMS["durations"]), help="Janelas da potência sustentada (s)")
+    parser.add_argument("--limiares", type=float, nargs="+", default=list(STATS_PARAMS["thresholds"]), help="Limiares de potência (kW)")
+    parser.add_argument("--bloco", type=int, default=STATS_PARAMS["chunk_size"], help="Amostras por bloco lido")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "estatisticas.csv"), help="Arquivo CSV de saída")
+    args = parser.parse_args()
+
+    table = stats_table(args.arquivos, {"resolution": args.resolucao, "percentiles": tuple(args.percentis),
+                                        "durations": tuple(args.janelas), "thresholds": tuple(args.limiares),
+                                        "chunk_size": args.bloco}, processes=args.processos)
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    table.to_csv(args.saida)
+
+    print(table.T.to_string())
+    print(f"\nEstatísticas salvas em {args.saida}")
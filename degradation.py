@@ -0,0 +1,303 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from drive_cycle import load_cycle, total_power
+from engine import njit, simulate_arrays
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from strategies import Strategy, simulate_strategy
+from UC import Uc
+
+R_GAS = 8.314                   # J/(mol·K)
+
+# Modelo de perda de capacidade por vazão de carga (Wang et al., 2011, células LFP), com a vazão efetiva
+# ponderada por ciclo (rainflow) pela taxa C e pela profundidade. Valores ilustrativos: calibrar com dados da célula.
+DEGRADATION_PARAMS = {
+    "B": 30330,                 # Fator pré-exponencial (% / Ah^z)
+    "Ea": 31500,                # Energia de ativação (J/mol)
+    "alpha": 370.3,             # Sensibilidade à taxa C (J/mol por C)
+    "z": 0.552,                 # Expoente da vazão de carga
+    "T": 298.15,                # Temperatura da célula (K)
+    "C_ref": 2.2,               # Capacidade da célula de referência do modelo (Ah)
+    "k_DoD": 1.2,               # Expoente de profundidade: ciclos profundos desgastam mais por Ah processado
+    "C_rate_max": 6,            # Taxa C máxima (limite de corrente de Batt.setCurrent); limita a taxa estimada de cada ciclo
+    "EOL": 0.2,                 # Perda de capacidade no fim de vida (fração)
+}
+
+
+@njit(cache=True)
+def _rainflow_push(stack_x, stack_t, n_stack, xs, ts, out_range, out_mean, out_duration):
+    """
+    Empilha reversões e extrai ciclos completos pelo critério de quatro pontos (ASTM E1049)
+    :return tuple: Novo tamanho da pilha e número de ciclos extraídos
+    """
+    n_cycles = 0
+    for k in range(xs.shape[0]):
+        stack_x[n_stack] = xs[k]
+        stack_t[n_stack] = ts[k]
+        n_stack += 1
+        while n_stack >= 4:
+            inner = abs(stack_x[n_stack - 3] - stack_x[n_stack - 2])
+            if inner > abs(stack_x[n_stack - 4] - stack_x[n_stack - 3]) or inner > abs(stack_x[n_stack - 2] - stack_x[n_stack - 1]):
+                break
+            out_range[n_cycles] = inner
+            out_mean[n_cycles] = (stack_x[n_stack - 3] + stack_x[n_stack - 2]) / 2
+            out_duration[n_cycles] = abs(stack_t[n_stack - 2] - stack_t[n_stack - 3])
+            n_cycles += 1
+            stack_x[n_stack - 3] = stack_x[n_stack - 1]
+            stack_t[n_stack - 3] = stack_t[n_stack - 1]
+            n_stack -= 2
+    return n_stack, n_cycles
+
+
+class Rainflow():
+    def __init__(self):
+        """
+        Contagem rainflow incremental: recebe a trajetória em trechos (update) e só guarda a pilha de reversões
+        ainda abertas, então trajetórias de qualquer duração cabem em memória
+        """
+        self._stack_x = np.empty(0)
+        self._stack_t = np.empty(0)
+        self._pending = None                            # Último ponto recebido, ainda sem saber se é reversão
+        self._ranges = []
+        self._means = []
+        self._durations = []
+
+    def update(self, values, times) -> None:
+        """
+        Processa mais um trecho da trajetória
+        :param array values: Valores (ex.: SoC da bateria, %)
+        :param array times: Instante de cada valor (s)
+        """
+        x = np.asarray(values, dtype=np.float64)
+        t = np.asarray(times, dtype=np.float64)
+        if self._pending is not None:
+            x = np.concatenate(([self._pending[0]], x))
+            t = np.concatenate(([self._pending[1]], t))
+        if self._stack_x.shape[0] == 0:
+            if x.shape[0] == 0:
+                return
+            # O primeiro ponto da trajetória abre a pilha
+            self._stack_x, self._stack_t = x[:1].copy(), t[:1].copy()
+        else:
+            # O topo da pilha define o sentido do movimento anterior
+            x = np.concatenate((self._stack_x[-1:], x))
+            t = np.concatenate((self._stack_t[-1:], t))
+
+        # Remove patamares e mantém só as reversões (mudanças de sentido); x[0] já está na pilha
+        keep = np.concatenate(([True], np.diff(x) != 0))
+        x, t = x[keep], t[keep]
+        if x.shape[0] < 2:
+            # Nada além do topo da pilha: sem movimento para definir sentido
+            self._pending = None
+            return
+        direction = np.sign(np.diff(x))
+        reversal = np.concatenate(([False], direction[:-1] != direction[1:], [False]))
+        xs, ts = x[reversal], t[reversal]
+        self._pending = (x[-1], t[-1])
+
+        n_stack = self._stack_x.shape[0]
+        stack_x = np.concatenate((self._stack_x, np.empty(xs.shape[0])))
+        stack_t = np.concatenate((self._stack_t, np.empty(xs.shape[0])))
+        out = [np.empty((n_stack + xs.shape[0]) // 2 + 1) for _ in range(3)]
+        n_stack, n_cycles = _rainflow_push(stack_x, stack_t, n_stack, xs, ts, *out)
+        self._stack_x, self._stack_t = stack_x[:n_stack].copy(), stack_t[:n_stack].copy()
+        for stored, new in zip((self._ranges, self._means, self._durations), out):
+            stored.append(new[:n_cycles].copy())
+
+    def cycles(self, residual: bool = True) -> pd.DataFrame:
+        """
+        Ciclos contados até agora
+        :param bool residual: Inclui os meios ciclos da pilha ainda aberta (contagem 0,5)
+        :return pd.DataFrame: Colunas "range", "mean", "count" e "duration" (s, meio período)
+        """
+        ranges = np.concatenate(self._ranges) if self._ranges else np.empty(0)
+        means = np.concatenate(self._means) if self._means else np.empty(0)
+        durations = np.concatenate(self._durations) if self._durations else np.empty(0)
+        counts = np.ones(ranges.shape[0])
+        if residual:
+            x, t = self._stack_x, self._stack_t
+            if self._pending is not None:
+                x = np.append(x, self._pending[0])
+                t = np.append(t, self._pending[1])
+            ranges = np.concatenate((ranges, np.abs(np.diff(x))))
+            means = np.concatenate((means, (x[1:] + x[:-1]) / 2))
+            durations = np.concatenate((durations, np.abs(np.diff(t))))
+            counts = np.concatenate((counts, np.full(x.shape[0] - 1 if x.shape[0] else 0, 0.5)))
+        return pd.DataFrame({"range": ranges, "mean": means, "count": counts, "duration": durations})
+
+
+def rainflow(values, dt=1) -> pd.DataFrame:
+    """
+    Contagem rainflow de uma trajetória completa, com os meios ciclos residuais
+    :param array values: Trajetória (ex.: SoC da bateria, %)
+    :param float|array dt: Intervalo de cada amostra (s)
+    :return pd.DataFrame: Ciclos (Rainflow.cycles)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), values.shape)
+    counter = Rainflow()
+    counter.update(values, np.cumsum(dts) - dts)
+    return counter.cycles()
+
+
+def periodic_rainflow(values, dt=1) -> pd.DataFrame:
+    """
+    Ciclos de uma trajetória que se repete indefinidamente (ex.: um dia de operação com recarga ao valor inicial).
+    A trajetória é girada para começar no máximo e fechada nele, então todos os ciclos fecham e cada repetição
+    tem exatamente estes ciclos, sem simular a sequência de dias.
+    :param array values: Trajetória de um período
+    :param float|array dt: Intervalo de cada amostra (s)
+    :return pd.DataFrame: Ciclos de um período
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), values.shape)
+    if values.shape[0] == 0:
+        return rainflow(values, dt)
+    start = int(np.argmax(values))
+    rotated = np.append(np.roll(values, -start), values[start])
+    rotated_dt = np.append(np.roll(dts, -start), 0.0)
+    return rainflow(rotated, rotated_dt)
+
+
+def effective_throughput(cycles: pd.DataFrame, C: float, params: dict | None = None) -> float:
+    """
+    Vazão de carga efetiva (Ah por célula, na escala da célula de referência) de um conjunto de ciclos:
+    cada ciclo processa 2 x profundidade x capacidade, ponderado pela taxa C (fator de Arrhenius de Wang) e pela
+    profundidade, de modo que ciclos completos a taxa constante reproduzem o modelo original
+    :param pd.DataFrame cycles: Ciclos do SoC (%), com duração do meio período (s)
+    :param float C: Capacidade da célula (Ah)
+    :param dict params: Parâmetros (DEGRADATION_PARAMS); valores ausentes usam o padrão
+    :return float: Vazão efetiva (Ah)
+    """
+    params = {**DEGRADATION_PARAMS, **(params or {})}
+    depth = cycles["range"].to_numpy() / 100
+    duration = np.maximum(cycles["duration"].to_numpy(), 1e-9) / 3600          # h
+    C_rate = np.minimum(depth / duration, params["C_rate_max"])
+    Ah = 2 * cycles["count"].to_numpy() * depth * C * (params["C_ref"] / C)
+    stress = np.exp(params["alpha"] * C_rate / (R_GAS * params["T"])) ** (1 / params["z"])
+    return float(np.sum(Ah * stress * depth ** (params["k_DoD"] - 1)))
+
+
+def capacity_fade(throughput, params: dict | None = None):
+    """
+    Perda de capacidade (fração) em função da vazão efetiva acumulada; vetorizada
+    :param float|array throughput: Vazão efetiva acumulada (Ah, effective_throughput)
+    :param dict params: Parâmetros (DEGRADATION_PARAMS); valores ausentes usam o padrão
+    :return float|array: Perda de capacidade (0 a 1)
+    """
+    params = {**DEGRADATION_PARAMS, **(params or {})}
+    loss = params["B"] * np.exp(-params["Ea"] / (R_GAS * params["T"])) * np.power(throughput, params["z"]) / 100
+    return np.minimum(loss, 1.0)
+
+
+def apply_fade(batt: Batt, fade: float, nominal_energy: float) -> None:
+    """
+    Reduz a capacidade da bateria (_total_energy) mantendo o SoC atual
+    :param Batt batt: Bateria
+    :param float fade: Perda de capacidade (fração)
+    :param float nominal_energy: Energia total da bateria nova (Wh)
+    """
+    state = batt.getState()
+    total_energy = nominal_energy * (1 - fade)
+    batt.setState({"total_energy": total_energy, "SoC_Energy": (state["SoC"] / 100) * total_energy})
+
+
+def project_life(powers, batt: Batt, uc: Uc, years: float, threshold: float | None = None, strategy: Strategy | None = None,
+                 dt=1, repeats_per_day: int = 1, days_per_year: int = 365, resimulate_every: int = 30,
+                 params: dict | None = None) -> pd.DataFrame:
+    """
+    Projeta a perda de capacidade ao longo de anos repetindo um perfil diário. Um dia é simulado com a capacidade
+    atual; seus ciclos (periodic_rainflow, com recarga ao SoC inicial no fim do dia) valem para os próximos
+    resimulate_every dias, cuja perda é calculada de uma vez (capacity_fade é vetorizada). Ao fim de cada bloco
+    a capacidade é atualizada e o dia é simulado de novo. A projeção termina antes se a capacidade se esgotar.
+    :param array powers: Potência total de um ciclo (kW)
+    :param Batt batt: Bateria nova, com o SoC inicial de cada dia (ao final, fica com a capacidade projetada)
+    :param Uc uc: Banco de supercapacitores, com o SoC inicial de cada dia
+    :param float years: Anos de operação
+    :param float threshold: Limiar de potência (kW); ignorado se strategy for informada
+    :param Strategy strategy: Estratégia de gerenciamento de energia (strategies.py)
+    :param float|array dt: Intervalo de cada amostra do ciclo (s)
+    :param int repeats_per_day: Ciclos por dia de operação
+    :param int days_per_year: Dias de operação por ano
+    :param int resimulate_every: Dias entre simulações
+    :param dict params: Parâmetros do modelo (DEGRADATION_PARAMS); valores ausentes usam o padrão
+    :return pd.DataFrame: Uma linha por dia: "dia", "ano", "vazao_Ah", "perda" e "capacidade" (fração da nova)
+    """
+    if strategy is None and threshold is None:
+        raise ValueError("Informe threshold ou strategy")
+    params = {**DEGRADATION_PARAMS, **(params or {})}
+    day_powers = np.tile(np.asarray(powers, dtype=np.float64), repeats_per_day)
+    day_dt = np.tile(np.broadcast_to(np.asarray(dt, dtype=np.float64), np.shape(powers)), repeats_per_day)
+    bat, cap = batt.getState(), uc.getState()
+    nominal_energy = bat["total_energy"]
+    n_days = int(round(years * days_per_year))
+
+    throughput = 0.0
+    fade = 0.0
+    blocks = []
+    for first in range(0, n_days, resimulate_every):
+        batt.setState(bat)
+        apply_fade(batt, fade, nominal_energy)
+        uc.setState(cap)
+        if strategy is not None:
+            results = simulate_strategy(day_powers, strategy, batt, uc, day_dt)
+        else:
+            results = simulate_arrays(day_powers, threshold, batt, uc, day_dt)
+
+        # Ciclos do dia: a trajetória começa no SoC inicial (antes do primeiro passo)
+        SoC = np.concatenate(([bat["SoC"]], results["SoC_bat"]))
+        daily = effective_throughput(periodic_rainflow(SoC, np.append(day_dt, 0.0)), bat["C"], params)
+
+        days = np.arange(first + 1, min(first + resimulate_every, n_days) + 1)
+        block_throughput = throughput + daily * (days - first)
+        block_fade = capacity_fade(block_throughput, params)
+        blocks.append(pd.DataFrame({"dia": days, "ano": days / days_per_year, "vazao_Ah": block_throughput,
+                                    "perda": block_fade, "capacidade": 1 - block_fade}))
+        throughput, fade = block_throughput[-1], float(block_fade[-1])
+        if fade >= 1:
+            break                                       # Capacidade esgotada: não há o que simular
+
+    batt.setState(bat)
+    apply_fade(batt, fade, nominal_energy)
+    uc.setState(cap)
+    return pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=["dia", "ano", "vazao_Ah", "perda", "capacidade"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Projeção da perda de capacidade da bateria repetindo um perfil diário")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--limiar", type=float, default=600, help="Limiar de potência (kW)")
+    parser.add_argument("--tensao-bat", type=int, default=1260, choices=sorted(VOLTAGE_CONFIGS_BAT), help="Tensão da bateria (V)")
+    parser.add_argument("--tensao-uc", type=int, default=960, choices=sorted(VOLTAGE_CONFIGS_UC), help="Tensão do supercapacitor (V)")
+    parser.add_argument("--soc-bat", type=float, default=50, help="SoC inicial da bateria (%%)")
+    parser.add_argument("--soc-uc", type=float, default=20, help="SoC inicial do supercapacitor (%%)")
+    parser.add_argument("--anos", type=float, default=10, help="Anos de operação")
+    parser.add_argument("--ciclos-dia", type=int, default=20, help="Ciclos do perfil por dia")
+    parser.add_argument("--dias-ano", type=int, default=365, help="Dias de operação por ano")
+    parser.add_argument("--resimular", type=int, default=30, help="Dias entre simulações")
+    parser.add_argument("--saida", default=os.path.join("resultados", "degradacao.csv"), help="Arquivo CSV com a projeção")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    dt = sample_steps(df)
+    simulation = Simulation()
+    batt_params, uc_params = simulation.size_energy_storage(df, args.limiar, VOLTAGE_CONFIGS_BAT[args.tensao_bat],
+                                                            VOLTAGE_CONFIGS_UC[args.tensao_uc], verbose=False, dt=dt)
+    simulation.setParam_Batt(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_bat)
+    simulation.setParam_UC(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_uc)
+
+    projection = project_life(total_power(df), simulation._batt, simulation._uc, args.anos, args.limiar, dt=dt,
+                              repeats_per_day=args.ciclos_dia, days_per_year=args.dias_ano, resimulate_every=args.resimular)
+    projection.to_csv(args.saida, index=False)
+
+    eol = projection[projection["perda"] >= DEGRADATION_PARAMS["EOL"]]
+    for year in range(1, int(np.ceil(args.anos)) + 1):
+        row = projection.iloc[min(year * args.dias_ano, len(projection)) - 1]
+        print(f"Ano {year:2d}: capacidade {100 * row['capacidade']:.1f}%")
+    print("Fim de vida:", f"ano {eol['ano'].iloc[0]:.1f}" if len(eol) else "não atingido")
+    print(f"\nProjeção salva em {args.saida}")
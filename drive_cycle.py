@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "drive_cycles")
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo
+    :param str path: Caminho do arquivo
+    :param int chunk_size: Tamanho dos blocos de leitura (bytes)
+    :return str: Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_cache(df: pd.DataFrame, directory: str) -> None:
+    """
+    Grava uma planilha como um arquivo .npy por coluna.
+    Colunas numéricas e de data são gravadas com tipo nativo (mapeáveis em memória);
+    colunas de texto são gravadas como objetos.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    columns = []
+    for k, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        mmap = values.dtype.kind in "biufcmM"
+        if not mmap:
+            values = values.astype(object)
+        np.save(os.path.join(tmp, f"{k}.npy"), values, allow_pickle=not mmap)
+        columns.append({"name": column, "mmap": mmap})
+    with open(os.path.join(tmp, "columns.json"), "w", encoding="utf-8") as f:
+        json.dump(columns, f, ensure_ascii=False, indent=2)
+
+    # Troca atômica: leituras concorrentes nunca veem um cache incompleto
+    try:
+        os.replace(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_cache(directory: str) -> pd.DataFrame:
+    """Lê uma planilha gravada por _write_cache, sem cópia para colunas numéricas"""
+    with open(os.path.join(directory, "columns.json"), "r", encoding="utf-8") as f:
+        columns = json.load(f)
+    data = {}
+    for k, column in enumerate(columns):
+        file = os.path.join(directory, f"{k}.npy")
+        if column["mmap"]:
+            data[column["name"]] = np.load(file, mmap_mode="r")
+        else:
+            data[column["name"]] = np.load(file, allow_pickle=True)
+    return pd.DataFrame(data, copy=False)
+
+
+def _cache_path(cache_dir: str, digest: str, sheet: str) -> str:
+    """Diretório do cache de uma planilha de um arquivo"""
+    return os.path.join(cache_dir, digest, hashlib.sha1(sheet.encode("utf-8")).hexdigest()[:16])
+
+
+def load_drive_cycle(path: str, sheets: tuple = ("Dados", "Log"), cache_dir: str | None = CACHE_DIR) -> dict:
+    """
+    Lê planilhas de um arquivo de ciclo de condução, convertendo-as para cache binário no primeiro uso.
+    O cache é indexado pelo hash do arquivo, então alterações na planilha geram um novo cache.
+    :param str path: Caminho da planilha (.xlsx)
+    :param tuple sheets: Nomes das planilhas ("Dados", "Log", ...)
+    :param str cache_dir: Diretório do cache; lê direto do Excel se None
+    :return dict: DataFrame de cada planilha (colunas numéricas somente leitura, mapeadas em memória)
+    """
+    sheets = list(sheets)
+    if cache_dir is None:
+        return pd.read_excel(path, sheet_name=sheets)
+
+    digest = file_hash(path)
+    missing = [sheet for sheet in sheets if not os.path.exists(os.path.join(_cache_path(cache_dir, digest, sheet), "columns.json"))]
+    if missing:
+        # Abre o Excel uma única vez para todas as planilhas ainda não convertidas
+        frames = pd.read_excel(path, sheet_name=missing)
+        for sheet in missing:
+            _write_cache(frames[sheet], _cache_path(cache_dir, digest, sheet))
+    return {sheet: _read_cache(_cache_path(cache_dir, digest, sheet)) for sheet in sheets}
+
+
+def load_sheet(path: str, sheet: str = "Dados", cache_dir: str | None = CACHE_DIR) -> pd.DataFrame:
+    """
+    Lê uma planilha de ciclo de condução usando o cache binário (ver load_drive_cycle)
+    :param str path: Caminho da planilha (.xlsx)
+    :param str sheet: Nome da planilha
+    :param str cache_dir: Diretório do cache; lê direto do Excel se None
+    :return pd.DataFrame: Dados da planilha
+    """
+    return load_drive_cycle(path, (sheet,), cache_dir)[sheet]
+
+
+def load_cycle(path: str, sheet: str = "Dados", cache_dir: str | None = CACHE_DIR) -> pd.DataFrame:
+    """
+    Lê uma planilha de ciclo de condução com o tempo real das amostras: a planilha agregada não tem coluna "Time",
+    que então vem do "Log" quando as duas planilhas têm o mesmo número de amostras
+    :param str path: Caminho da planilha (.xlsx)
+    :param str sheet: Nome da planilha
+    :param str cache_dir: Diretório do cache; lê direto do Excel se None
+    :return pd.DataFrame: Dados da planilha, com "Time" quando disponível
+    """
+    if sheet == "Log":
+        return load_sheet(path, sheet, cache_dir)
+    try:
+        sheets = load_drive_cycle(path, (sheet, "Log"), cache_dir)
+    except ValueError:                                  # Arquivo sem planilha "Log"
+        return load_sheet(path, sheet, cache_dir)
+
+    data, log = sheets[sheet], sheets["Log"]
+    if "Time" not in data and "Time" in log and len(log) == len(data):
+        data = data.copy(deep=False)
+        data["Time"] = log["Time"].to_numpy()
+    return data
+
+
+def total_power(data: pd.DataFrame) -> np.ndarray:
+    """
+    Potência total requerida pelo caminhão
+    :param pd.DataFrame data: Planilha "Dados" com colunas "Traction Power" e "Braking Power" (kW)
+    :return np.ndarray: Potência total (kW, tração - frenagem)
+    """
+    return np.asarray(data["Traction Power"] - data["Braking Power"], dtype=float)
+
+
+def time_steps(time, last: float | None = None) -> np.ndarray:
+    """
+    Intervalo de tempo de cada amostra a partir da coluna de tempo real do registro.
+    Cada amostra vale até a seguinte; a última recebe o intervalo mediano (ou last).
+    :param array time: Instantes das amostras (datetime ou segundos), em ordem crescente
+    :param float last: Intervalo atribuído à última amostra (s)
+    :return np.ndarray: Intervalos (s)
+    :raises ValueError: Se os instantes não forem crescentes
+    """
+    time = np.asarray(time)
+    if np.issubdtype(time.dtype, np.datetime64):
+        seconds = (time - time[0]) / np.timedelta64(1, "s")
+    else:
+        seconds = time.astype(float)
+    if seconds.size == 0:
+        return np.empty(0)
+
+    dt = np.diff(seconds)
+    if np.any(dt <= 0):
+        raise ValueError("Os instantes de tempo devem ser estritamente crescentes")
+    if last is None:
+        last = float(np.median(dt)) if dt.size else 1.0
+    return np.append(dt, last)
+
+
+def merge_constant_segments(powers, dt=1, tol: float = 0.0, max_dt: float | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Agrupa amostras consecutivas de potência (quase) constante em um único passo.
+    A potência de cada passo agrupado é a média ponderada pelo tempo, preservando a energia do trecho.
+    Trechos de potência nula (caminhão parado) são agrupados sem perda; para potência não nula,
+    a tensão dos bancos é mantida constante dentro do passo, então tol deve ser pequena.
+    :param array powers: Potência total (kW)
+    :param float|array dt: Intervalo de cada amostra (s)
+    :param float tol: Maior diferença de potência (kW) em relação ao início do trecho para agrupar
+    :param float max_dt: Maior duração de um passo agrupado (s); sem limite se None
+    :return tuple: Potências (kW), intervalos (s) e índice da primeira amostra de cada passo
+    """
+    powers = np.asarray(powers, dtype=float)
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), powers.shape)
+    n = powers.shape[0]
+    if n == 0:
+        return powers.copy(), dt.copy(), np.empty(0, dtype=int)
+
+    if tol == 0 and max_dt is None:
+        # Caso exato e totalmente vetorizado: um novo passo sempre que a potência muda
+        starts = np.flatnonzero(np.r_[True, powers[1:] != powers[:-1]])
+    else:
+        starts = [0]
+        reference = powers[0]
+        duration = dt[0]
+        for k in range(1, n):
+            if abs(powers[k] - reference) > tol or (max_dt is not None and duration + dt[k] > max_dt):
+                starts.append(k)
+                reference = powers[k]
+                duration = 0.0
+            duration += dt[k]
+        starts = np.asarray(starts)
+
+    merged_dt = np.add.reduceat(dt, starts)
+    merged_powers = np.add.reduceat(powers * dt, starts) / merged_dt
+    return merged_powers, merged_dt, starts
@@ -0,0 +1,326 @@
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from drive_cycle import load_cycle, total_power
+from engine import HAS_NUMBA, RESULT_COLUMNS, _lut_lookup, njit
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from strategies import Strategy
+from UC import Uc
+
+# Parâmetros por célula; valores típicos de catálogo, ajuste às células usadas
+BATT_ECM_PARAMS = {
+    "R0": 1.0e-3,               # Resistência série (Ω), célula LFP de ~40 Ah
+    "R1": 0.6e-3,               # Resistência do ramo RC (Ω); sem ramo RC se 0
+    "C1": 2.0e4,                # Capacitância do ramo RC (F)
+    "heat_capacity": 1100,      # Capacidade térmica (J/K): massa x calor específico
+    "R_th": 3.0,                # Resistência térmica célula-ambiente, com o arrefecimento (K/W)
+    "T_amb": 25,                # Temperatura ambiente (°C)
+}
+
+UC_ECM_PARAMS = {
+    "R0": 0.29e-3,              # ESR (Ω), célula de ~3000 F
+    "R1": 0.0,
+    "C1": 0.0,
+    "heat_capacity": 520,
+    "R_th": 6.0,
+    "T_amb": 25,
+}
+
+ECM_COLUMNS = ("v_term_bat", "p_loss_bat", "T_bat", "v_term_uc", "p_loss_uc", "T_uc")
+
+
+class EquivalentCircuit():
+    def __init__(self, R0: float = 0.0, R1: float = 0.0, C1: float = 0.0, heat_capacity: float = 0.0,
+                 R_th: float = 0.0, T_amb: float = 25, T: float | None = None):
+        """
+        Circuito equivalente de uma célula: fonte (tensão de circuito aberto do banco), resistência série R0,
+        ramo RC opcional (R1 || C1) e nó térmico concentrado (capacidade térmica e resistência térmica para o ambiente).
+        Guarda o estado do banco (tensão do ramo RC e temperatura) entre simulações.
+        :param float R0: Resistência série por célula (Ω)
+        :param float R1: Resistência do ramo RC por célula (Ω); sem ramo RC se 0
+        :param float C1: Capacitância do ramo RC por célula (F)
+        :param float heat_capacity: Capacidade térmica por célula (J/K); temperatura em regime permanente se 0
+        :param float R_th: Resistência térmica célula-ambiente (K/W)
+        :param float T_amb: Temperatura ambiente (°C)
+        :param float T: Temperatura inicial (°C); a ambiente se None
+        """
+        self.R0 = R0
+        self.R1 = R1
+        self.C1 = C1
+        self.heat_capacity = heat_capacity
+        self.R_th = R_th
+        self.T_amb = T_amb
+        self.T = T_amb if T is None else T
+        self.v_rc = 0.0
+
+    def pack(self, Ns: int, Np: int, Nm: int) -> dict:
+        """
+        Parâmetros do banco: Ns x Nm células em série e Np em paralelo
+        :return dict: R0 e R1 (Ω), constante de tempo do ramo RC (s), capacidade térmica (J/K) e resistência térmica (K/W)
+        """
+        series = Ns * Nm
+        cells = series * Np
+        return {
+            "R0": self.R0 * series / Np,
+            "R1": self.R1 * series / Np,
+            "tau": self.R1 * self.C1,
+            "heat_capacity": self.heat_capacity * cells,
+            "R_th": self.R_th / cells,
+        }
+
+
+@njit(cache=True)
+def _terminal_current(power, v_e, R0):
+    """
+    Corrente que entrega a potência nos terminais: P = (v_e - R0·i)·i, a raiz de menor módulo.
+    Acima da potência máxima v_e²/(4·R0) retorna a corrente dessa potência máxima.
+    """
+    if R0 <= 0:
+        return power / v_e
+    disc = v_e * v_e - 4 * R0 * power
+    if disc < 0:
+        return v_e / (2 * R0)
+    # Forma estável da raiz de menor módulo (sem cancelamento para potências pequenas)
+    return 2 * power / (v_e + math.sqrt(disc))
+
+
+@njit(cache=True)
+def _rc_thermal(i, v_rc, T, R0, R1, tau, heat_capacity, R_th, T_amb, dt):
+    """
+    Perdas e solução exata (corrente constante no passo) do ramo RC e do nó térmico
+    :return tuple: Perdas (W), nova tensão do ramo RC (V) e nova temperatura (°C)
+    """
+    loss = R0 * i * i
+    if R1 > 0:
+        loss += v_rc * v_rc / R1
+        if tau > 0:
+            decay = math.exp(-dt / tau)
+            v_rc = v_rc * decay + R1 * i * (1 - decay)
+        else:
+            v_rc = R1 * i
+    T_ss = T_amb + loss * R_th
+    if heat_capacity > 0 and R_th > 0:
+        T = T_ss + (T - T_ss) * math.exp(-dt / (heat_capacity * R_th))
+    elif heat_capacity > 0:
+        T = T + loss * dt / heat_capacity                                       # Sem troca com o ambiente
+    else:
+        T = T_ss
+    return loss, v_rc, T
+
+
+@njit(cache=True)
+def _kernel_ecm(powers, threshold, dts, bat_ref, fb_gain, fb_target, bat_p_max,
+                lut_SoC, lut_tensao, linear,
+                bat_E, bat_v, bat_total, bat_min_SoC, bat_max_SoC, bat_i_max, bat_Ns_Nm,
+                uc_E, uc_v, uc_total, uc_SoC_min, uc_SoC_max, uc_i_max, uc_C_eq, uc_SoC,
+                bat_ecm, bat_v_rc, bat_T, uc_ecm, uc_v_rc, uc_T,
+                SoC_bat, v_banco_bat, i_bat, p_bat_reject,
+                SoC_UC, v_banco_uc, i_uc, p_uc_reject, p_reject,
+                v_term_bat, p_loss_bat, T_bat, v_term_uc, p_loss_uc, T_uc):
+    """
+    Recorrência de engine._kernel com circuito equivalente nos dois bancos: a corrente resolve a potência nos
+    terminais em forma fechada (_terminal_current), o balanço de energia usa a tensão de circuito aberto e as
+    perdas aquecem o nó térmico. Com R0 = R1 = 0 reproduz engine._kernel.
+    bat_ecm e uc_ecm: (R0, R1, tau, capacidade térmica, resistência térmica, temperatura ambiente) do banco.
+    :return tuple: Estado final (energia, SoC, tensão, tensão RC e temperatura da bateria e do UC)
+    """
+    threshold = threshold * 1000                                                # Conversão para W
+    bat_E_min = (bat_min_SoC / 100) * bat_total
+    bat_E_max = (bat_max_SoC / 100) * bat_total
+    uc_E_max = uc_total * (uc_SoC_max / 100)
+    uc_E_min = uc_total * (uc_SoC_min / 100)
+    bat_SoC = 0.0
+    use_ref = len(bat_ref) > 0
+    bat_p_max = bat_p_max * 1000
+
+    for k in range(len(powers)):
+        dt = dts[k]
+
+        # Distribuição de potência
+        power = powers[k] * 1000                                                # Conversão para W
+        if use_ref:
+            power_bat = (bat_ref[k] + fb_gain * (fb_target - uc_SoC)) * 1000
+            power_bat = min(max(power_bat, -bat_p_max), bat_p_max)
+            power_uc = power - power_bat
+        elif abs(power) > threshold:
+            power_uc = power - threshold if power > 0 else power + threshold
+            power_bat = threshold if power > 0 else -threshold
+        else:
+            power_uc = 0.0
+            power_bat = power
+
+        # Bateria: corrente nos terminais e limite de corrente
+        v_e = bat_v - bat_v_rc
+        i = _terminal_current(power_bat, v_e, bat_ecm[0])
+        i_sat = min(max(i, -bat_i_max), bat_i_max)
+        v_term = v_e - bat_ecm[0] * i_sat
+        p_rej_1 = (power_bat - v_term * i_sat) / 1000
+
+        # Bateria: contador de Coulomb na tensão de circuito aberto
+        charge = -1 * i_sat * dt / 3600
+        new_energy = bat_E + bat_v * charge
+        clip_energy = min(max(new_energy, bat_E_min), bat_E_max)
+        p_rej_2 = ((new_energy - clip_energy) / dt) / 1000
+        loss, bat_v_rc, bat_T = _rc_thermal(i_sat, bat_v_rc, bat_T, bat_ecm[0], bat_ecm[1], bat_ecm[2],
+                                            bat_ecm[3], bat_ecm[4], bat_ecm[5], dt)
+        bat_E = clip_energy
+        bat_SoC = (clip_energy * 100) / bat_total
+        bat_v = bat_Ns_Nm * _lut_lookup(bat_SoC, lut_SoC, lut_tensao, linear)
+
+        SoC_bat[k] = bat_SoC
+        v_banco_bat[k] = bat_v
+        i_bat[k] = i_sat
+        p_bat_reject[k] = p_rej_1 + p_rej_2
+        v_term_bat[k] = v_term
+        p_loss_bat[k] = loss / 1000
+        T_bat[k] = bat_T
+
+        # Supercapacitor: corrente nos terminais e limite de corrente
+        v_e = uc_v - uc_v_rc
+        i = _terminal_current(power_uc, v_e, uc_ecm[0])
+        i_sat = min(max(i, -uc_i_max), uc_i_max)
+        v_term = v_e - uc_ecm[0] * i_sat
+        p_rej_1 = (power_uc - v_term * i_sat) / 1000
+
+        # Supercapacitor: balanço de energia na tensão de circuito aberto
+        new_energy = uc_E + -1 * uc_v * i_sat * dt
+        clip_energy = min(max(new_energy, uc_E_min), uc_E_max)
+        p_rej_2 = ((new_energy - clip_energy) / dt) / 1000
+        loss, uc_v_rc, uc_T = _rc_thermal(i_sat, uc_v_rc, uc_T, uc_ecm[0], uc_ecm[1], uc_ecm[2],
+                                          uc_ecm[3], uc_ecm[4], uc_ecm[5], dt)
+        uc_E = clip_energy
+        uc_SoC = (clip_energy / uc_total) * 100
+        uc_v = math.sqrt((2 * clip_energy) / uc_C_eq)
+
+        SoC_UC[k] = uc_SoC
+        v_banco_uc[k] = uc_v
+        i_uc[k] = i_sat
+        p_uc_reject[k] = p_rej_1 + p_rej_2
+        v_term_uc[k] = v_term
+        p_loss_uc[k] = loss / 1000
+        T_uc[k] = uc_T
+
+        p_reject[k] = p_bat_reject[k] + p_uc_reject[k]
+
+    return bat_E, bat_SoC, bat_v, bat_v_rc, bat_T, uc_E, uc_SoC, uc_v, uc_v_rc, uc_T
+
+
+def simulate_ecm(powers, threshold: float, batt: Batt, uc: Uc, ecm_bat: EquivalentCircuit, ecm_uc: EquivalentCircuit,
+                 dt=1, strategy: Strategy | None = None) -> dict:
+    """
+    engine.simulate_arrays com perdas resistivas, ramo RC e temperatura dos bancos
+    :param array powers: Potência total requerida a cada passo (kW, tração - frenagem)
+    :param float threshold: Limiar de potência para distribuição (kW); ignorado se strategy for informada
+    :param Batt batt: Bateria, com estado inicial já configurado (atualizada ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (atualizado ao final)
+    :param EquivalentCircuit ecm_bat: Circuito equivalente da célula da bateria (estado atualizado ao final)
+    :param EquivalentCircuit ecm_uc: Circuito equivalente da célula do UC (estado atualizado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :param Strategy strategy: Estratégia de gerenciamento de energia (strategies.py); limiar se None
+    :return dict: Vetores de RESULT_COLUMNS (v_banco_* é a tensão de circuito aberto) e de ECM_COLUMNS
+                  (tensão nos terminais em V, perdas em kW, temperatura em °C)
+    """
+    powers = np.ascontiguousarray(powers, dtype=np.float64)
+    n = powers.shape[0]
+    columns = RESULT_COLUMNS + ECM_COLUMNS
+    if n == 0:
+        return {column: np.empty(0) for column in columns}
+    dts = np.ascontiguousarray(np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,)))
+    if strategy is not None:
+        bat_ref = np.ascontiguousarray(strategy.split(powers, dt), dtype=np.float64)
+        feedback = (float(strategy.feedback_gain), float(strategy.feedback_target), float(strategy.p_max_bat))
+    else:
+        bat_ref, feedback = np.empty(0), (0.0, 0.0, math.inf)
+
+    bat = batt.getState()
+    cap = uc.getState()
+    lut = batt.getLUT()
+    if lut is None:
+        lut_SoC, lut_tensao = np.zeros(1), np.full(1, float(bat["Vnom"]))
+    else:
+        lut_SoC, lut_tensao = lut.SoC, lut.tensao
+    bat_ecm = ecm_bat.pack(bat["Ns"], bat["Np"], bat["Nm"])
+    uc_ecm = ecm_uc.pack(cap["Ns"], cap["Np"], cap["Nm"])
+    bat_ecm = (bat_ecm["R0"], bat_ecm["R1"], bat_ecm["tau"], bat_ecm["heat_capacity"], bat_ecm["R_th"], float(ecm_bat.T_amb))
+    uc_ecm = (uc_ecm["R0"], uc_ecm["R1"], uc_ecm["tau"], uc_ecm["heat_capacity"], uc_ecm["R_th"], float(ecm_uc.T_amb))
+
+    if HAS_NUMBA:
+        results = {column: np.empty(n) for column in columns}
+        bat_ecm, uc_ecm = np.array(bat_ecm, dtype=np.float64), np.array(uc_ecm, dtype=np.float64)
+    else:
+        # Em Python puro, listas de floats são bem mais rápidas que indexar vetores NumPy
+        powers, dts, lut_SoC, lut_tensao = powers.tolist(), dts.tolist(), lut_SoC.tolist(), lut_tensao.tolist()
+        bat_ref = bat_ref.tolist()
+        results = {column: [0.0] * n for column in columns}
+
+    state = _kernel_ecm(
+        powers, float(threshold), dts, bat_ref, *feedback,
+        lut_SoC, lut_tensao, batt.getLUTMethod() == "linear",
+        float(bat["SoC_Energy"]), float(bat["v_banco"]), float(bat["total_energy"]),
+        float(bat["min_SoC"]), float(bat["max_SoC"]), float(6 * bat["Np"] * bat["C"]), float(bat["Ns"] * bat["Nm"]),
+        float(cap["stored_energy"]), float(cap["v_banco"]), float(cap["total_energy"]),
+        float(cap["SoC_min"]), float(cap["SoC_max"]), float(280 * cap["Np"]), float(cap["C_eq"]), float(cap["SoC"]),
+        bat_ecm, float(ecm_bat.v_rc), float(ecm_bat.T), uc_ecm, float(ecm_uc.v_rc), float(ecm_uc.T),
+        *(results[column] for column in columns)
+    )
+    bat_E, bat_SoC, bat_v, ecm_bat.v_rc, ecm_bat.T, uc_E, uc_SoC, uc_v, ecm_uc.v_rc, ecm_uc.T = state
+
+    batt.setState({"SoC_Energy": bat_E, "SoC": bat_SoC, "v_banco": bat_v})
+    uc.setState({"stored_energy": uc_E, "SoC": uc_SoC, "v_banco": uc_v})
+    return {column: np.asarray(values, dtype=np.float64) for column, values in results.items()}
+
+
+def thermal_summary(results: dict, dt=1) -> pd.DataFrame:
+    """
+    Resumo para o projeto do arrefecimento
+    :param dict results: Resultado de simulate_ecm
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :return pd.DataFrame: Por banco: calor gerado (kWh), perda média e de pico (kW) e temperatura máxima e final (°C)
+    """
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), results["p_loss_bat"].shape)
+    rows = {}
+    for bank in ("bat", "uc"):
+        loss = results[f"p_loss_{bank}"]
+        T = results[f"T_{bank}"]
+        rows[bank] = {
+            "calor_kWh": np.sum(loss * dts) / 3600,
+            "perda_media_kW": np.sum(loss * dts) / max(np.sum(dts), 1e-12),
+            "perda_pico_kW": np.max(loss, initial=0.0),
+            "T_max": np.max(T, initial=-np.inf),
+            "T_final": T[-1] if T.shape[0] else np.nan,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulação com perdas resistivas e temperatura dos bancos")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--limiar", type=float, default=600, help="Limiar de potência (kW)")
+    parser.add_argument("--tensao-bat", type=int, default=1260, choices=sorted(VOLTAGE_CONFIGS_BAT), help="Tensão da bateria (V)")
+    parser.add_argument("--tensao-uc", type=int, default=960, choices=sorted(VOLTAGE_CONFIGS_UC), help="Tensão do supercapacitor (V)")
+    parser.add_argument("--soc-bat", type=float, default=50, help="SoC inicial da bateria (%%)")
+    parser.add_argument("--soc-uc", type=float, default=20, help="SoC inicial do supercapacitor (%%)")
+    parser.add_argument("--ambiente", type=float, default=25, help="Temperatura ambiente (°C)")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Repetições do ciclo (aquecimento ao longo do turno)")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    dt = sample_steps(df)
+    simulation = Simulation()
+    batt_params, uc_params = simulation.size_energy_storage(df, args.limiar, VOLTAGE_CONFIGS_BAT[args.tensao_bat],
+                                                            VOLTAGE_CONFIGS_UC[args.tensao_uc], verbose=False, dt=dt)
+    simulation.setParam_Batt(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_bat)
+    simulation.setParam_UC(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_uc)
+
+    ecm_bat = EquivalentCircuit(**{**BATT_ECM_PARAMS, "T_amb": args.ambiente})
+    ecm_uc = EquivalentCircuit(**{**UC_ECM_PARAMS, "T_amb": args.ambiente})
+    powers = np.tile(total_power(df), args.repeticoes)
+    dt = np.tile(np.broadcast_to(np.asarray(dt, dtype=float), total_power(df).shape), args.repeticoes)
+    results = simulate_ecm(powers, args.limiar, simulation._batt, simulation._uc, ecm_bat, ecm_uc, dt)
+    print(thermal_summary(results, dt).to_string())
@@ -0,0 +1,396 @@
+import math
+
+import numpy as np
+
+from batt import Batt
+from UC import Uc
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba é opcional: sem ele o kernel roda em Python puro
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+RESULT_COLUMNS = ("SoC_bat", "v_banco_bat", "i_bat", "p_bat_reject",
+                  "SoC_UC", "v_banco_uc", "i_uc", "p_uc_reject", "p_reject")
+
+
+@njit(cache=True)
+def _lut_lookup(SoC, lut_SoC, lut_tensao, linear):
+    """
+    Consulta escalar da LUT (mesmo critério de LUT.nearest / LUT.linear)
+    :param float SoC: Estado de carga (%)
+    :param array lut_SoC: SoC da tabela em ordem crescente (%)
+    :param array lut_tensao: Tensões da tabela (V)
+    :param bool linear: Interpola linearmente se True, senão usa o ponto mais próximo
+    :return float: Tensão da célula (V)
+    """
+    n = len(lut_SoC)
+    if n == 1 or SoC <= lut_SoC[0]:
+        return lut_tensao[0]
+    if SoC >= lut_SoC[n - 1]:
+        return lut_tensao[n - 1]
+
+    # Busca binária do primeiro ponto com SoC >= valor consultado
+    lo = 1
+    hi = n - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if lut_SoC[mid] < SoC:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    if linear:
+        x0 = lut_SoC[lo - 1]
+        y0 = lut_tensao[lo - 1]
+        return y0 + (SoC - x0) * (lut_tensao[lo] - y0) / (lut_SoC[lo] - x0)
+    if lut_SoC[lo] - SoC <= SoC - lut_SoC[lo - 1]:
+        return lut_tensao[lo]
+    return lut_tensao[lo - 1]
+
+
+@njit(cache=True)
+def _clip(x, lo, hi):
+    """Limita um valor escalar ao intervalo [lo, hi]"""
+    return min(max(x, lo), hi)
+
+
+def _clip_arrays(x, lo, hi):
+    """Limita cada elemento de um vetor ao intervalo [lo, hi]"""
+    return np.minimum(np.maximum(x, lo), hi)
+
+
+def _bank_steps(clip, sqrt, jit):
+    """
+    Equações de um passo da bateria (Batt.setCurrent e Batt.updateEnergy) e do supercapacitor (Uc.setCurrent e
+    Uc.updateEnergy), escritas uma única vez: para valores escalares (kernel) e para vetores com um valor por
+    caminhão (frota em passo único, fleet.simulate_fleet)
+    :param callable clip: Limite de um valor ao intervalo [lo, hi]
+    :param callable sqrt: Raiz quadrada
+    :param callable jit: Compilação das funções (njit ou identidade)
+    :return tuple: Passo da bateria e passo do supercapacitor
+    """
+    @jit
+    def battery_step(power, dt, E, v, total, E_min, E_max, i_max):
+        """
+        Passo da bateria: limite de corrente e contador de Coulomb
+        :return tuple: Energia (Wh), SoC (%), corrente (A) e potência rejeitada (kW)
+        """
+        i = power / v
+        i_sat = clip(i, -i_max, i_max)
+        p_rej_1 = ((i - i_sat) * v) / 1000
+
+        charge = -1 * i_sat * dt / 3600
+        new_energy = E + v * charge
+        clip_energy = clip(new_energy, E_min, E_max)
+        p_rej_2 = ((new_energy - clip_energy) / dt) / 1000
+        return clip_energy, (clip_energy * 100) / total, i_sat, p_rej_1 + p_rej_2
+
+    @jit
+    def uc_step(power, dt, E, v, total, E_min, E_max, i_max, C_eq):
+        """
+        Passo do supercapacitor: limite de corrente e balanço de energia
+        :return tuple: Energia (J), SoC (%), tensão (V), corrente (A) e potência rejeitada (kW)
+        """
+        i = power / v
+        i_sat = clip(i, -i_max, i_max)
+        p_rej_1 = ((i - i_sat) * v) / 1000
+
+        new_energy = E + -1 * v * i_sat * dt
+        clip_energy = clip(new_energy, E_min, E_max)
+        p_rej_2 = ((new_energy - clip_energy) / dt) / 1000
+        return clip_energy, (clip_energy / total) * 100, sqrt((2 * clip_energy) / C_eq), i_sat, p_rej_1 + p_rej_2
+
+    return battery_step, uc_step
+
+
+_battery_step, _uc_step = _bank_steps(_clip, math.sqrt, njit(cache=True))
+_battery_steps, _uc_steps = _bank_steps(_clip_arrays, np.sqrt, lambda func: func)
+
+
+@njit(cache=True)
+def _kernel(powers, threshold, dts,
+            lut_SoC, lut_tensao, linear,
+            bat_E, bat_v, bat_total, bat_min_SoC, bat_max_SoC, bat_i_max, bat_Ns_Nm,
+            uc_E, uc_v, uc_total, uc_SoC_min, uc_SoC_max, uc_i_max, uc_C_eq,
+            SoC_bat, v_banco_bat, i_bat, p_bat_reject,
+            SoC_UC, v_banco_uc, i_uc, p_uc_reject, p_reject,
+            bat_ref, fb_gain, fb_target, bat_p_max, uc_SoC0):
+    """
+    Recorrência acoplada bateria/UC passo a passo sobre vetores pré-alocados.
+    Reproduz, na mesma ordem de operações, supervisory_control, Batt.setCurrent,
+    Batt.updateEnergy, Uc.setCurrent e Uc.updateEnergy.
+    Se bat_ref não for vazio, a distribuição segue a referência de potência da bateria (kW) de uma estratégia
+    (strategies.py), somada à realimentação fb_gain * (fb_target - SoC do UC no passo anterior) e limitada a
+    bat_p_max; o UC recebe o restante.
+    :return tuple: Estado final (energia bateria, SoC bateria, tensão bateria, energia UC, SoC UC, tensão UC)
+    """
+    threshold = threshold * 1000                                                # Conversão para W
+    bat_E_min = (bat_min_SoC / 100) * bat_total
+    bat_E_max = (bat_max_SoC / 100) * bat_total
+    uc_E_max = uc_total * (uc_SoC_max / 100)
+    uc_E_min = uc_total * (uc_SoC_min / 100)
+    bat_SoC = 0.0
+    uc_SoC = uc_SoC0
+    use_ref = len(bat_ref) > 0
+    bat_p_max = bat_p_max * 1000
+
+    for k in range(len(powers)):
+        dt = dts[k]
+
+        # Distribuição de potência
+        power = powers[k] * 1000                                                # Conversão para W
+        if use_ref:
+            power_bat = (bat_ref[k] + fb_gain * (fb_target - uc_SoC)) * 1000
+            power_bat = min(max(power_bat, -bat_p_max), bat_p_max)
+            power_uc = power - power_bat
+        elif abs(power) > threshold:
+            power_uc = power - threshold if power > 0 else power + threshold
+            power_bat = threshold if power > 0 else -threshold
+        else:
+            power_uc = 0.0
+            power_bat = power
+
+        # Bateria
+        bat_E, bat_SoC, i_sat, p_rej = _battery_step(power_bat, dt, bat_E, bat_v, bat_total, bat_E_min, bat_E_max, bat_i_max)
+        bat_v = bat_Ns_Nm * _lut_lookup(bat_SoC, lut_SoC, lut_tensao, linear)
+
+        SoC_bat[k] = bat_SoC
+        v_banco_bat[k] = bat_v
+        i_bat[k] = i_sat
+        p_bat_reject[k] = p_rej
+
+        # Supercapacitor
+        uc_E, uc_SoC, uc_v, i_sat, p_rej = _uc_step(power_uc, dt, uc_E, uc_v, uc_total, uc_E_min, uc_E_max, uc_i_max, uc_C_eq)
+
+        SoC_UC[k] = uc_SoC
+        v_banco_uc[k] = uc_v
+        i_uc[k] = i_sat
+        p_uc_reject[k] = p_rej
+
+        p_reject[k] = p_bat_reject[k] + p_uc_reject[k]
+
+    return bat_E, bat_SoC, bat_v, uc_E, uc_SoC, uc_v
+
+
+def simulate_arrays(powers, threshold: float, batt: Batt, uc: Uc, dt=1,
+                    bat_ref=None, fb_gain: float = 0.0, fb_target: float = 0.0, bat_p_max: float = math.inf) -> dict:
+    """
+    Simula o fluxo de potência de um perfil completo em um único kernel
+    :param array powers: Potência total requerida a cada passo (kW, tração - frenagem)
+    :param float threshold: Limiar de potência para distribuição (kW); ignorado se bat_ref for informado
+    :param Batt batt: Bateria, com estado inicial já configurado (atualizada ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (atualizado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s), único ou um por amostra
+    :param array bat_ref: Referência de potência da bateria a cada passo (kW); usa o limiar se None
+    :param float fb_gain: Ganho da realimentação pelo SoC do UC (kW por ponto percentual)
+    :param float fb_target: SoC alvo do UC na realimentação (%)
+    :param float bat_p_max: Potência máxima da bateria na distribuição por referência (kW)
+    :return dict: Vetores de resultado com as mesmas colunas de Simulation.save_data
+    """
+    powers = np.ascontiguousarray(powers, dtype=np.float64)
+    n = powers.shape[0]
+    if n == 0:
+        return {column: np.empty(0) for column in RESULT_COLUMNS}
+    dts = np.ascontiguousarray(np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,)))
+    bat_ref = np.empty(0) if bat_ref is None else np.ascontiguousarray(bat_ref, dtype=np.float64)
+
+    bat = batt.getState()
+    cap = uc.getState()
+    lut = batt.getLUT()
+    if lut is None:
+        lut_SoC, lut_tensao = np.zeros(1), np.full(1, float(bat["Vnom"]))
+    else:
+        lut_SoC, lut_tensao = lut.SoC, lut.tensao
+
+    if HAS_NUMBA:
+        results = {column: np.empty(n) for column in RESULT_COLUMNS}
+    else:
+        # Em Python puro, listas de floats são bem mais rápidas que indexar vetores NumPy
+        powers, dts, lut_SoC, lut_tensao = powers.tolist(), dts.tolist(), lut_SoC.tolist(), lut_tensao.tolist()
+        bat_ref = bat_ref.tolist()
+        results = {column: [0.0] * n for column in RESULT_COLUMNS}
+
+    bat_E, bat_SoC, bat_v, uc_E, uc_SoC, uc_v = _kernel(
+        powers, float(threshold), dts,
+        lut_SoC, lut_tensao, batt.getLUTMethod() == "linear",
+        float(bat["SoC_Energy"]), float(bat["v_banco"]), float(bat["total_energy"]),
+        float(bat["min_SoC"]), float(bat["max_SoC"]), float(6 * bat["Np"] * bat["C"]), float(bat["Ns"] * bat["Nm"]),
+        float(cap["stored_energy"]), float(cap["v_banco"]), float(cap["total_energy"]),
+        float(cap["SoC_min"]), float(cap["SoC_max"]), float(280 * cap["Np"]), float(cap["C_eq"]),
+        *(results[column] for column in RESULT_COLUMNS),
+        bat_ref, float(fb_gain), float(fb_target), float(bat_p_max), float(cap["SoC"])
+    )
+
+    batt.setState({"SoC_Energy": bat_E, "SoC": bat_SoC, "v_banco": bat_v})
+    uc.setState({"stored_energy": uc_E, "SoC": uc_SoC, "v_banco": uc_v})
+    return {column: np.asarray(values, dtype=np.float64) for column, values in results.items()}
+
+
+def _segment_bank(power, dts, E, v, E_min, E_max, i_max, coulomb, soc_of, v_of, window: int = 16) -> tuple:
+    """
+    Trajetória de um banco por trechos resolvidos com somas acumuladas; a cada trecho usa a mais longa
+    das três soluções válidas a partir do estado atual:
+    - sem saturação de corrente nem limite de SoC, a tensão se cancela (E -= V * (P / V) * dt) e a energia
+      é a soma acumulada da potência (igual ao kernel a menos de arredondamento);
+    - com a tensão constante (degrau da LUT por ponto mais próximo), inclusive com corrente saturada,
+      as operações do kernel são as mesmas em todos os passos (resultado idêntico);
+    - parado no limite de SoC com a potência empurrando para fora, a energia e a tensão não mudam.
+    Passos que não se encaixam em nenhuma são calculados um a um. O trecho cresce em progressão
+    geométrica enquanto as soluções cobrem a janela inteira.
+    :param np.ndarray power: Potência do banco a cada passo (W)
+    :param np.ndarray dts: Intervalo de cada passo (s)
+    :param float E: Energia inicial
+    :param float v: Tensão inicial do banco (V)
+    :param float E_min: Energia mínima
+    :param float E_max: Energia máxima
+    :param float i_max: Corrente máxima (A)
+    :param bool coulomb: Energia em Wh pelo contador de Coulomb (bateria); senão em J (UC)
+    :param callable soc_of: Energia -> SoC (%)
+    :param callable v_of: (Energia, SoC) -> tensão do banco (V)
+    :param int window: Tamanho do primeiro trecho após cada passo calculado individualmente
+    :return tuple: Vetores de SoC, tensão, corrente e potência rejeitada e estado final (energia, SoC, tensão)
+    """
+    n = power.shape[0]
+    SoC = np.empty(n)
+    voltage = np.empty(n)
+    current = np.empty(n)
+    reject = np.zeros(n)
+    SoC_last = float(soc_of(E))
+    scale = 3600 if coulomb else 1
+
+    def first(event):
+        return int(np.argmax(event)) if event.any() else event.shape[0]
+
+    k = 0
+    size = window
+    while k < n:
+        end = min(n, k + size)
+        span = end - k
+        P = power[k:end]
+        dt = dts[k:end]
+
+        # 1) Sem saturação nem limite: soma acumulada da potência (mesma associação da soma passo a passo)
+        E_free = np.cumsum(np.concatenate(([E], -P * dt / scale)))[1:]
+        SoC_free = soc_of(E_free)
+        v_free = v_of(np.clip(E_free, E_min, E_max), SoC_free)
+        i_free = P / np.concatenate(([v], v_free[:-1]))
+        j_free = first((np.abs(i_free) > i_max) | (E_free < E_min) | (E_free > E_max))
+
+        # 2) Tensão constante: operações do kernel com V fixo, válidas enquanto a tensão não muda
+        i = P / v
+        i_sat = np.minimum(np.maximum(i, -i_max), i_max)
+        delta = v * (-1 * i_sat * dt / 3600) if coulomb else -1 * v * i_sat * dt
+        E_fixed = np.cumsum(np.concatenate(([E], delta)))[1:]
+        SoC_fixed = soc_of(E_fixed)
+        v_fixed = v_of(np.clip(E_fixed, E_min, E_max), SoC_fixed)
+        j_fixed = first((v_fixed != v) | (E_fixed < E_min) | (E_fixed > E_max))
+        # O passo em que a tensão muda ainda é válido: ela só afeta o passo seguinte
+        if j_fixed < span and v_fixed[j_fixed] != v and E_min <= E_fixed[j_fixed] <= E_max:
+            j_fixed += 1
+
+        # 3) Parado no limite de SoC: a energia é cortada no mesmo valor a cada passo
+        j_pinned = 0
+        if E == E_min or E == E_max:
+            new_energy = E + delta
+            j_pinned = first(new_energy > E_min) if E == E_min else first(new_energy < E_max)
+
+        j = max(j_free, j_fixed, j_pinned)
+        if j == j_pinned and j:
+            SoC[k:k + j] = SoC_last
+            voltage[k:k + j] = v
+            current[k:k + j] = i_sat[:j]
+            reject[k:k + j] = ((i[:j] - i_sat[:j]) * v) / 1000 + ((new_energy[:j] - E) / dt[:j]) / 1000
+        elif j == j_fixed and j:
+            SoC[k:k + j] = SoC_fixed[:j]
+            voltage[k:k + j] = v_fixed[:j]
+            current[k:k + j] = i_sat[:j]
+            reject[k:k + j] = ((i[:j] - i_sat[:j]) * v) / 1000
+            E, SoC_last, v = float(E_fixed[j - 1]), float(SoC_fixed[j - 1]), float(v_fixed[j - 1])
+        elif j:
+            SoC[k:k + j] = SoC_free[:j]
+            voltage[k:k + j] = v_free[:j]
+            current[k:k + j] = i_free[:j]
+            E, SoC_last, v = float(E_free[j - 1]), float(SoC_free[j - 1]), float(v_free[j - 1])
+        k += j
+        if j == span:
+            size *= 2
+            continue
+        if k >= n:
+            break
+
+        # Passo que nenhuma solução cobre: mesmas operações de setCurrent e updateEnergy
+        p, step = float(power[k]), float(dts[k])
+        i_k = p / v
+        i_sat_k = min(max(i_k, -i_max), i_max)
+        p_rej_1 = ((i_k - i_sat_k) * v) / 1000
+        new_energy_k = E + v * (-1 * i_sat_k * step / 3600) if coulomb else E + -1 * v * i_sat_k * step
+        E = min(max(new_energy_k, E_min), E_max)
+        p_rej_2 = ((new_energy_k - E) / step) / 1000
+        SoC_last = float(soc_of(E))
+        v = float(v_of(E, SoC_last))
+
+        SoC[k] = SoC_last
+        voltage[k] = v
+        current[k] = i_sat_k
+        reject[k] = p_rej_1 + p_rej_2
+        k += 1
+        size = window
+
+    return SoC, voltage, current, reject, (E, SoC_last, v)
+
+
+def simulate_segments(powers, threshold: float, batt: Batt, uc: Uc, dt=1) -> dict:
+    """
+    Mesmo resultado de simulate_arrays (a menos de arredondamento, ~1e-12 relativo) por um solucionador
+    por trechos: dada a divisão de potência, bateria e UC são independentes, e fora dos limites de corrente
+    e de SoC cada energia é uma soma acumulada da potência. Vetorizado, sem numba; os passos perto dos
+    limites são calculados um a um.
+    :param array powers: Potência total requerida a cada passo (kW, tração - frenagem)
+    :param float threshold: Limiar de potência para distribuição (kW)
+    :param Batt batt: Bateria, com estado inicial já configurado (atualizada ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (atualizado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s), único ou um por amostra
+    :return dict: Vetores de resultado com as mesmas colunas de simulate_arrays
+    """
+    powers = np.asarray(powers, dtype=np.float64) * 1000
+    n = powers.shape[0]
+    if n == 0:
+        return {column: np.empty(0) for column in RESULT_COLUMNS}
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,))
+
+    # Divisão de potência (supervisory_control) para o perfil inteiro
+    threshold = threshold * 1000
+    power_bat = np.clip(powers, -threshold, threshold)
+    power_uc = np.where(np.abs(powers) > threshold, powers - power_bat, 0.0)
+
+    bat = batt.getState()
+    cap = uc.getState()
+    Ns_Nm = bat["Ns"] * bat["Nm"]
+
+    SoC_bat, v_bat, i_bat, p_bat_reject, (bat_E, bat_SoC, bat_v) = _segment_bank(
+        power_bat, dts, float(bat["SoC_Energy"]), float(bat["v_banco"]),
+        (bat["min_SoC"] / 100) * bat["total_energy"], (bat["max_SoC"] / 100) * bat["total_energy"],
+        6 * bat["Np"] * bat["C"], True,
+        lambda E: (E * 100) / bat["total_energy"],
+        lambda E, SoC: Ns_Nm * batt.LUT(SoC))
+    SoC_UC, v_uc, i_uc, p_uc_reject, (uc_E, uc_SoC, uc_v) = _segment_bank(
+        power_uc, dts, float(cap["stored_energy"]), float(cap["v_banco"]),
+        cap["total_energy"] * (cap["SoC_min"] / 100), cap["total_energy"] * (cap["SoC_max"] / 100),
+        280 * cap["Np"], False,
+        lambda E: (E / cap["total_energy"]) * 100,
+        lambda E, SoC: np.sqrt((2 * E) / cap["C_eq"]))
+
+    batt.setState({"SoC_Energy": bat_E, "SoC": bat_SoC, "v_banco": bat_v})
+    uc.setState({"stored_energy": uc_E, "SoC": uc_SoC, "v_banco": uc_v})
+    return {
+        "SoC_bat": SoC_bat, "v_banco_bat": v_bat, "i_bat": i_bat, "p_bat_reject": p_bat_reject,
+        "SoC_UC": SoC_UC, "v_banco_uc": v_uc, "i_uc": i_uc, "p_uc_reject": p_uc_reject,
+        "p_reject": p_bat_reject + p_uc_reject,
+    }
@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+
+from batt import Batt, check_batt_params
+from drive_cycle import load_sheet, total_power
+from engine import RESULT_COLUMNS, _battery_steps, _uc_steps
+from lut import LUT, default_lut
+from main import Simulation
+from UC import Uc, check_uc_params
+
+PARAM_KEYS = ("C", "Ns", "Np", "Nm", "Vnom", "SoC")
+
+
+def load_profiles(paths: list, sheet: str = "Dados") -> list:
+    """
+    Lê os perfis de potência total de várias planilhas
+    :param list paths: Caminhos das planilhas agregadas (uma por caminhão/rota)
+    :param str sheet: Nome da planilha
+    :return list: Vetores de potência total (kW, tração - frenagem)
+    """
+    return [total_power(load_sheet(path, sheet)) for path in paths]
+
+
+def stack_profiles(profiles) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Empilha perfis de tamanhos diferentes em uma matriz (caminhões x tempo)
+    :param list profiles: Vetores de potência (kW) ou matriz já empilhada
+    :return tuple: Matriz completada com zeros e vetor com o tamanho de cada perfil
+    """
+    if isinstance(profiles, np.ndarray) and profiles.ndim == 2:
+        return profiles.astype(float), np.full(profiles.shape[0], profiles.shape[1])
+
+    lengths = np.array([len(profile) for profile in profiles])
+    powers = np.zeros((len(profiles), lengths.max() if len(profiles) else 0))
+    for k, profile in enumerate(profiles):
+        powers[k, :lengths[k]] = profile
+    return powers, lengths
+
+
+def size_fleet(profiles: list, threshold, config_bat: dict, config_uc: dict) -> tuple[list, list]:
+    """
+    Dimensiona os bancos de cada caminhão com Simulation.size_energy_storage
+    :param list profiles: Vetores de potência total de cada caminhão (kW)
+    :param float|array threshold: Limiar de potência, único ou por caminhão (kW)
+    :param dict config_bat: Configuração de tensão da bateria (Ns e Nm)
+    :param dict config_uc: Configuração de tensão do supercapacitor (Ns e Nm)
+    :return tuple: Listas de parâmetros da bateria e do supercapacitor por caminhão
+    """
+    thresholds = np.broadcast_to(np.asarray(threshold, dtype=float), (len(profiles),))
+    simulation = Simulation()
+    batt_params, uc_params = [], []
+    for profile, th in zip(profiles, thresholds):
+        data = pd.DataFrame({"Traction Power": profile, "Braking Power": 0.0})
+        bp, up = simulation.size_energy_storage(data, th, config_bat, config_uc, verbose=False)
+        batt_params.append(bp)
+        uc_params.append(up)
+    return batt_params, uc_params
+
+
+class FleetResults():
+    def __init__(self, results: dict, lengths: np.ndarray, thresholds: np.ndarray, dt=1):
+        """
+        Resultados de uma simulação de frota
+        :param dict results: Matrizes (caminhões x tempo) com as colunas de engine.RESULT_COLUMNS
+        :param array lengths: Número de amostras válidas de cada caminhão
+        :param array thresholds: Limiar de potência de cada caminhão (kW)
+        :param float|array dt: Intervalo de tempo de cada amostra (s), único ou matriz (caminhões x tempo)
+        """
+        self._results = results
+        self._lengths = lengths
+        self._thresholds = thresholds
+        self._dt = np.broadcast_to(np.asarray(dt, dtype=float), np.shape(results[RESULT_COLUMNS[0]]))
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Matriz (caminhões x tempo) de uma coluna; amostras além do fim de cada perfil são NaN"""
+        return self._results[column]
+
+    def truck(self, index: int) -> pd.DataFrame:
+        """
+        Resultados de um caminhão no mesmo formato de Simulation.save_data
+        :param int index: Índice do caminhão
+        :return pd.DataFrame: Séries temporais do caminhão
+        """
+        n = self._lengths[index]
+        dts = self._dt[index, :n]
+        data = {"Tempo": np.cumsum(dts) - dts}
+        data.update({column: self._results[column][index, :n] for column in RESULT_COLUMNS})
+        return pd.DataFrame(data)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Indicadores por caminhão: extremos de SoC e energias rejeitadas (kWh)
+        :return pd.DataFrame: Uma linha por caminhão
+        """
+        p_reject = self._results["p_reject"]
+        to_kWh = self._dt / 3600                        # Energia de cada amostra por kW (kWh)
+        return pd.DataFrame({
+            "threshold": self._thresholds,
+            "amostras": self._lengths,
+            "SoC_bat_min": np.nanmin(self._results["SoC_bat"], axis=1),
+            "SoC_bat_max": np.nanmax(self._results["SoC_bat"], axis=1),
+            "SoC_UC_min": np.nanmin(self._results["SoC_UC"], axis=1),
+            "SoC_UC_max": np.nanmax(self._results["SoC_UC"], axis=1),
+            "i_bat_max": np.nanmax(np.abs(self._results["i_bat"]), axis=1),
+            "i_uc_max": np.nanmax(np.abs(self._results["i_uc"]), axis=1),
+            "E_reject_bat": np.nansum(np.abs(self._results["p_bat_reject"]) * to_kWh, axis=1),
+            "E_reject_uc": np.nansum(np.abs(self._results["p_uc_reject"]) * to_kWh, axis=1),
+            "E_reject_tracao": np.nansum(np.where(p_reject > 0, p_reject, 0) * to_kWh, axis=1),
+            "E_reject_frenagem": np.nansum(np.where(p_reject < 0, -p_reject, 0) * to_kWh, axis=1),
+        })
+
+    def aggregate(self) -> dict:
+        """
+        Indicadores agregados da frota
+        :return dict: Totais e piores casos entre os caminhões
+        """
+        summary = self.summary()
+        return {
+            "caminhoes": len(self),
+            "amostras": int(summary["amostras"].sum()),
+            "E_reject_tracao": float(summary["E_reject_tracao"].sum()),
+            "E_reject_frenagem": float(summary["E_reject_frenagem"].sum()),
+            "E_reject": float((summary["E_reject_tracao"] + summary["E_reject_frenagem"]).sum()),
+            "SoC_bat_min": float(summary["SoC_bat_min"].min()),
+            "SoC_UC_min": float(summary["SoC_UC_min"].min()),
+            "i_bat_max": float(summary["i_bat_max"].max()),
+            "i_uc_max": float(summary["i_uc_max"].max()),
+        }
+
+
+def _param_array(params: list, key: str) -> np.ndarray:
+    """Extrai um parâmetro de uma lista de dicionários como vetor"""
+    return np.array([p[key] for p in params], dtype=float)
+
+
+def stack_steps(dt, lengths: np.ndarray) -> np.ndarray:
+    """
+    Intervalos de tempo de cada caminhão em uma matriz (caminhões x tempo)
+    :param float|list|array dt: Intervalo único, um por caminhão ou um vetor por amostra de cada caminhão
+                                (lista de vetores ou matriz, ex.: drive_cycle.time_steps do registro)
+    :param array lengths: Número de amostras de cada perfil
+    :return np.ndarray: Matriz de intervalos (s); amostras além do fim de cada perfil valem 1 s
+    :raises ValueError: Se um caminhão tiver menos intervalos que amostras
+    """
+    n_trucks = len(lengths)
+    n_steps = int(lengths.max()) if n_trucks else 0
+    per_sample = isinstance(dt, (list, tuple)) and len(dt) > 0 and np.ndim(dt[0]) > 0
+    if not per_sample and np.ndim(dt) < 2:
+        per_truck = np.broadcast_to(np.asarray(dt, dtype=float), (n_trucks,))
+        return np.repeat(per_truck[:, None], n_steps, axis=1)
+
+    dts, steps = stack_profiles(dt)
+    if dts.shape[0] != n_trucks or np.any(steps < lengths):
+        raise ValueError("É necessário um intervalo de tempo por amostra de cada caminhão")
+    dts = dts[:, :n_steps]
+    dts[np.arange(n_steps)[None, :] >= lengths[:, None]] = 1.0
+    return dts
+
+
+def simulate_fleet(profiles, threshold, batt_params: list, uc_params: list,
+                   dt=1, lut: LUT | None = None, lut_method: str | None = None) -> FleetResults:
+    """
+    Simula vários caminhões em paralelo, avançando todos os bancos juntos em vetores (um elemento por caminhão),
+    com as mesmas equações de passo do kernel (engine._bank_steps)
+    :param list|array profiles: Perfis de potência total (kW), lista de vetores ou matriz (caminhões x tempo)
+    :param float|array threshold: Limiar de potência, único ou por caminhão (kW)
+    :param list batt_params: Parâmetros da bateria por caminhão (C, Ns, Np, Nm, Vnom, SoC)
+    :param list uc_params: Parâmetros do supercapacitor por caminhão (C, Ns, Np, Nm, Vnom, SoC)
+    :param float|list|array dt: Intervalo de tempo (s): único, um por caminhão ou um vetor por caminhão (ver stack_steps)
+    :param LUT lut: Tabela SoC x Tensão das células; usa a LUT padrão se None
+    :param str lut_method: Método de consulta da LUT; usa o padrão da tabela se None
+    :return FleetResults: Resultados por caminhão e agregados
+    :raises ValueError: Se os parâmetros forem inválidos
+    """
+    powers, lengths = stack_profiles(profiles)
+    n_trucks, n_steps = powers.shape
+    if len(batt_params) != n_trucks or len(uc_params) != n_trucks:
+        raise ValueError("É necessário um conjunto de parâmetros de bateria e supercapacitor por caminhão")
+    thresholds = np.broadcast_to(np.asarray(threshold, dtype=float), (n_trucks,)).copy()
+    dts = stack_steps(dt, lengths)
+    lut = lut or default_lut()
+    batt_default = Batt(lut).getState()
+    uc_default = Uc().getState()
+
+    # Mesmas validações de Batt.setParams e Uc.setParams, inclusive a faixa de SoC inicial
+    for k in range(n_trucks):
+        try:
+            check_batt_params(*(batt_params[k][key] for key in PARAM_KEYS), batt_default["min_SoC"], batt_default["max_SoC"])
+            check_uc_params(*(uc_params[k][key] for key in PARAM_KEYS))
+        except ValueError as e:
+            raise ValueError(f"Caminhão {k}: {e}") from e
+
+    # Bateria (mesmas equações de Batt.setParams)
+    C_b, Ns_b, Np_b, Nm_b, Vnom_b, SoC_b = (_param_array(batt_params, key) for key in PARAM_KEYS)
+    bat_total = (Np_b * C_b) * (Ns_b * Nm_b * Vnom_b)
+    bat_E = (SoC_b / 100) * bat_total
+    bat_v = lut(SoC_b, lut_method) * Ns_b * Nm_b
+    bat_E_min = (batt_default["min_SoC"] / 100) * bat_total
+    bat_E_max = (batt_default["max_SoC"] / 100) * bat_total
+    bat_i_max = 6 * Np_b * C_b
+    Ns_Nm_b = Ns_b * Nm_b
+
+    # Supercapacitor (mesmas equações de Uc.setParams: a energia total usa a capacitância
+    # equivalente do construtor, calculada antes da atualização dos parâmetros)
+    C_u, Ns_u, Np_u, Nm_u, Vnom_u, SoC_u = (_param_array(uc_params, key) for key in PARAM_KEYS)
+    uc_v_total = Vnom_u * Ns_u * Nm_u
+    uc_total = 0.5 * uc_default["C_eq"] * (uc_v_total**2)
+    uc_v = uc_v_total * (SoC_u / 100)
+    uc_C_eq = C_u * Np_u / (Ns_u * Nm_u)
+    uc_E = 0.5 * uc_C_eq * (uc_v**2)
+    uc_E_max = uc_total * (uc_default["SoC_max"] / 100)
+    uc_E_min = uc_total * (uc_default["SoC_min"] / 100)
+    uc_i_max = 280 * Np_u
+
+    results = {column: np.empty((n_trucks, n_steps)) for column in RESULT_COLUMNS}
+    threshold_w = thresholds * 1000
+
+    for k in range(n_steps):
+        step = dts[:, k]
+
+        # Distribuição de potência (supervisory_control)
+        power = powers[:, k] * 1000
+        power_bat = np.minimum(np.maximum(power, -threshold_w), threshold_w)
+        power_uc = power - power_bat
+
+        bat_E, SoC_bat, i_sat, p_rej = _battery_steps(power_bat, step, bat_E, bat_v, bat_total, bat_E_min, bat_E_max, bat_i_max)
+        bat_v = Ns_Nm_b * lut(SoC_bat, lut_method)
+        results["SoC_bat"][:, k] = SoC_bat
+        results["v_banco_bat"][:, k] = bat_v
+        results["i_bat"][:, k] = i_sat
+        results["p_bat_reject"][:, k] = p_rej
+
+        uc_E, SoC_uc, uc_v, i_sat, p_rej = _uc_steps(power_uc, step, uc_E, uc_v, uc_total, uc_E_min, uc_E_max, uc_i_max, uc_C_eq)
+        results["SoC_UC"][:, k] = SoC_uc
+        results["v_banco_uc"][:, k] = uc_v
+        results["i_uc"][:, k] = i_sat
+        results["p_uc_reject"][:, k] = p_rej
+
+    results["p_reject"] = results["p_bat_reject"] + results["p_uc_reject"]
+
+    # Perfis mais curtos foram completados com potência nula; descarta essas amostras
+    invalid = np.arange(n_steps)[None, :] >= lengths[:, None]
+    if invalid.any():
+        for column in RESULT_COLUMNS:
+            results[column][invalid] = np.nan
+
+    return FleetResults(results, lengths, thresholds, dts)
@@ -0,0 +1,115 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+LUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "LUT_batt.csv")
+
+
+class LUT():
+    def __init__(self, SoC, tensao, method: str = "nearest"):
+        """
+        Tabela SoC x Tensão de circuito aberto de uma célula, carregada uma única vez
+        :param array SoC: Estados de carga da tabela (%)
+        :param array tensao: Tensões correspondentes (V)
+        :param str method: Método de consulta padrão ("nearest" ou "linear")
+        :raises ValueError: Se a tabela for vazia ou o método inválido
+        """
+        SoC = np.asarray(SoC, dtype=float)
+        tensao = np.asarray(tensao, dtype=float)
+        if SoC.ndim != 1 or SoC.shape != tensao.shape or SoC.size == 0:
+            raise ValueError("SoC e tensão devem ser vetores não vazios de mesmo tamanho")
+        if method not in ("nearest", "linear"):
+            raise ValueError("Método deve ser 'nearest' ou 'linear'")
+
+        # Ordena por SoC e mantém apenas o primeiro ponto de cada SoC repetido,
+        # reproduzindo o critério de desempate do idxmin usado originalmente
+        ordem = np.argsort(SoC, kind="stable")
+        SoC, tensao = SoC[ordem], tensao[ordem]
+        unico = np.ones(SoC.size, dtype=bool)
+        unico[1:] = SoC[1:] != SoC[:-1]
+        self._SoC = SoC[unico]
+        self._tensao = tensao[unico]
+        self._method = method
+
+    @classmethod
+    def from_csv(cls, path: str = LUT_PATH, sep: str = ";", invert: bool = True, method: str = "nearest") -> "LUT":
+        """
+        Carrega a LUT a partir de um arquivo CSV com colunas "SoC" e "Tensao"
+        :param str path: Caminho do arquivo CSV
+        :param str sep: Separador do CSV
+        :param bool invert: Inverte o SoC (100 - SoC) quando a tabela está em profundidade de descarga
+        :param str method: Método de consulta padrão ("nearest" ou "linear")
+        :return LUT: Tabela carregada
+        """
+        df = pd.read_csv(path, sep=sep)
+        SoC = df["SoC"].to_numpy(dtype=float)
+        if invert:
+            SoC = 100 - SoC  # Inverte SoC para corresponder ao padrão de carga
+        return cls(SoC, df["Tensao"].to_numpy(dtype=float), method)
+
+    @property
+    def SoC(self) -> np.ndarray:
+        """Estados de carga da tabela, em ordem crescente (%)"""
+        return self._SoC
+
+    @property
+    def tensao(self) -> np.ndarray:
+        """Tensões da tabela, na mesma ordem de SoC (V)"""
+        return self._tensao
+
+    @property
+    def method(self) -> str:
+        """Método de consulta padrão"""
+        return self._method
+
+    def nearest(self, SoC):
+        """
+        Consulta a tensão do ponto da tabela mais próximo de cada SoC
+        :param float|array SoC: Estado(s) de carga (%)
+        :return float|array: Tensão correspondente (V)
+        """
+        x = np.asarray(SoC, dtype=float)
+        if self._SoC.size == 1:
+            return float(self._tensao[0]) if x.ndim == 0 else np.full(x.shape, self._tensao[0])
+
+        idx = np.clip(np.searchsorted(self._SoC, x), 1, self._SoC.size - 1)
+        # Em caso de empate escolhe o maior SoC, como o idxmin sobre a tabela invertida
+        esquerda = x - self._SoC[idx - 1]
+        direita = self._SoC[idx] - x
+        idx = np.where(direita <= esquerda, idx, idx - 1)
+        tensao = self._tensao[idx]
+        return float(tensao) if tensao.ndim == 0 else tensao
+
+    def linear(self, SoC):
+        """
+        Consulta a tensão por interpolação linear entre os pontos da tabela
+        :param float|array SoC: Estado(s) de carga (%)
+        :return float|array: Tensão correspondente (V)
+        """
+        tensao = np.interp(SoC, self._SoC, self._tensao)
+        return float(tensao) if np.ndim(tensao) == 0 else tensao
+
+    def __call__(self, SoC, method: str | None = None):
+        """
+        Consulta a tensão para um ou vários SoC
+        :param float|array SoC: Estado(s) de carga (%)
+        :param str method: Método de consulta; usa o padrão da tabela se None
+        :return float|array: Tensão correspondente (V)
+        """
+        method = method or self._method
+        if method == "nearest":
+            return self.nearest(SoC)
+        if method == "linear":
+            return self.linear(SoC)
+        raise ValueError("Método deve ser 'nearest' ou 'linear'")
+
+
+@lru_cache(maxsize=None)
+def default_lut() -> LUT:
+    """
+    Retorna a LUT padrão da bateria, lida do disco apenas na primeira chamada
+    :return LUT: Tabela compartilhada entre as instâncias de Batt
+    """
+    return LUT.from_csv(LUT_PATH)
@@ -1,31 +1,119 @@
+import functools
+import os
+from contextlib import nullcontext
+
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from batt import Batt
 from UC import Uc
+from checkpoint import Checkpoints
+from lut import LUT
+from drive_cycle import load_cycle, time_steps, merge_constant_segments
+from engine import simulate_arrays
+from profiling import Profiler, reject_breakdown
+from memo import ResultCache, make_key, simulate_cached
+from strategies import Strategy, simulate_strategy
+from trace_buffer import TraceBuffer
+
+# Parâmetros da bateria para diferentes níveis de tensão
+VOLTAGE_CONFIGS_BAT = {
+    540: {"Ns": 16, "Nm": 10},   # 16 * 10 * 3.35 ≈ 540V
+    720: {"Ns": 16, "Nm": 13},   # 16 * 13 * 3.35 ≈ 720V
+    960: {"Ns": 16, "Nm": 18},   # 16 * 18 * 3.35 ≈ 960V
+    1080: {"Ns": 16, "Nm": 20},  # 16 * 20 * 3.35 ≈ 1080V
+    1260: {"Ns": 16, "Nm": 24},  # 16 * 24 * 3.35 ≈ 1260V
+    1440: {"Ns": 16, "Nm": 27}   # 16 * 27 * 3.35 ≈ 1440V
+}
+
+# Parâmetros do supercapacitor para diferentes níveis de tensão
+VOLTAGE_CONFIGS_UC = {240  : {"Ns": 16, "Nm" : 5},  # 16 * 5 * 3.0 ≈ 240V
+                      480  : {"Ns": 16, "Nm" : 10},  # 16 * 10 * 3.0 ≈ 480V
+                      720  : {"Ns": 16, "Nm" : 15},  # 16 * 15 * 3.0 ≈ 720V
+                      960  : {"Ns": 16, "Nm" : 20},  # 16 * 20 * 3.0 ≈ 960V
+                      1200 : {"Ns": 16, "Nm" : 25},  # 16 * 25 * 3.0 ≈ 1200V
+}
+
+def sample_steps(data: pd.DataFrame, dt=None):
+    """
+    Intervalo de tempo de cada amostra de uma planilha
+    :param pd.DataFrame data: Planilha do ciclo de condução
+    :param float|array dt: Intervalo informado (s); se None, é calculado pela coluna "Time" quando existir, senão 1 s
+    :return float|np.ndarray: Intervalo único ou um por amostra (s)
+    """
+    if dt is not None:
+        return dt
+    if "Time" in data:
+        return time_steps(data["Time"].to_numpy())
+    return 1
+
+
+def _profiled(phase: str):
+    """Mede o método como uma fase da instrumentação, quando habilitada"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._profiler is None:
+                return method(self, *args, **kwargs)
+            with self._profiler.phase(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class Simulation():
-    def __init__(self):
-        """Método para calcular o fluxo de potência do caminhão."""
+    def __init__(self, lut: LUT | None = None, cache: ResultCache | None = None,
+                 trace_capacity: int | None = None, ring: bool = False, trace_dtype: str = "float64"):
+        """
+        Método para calcular o fluxo de potência do caminhão.
+        :param LUT lut: Tabela SoC x Tensão das células da bateria; usa a LUT padrão se None
+        :param ResultCache cache: Cache de dimensionamentos e simulações (memo.ResultCache); sem cache se None
+        :param int trace_capacity: Amostras pré-alocadas para os resultados (trace_buffer.TraceBuffer)
+        :param bool ring: Guarda só as últimas trace_capacity amostras (buffer circular)
+        :param str trace_dtype: Tipo das séries de resultado ("float64" ou "float32")
+        """
         self.fig_width_cm = 24/2.4
         self.fig_height_cm = 18/2.4
         
-        # Dados da bateria
-        self._SoC = []
-        self._v_banco_bat = []
-        self._i_bat = []
-        self._p_bat_reject = []
-
-        # Dados do supercapacitor
-        self._v_banco_uc = []
-        self._i_uc = []
-        self._SoC_UC = []
-        self._p_uc_reject = []
-        
-        self._p_reject = []
+        self._trace = TraceBuffer(trace_capacity, ring, trace_dtype)
+        self._reset_results()
 
         self._uc = Uc()
-        self._batt = Batt()
+        self._batt = Batt(lut)
+        self._profiler = None
+        self._cache = cache
+
+    def enable_profiling(self, profiler: Profiler | None = None) -> Profiler:
+        """
+        Habilita a instrumentação: tempo por fase (ingestao, dimensionamento, simulacao, graficos, gravacao),
+        contadores de saturação de corrente e de limite de SoC por banco e histograma da potência rejeitada
+        :param Profiler profiler: Instrumentação a usar; cria uma nova se None
+        :return Profiler: Instrumentação ativa (report() para o relatório)
+        """
+        self.disable_profiling()
+        self._profiler = profiler or Profiler()
+        self._profiler.attach(self._batt, "bat")
+        self._profiler.attach(self._uc, "uc")
+        return self._profiler
+
+    def disable_profiling(self) -> Profiler | None:
+        """
+        Desabilita a instrumentação, restaurando os métodos originais de Batt e Uc
+        :return Profiler: Instrumentação que estava ativa, com os dados coletados
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.detach()
+        self._profiler = None
+        return profiler
+
+    def _phase(self, name: str):
+        """Contexto que mede uma fase quando a instrumentação está habilitada"""
+        return nullcontext() if self._profiler is None else self._profiler.phase(name)
+
+    def _reset_results(self) -> None:
+        """Descarta resultados de simulações anteriores"""
+        self._trace.clear()
+        self._replay = None
 
     def setParam_Batt(self, C: float, Ns: int, Np: int, Nm: int, Vnom: float, SoC: float) -> None:
         """
@@ -69,131 +157,290 @@ class Simulation():
 
     def plot_power_distribution(self, data, powers):
         """Plota distribuição de potência"""
-        fig, axs = plt.subplots(figsize=(self.fig_width_cm, self.fig_height_cm), nrows=3, ncols=1, sharex=True)
-        
-        axs[0].step(data["Time"], data["Traction Power"], where="post", linewidth=2, color="tab:blue", label="Tração")
-        axs[0].grid()
-        axs[0].legend(loc="upper right")
-        axs[0].set_ylabel("Potência [kW]")
-
-        axs[1].step(data["Time"], data["Braking Power"], where="post", linewidth=2, color="tab:orange", label="Frenagem")
-        axs[1].grid()
-        axs[1].legend(loc="upper right")
-        axs[1].set_ylabel("Potência [kW]")
-
-        axs[2].step(data["Time"], powers, where="post", linewidth=2, color="tab:green", label="Total")
-        axs[2].grid()
-        axs[2].set_ylabel("Potência [kW]")
-        axs[2].legend(loc="upper right")
-        axs[2].set_xlim(0, data["Time"].iloc[-1])
-        
-        plt.tight_layout()
-        plt.show(block=False)
+        import report
+        report.plot_power_distribution(data, powers, self.fig_width_cm, self.fig_height_cm)
 
     def plot_LUT(self):
         """Plota LUT da bateria"""
-        df = pd.read_csv("data\\LUT_batt.csv", sep=";")
-        plt.figure(figsize=(self.fig_width_cm, self.fig_height_cm/2))
-        plt.plot(100 - df["SoC"], df["Tensao"], color = 'tab:blue', linewidth = 2, label = "LUT Bateria")   
-        plt.grid()
-        plt.legend(loc="upper left")
-        plt.ylabel("Tensão [V]")
-        plt.xlabel("SoC [%]")
-        plt.title("Curva SoC x Tensão da bateria")
-        plt.xlim(0, 100)
-        plt.show(block = False)
+        import report
+        report.plot_LUT(self._batt.getLUT(), self.fig_width_cm, self.fig_height_cm)
 
     def plot_results(self, time):
         """Plota resultados da simulação"""
-        fig, axs = plt.subplots(3, 2, figsize=(self.fig_width_cm*2, self.fig_height_cm), sharex=True)
-        
-        # Bateria (coluna esquerda)
-        axs[0,0].step(time, self._SoC, linewidth=2, color="tab:blue", label="SoC Bateria")
-        axs[0,0].grid()
-        axs[0,0].legend(loc="upper right")
-        axs[0,0].set_ylabel("SoC [%]")
-
-        axs[1,0].step(time, self._v_banco_bat, linewidth=2, color="tab:orange", label="Tensão Bateria")
-        axs[1,0].grid()
-        axs[1,0].legend(loc="upper right")
-        axs[1,0].set_ylabel("Tensão [V]")
-
-        axs[2,0].step(time, self._i_bat, linewidth=2, color="tab:green", label="Corrente Bateria")
-        axs[2,0].grid()
-        axs[2,0].legend(loc="upper right")
-        axs[2,0].set_ylabel("Corrente [A]")
-        axs[2,0].set_xlabel("Tempo [s]")
-        axs[2,0].set_xlim(0, time.iloc[-1])
-        
-        # Supercapacitor (coluna direita)
-        axs[0,1].step(time, self._SoC_UC, linewidth=2, color="tab:blue", label="SoC UC")
-        axs[0,1].grid()
-        axs[0,1].legend(loc="upper right")
-        axs[0,1].set_ylabel("SoC [%]")
-
-        axs[1,1].step(time, self._v_banco_uc, linewidth=2, color="tab:orange", label="Tensão UC")
-        axs[1,1].grid()
-        axs[1,1].legend(loc="upper right")
-        axs[1,1].set_ylabel("Tensão [V]")
-
-        axs[2,1].step(time, self._i_uc, linewidth=2, color="tab:green", label="Corrente UC")
-        axs[2,1].grid()
-        axs[2,1].legend(loc="upper right")
-        axs[2,1].set_ylabel("Corrente [A]")
-        axs[2,1].set_xlabel("Tempo [s]")
-        axs[2,1].set_xlim(0, time.iloc[-1])
-        
-        plt.tight_layout()
-        plt.show()
+        import report
+        report.plot_results(time, self.results(), self.fig_width_cm, self.fig_height_cm)
 
-    def simulate(self, data: str, sheet: str, threshold : float) -> None:
+    def results(self) -> pd.DataFrame:
+        """
+        Retorna os resultados da última simulação
+        :return pd.DataFrame: Séries temporais com as colunas de engine.RESULT_COLUMNS
+        """
+        return self._trace.to_frame()
+
+    def simulate(self, data: str | pd.DataFrame, sheet: str, threshold : float, kernel: bool = True, plot: bool = False,
+                 dt=None, merge_tol: float | None = None, max_dt: float | None = None,
+                 strategy: Strategy | None = None, checkpoint_every: float | None = None) -> pd.DataFrame:
         """Executa simulação
-        :param str data: Caminho para arquivo de dados
-        :param str sheet: Nome da planilha
+        :param str|pd.DataFrame data: Caminho para arquivo de dados ou planilha já carregada (drive_cycle.load_cycle)
+        :param str sheet: Nome da planilha (usado apenas quando data é um caminho)
         :param float threshold: Limiar de potência para distribuição (kW)
+        :param bool kernel: Usa o kernel vetorizado (engine.simulate_arrays); se False, usa o laço passo a passo
+        :param bool plot: Plota perfil, LUT e resultados (importa o matplotlib); se False, só calcula
+        :param float|array dt: Intervalo de cada amostra (s); se None, usa a coluna "Time" do registro quando existir, senão 1 s
+        :param float merge_tol: Agrupa trechos de potência constante dentro desta tolerância (kW) em um único passo; sem agrupamento se None
+        :param float max_dt: Maior duração de um passo agrupado (s)
+        :param Strategy strategy: Estratégia de gerenciamento de energia (strategies.py); limiar simétrico se None (só com kernel)
+        :param float checkpoint_every: Guarda o estado dos bancos a cada checkpoint_every segundos, para resimulate;
+                                       sem pontos de restauração se None (só com kernel, sem o cache de resultados)
+        :return pd.DataFrame: Resultados da simulação, com o instante de início de cada passo em "Tempo" (s)
         """
-        data = pd.read_excel(data, sheet_name=sheet)
-        data["Time"] = range(0, len(data))
-        powers = data['Traction Power'] - data["Braking Power"]
+        if strategy is not None and not kernel:
+            raise ValueError("Estratégias só são suportadas com kernel=True")
+        if checkpoint_every is not None and not kernel:
+            raise ValueError("Pontos de restauração só são suportados com kernel=True")
+
+        with self._phase("ingestao"):
+            if isinstance(data, pd.DataFrame):
+                data = data.copy(deep=False)
+            else:
+                data = load_cycle(data, sheet)
+            dt = sample_steps(data, dt)
+            powers = (data['Traction Power'] - data["Braking Power"]).to_numpy(dtype=float)
+        self._reset_results()
         
-        # Plota distribuição de potência
-        self.plot_power_distribution(data, powers)
-        # Plota LUT bateria
-        self.plot_LUT()
+        if plot:
+            with self._phase("graficos"):
+                # Plota distribuição de potência
+                dts = np.broadcast_to(np.asarray(dt, dtype=float), (len(data),))
+                data["Time"] = np.cumsum(dts) - dts
+                self.plot_power_distribution(data, powers)
+                # Plota LUT bateria
+                self.plot_LUT()
+
+        if merge_tol is not None:
+            with self._phase("ingestao"):
+                # Passos longos em trechos de potência constante (ex.: caminhão parado)
+                powers, dt, _ = merge_constant_segments(powers, dt, merge_tol, max_dt)
         
         # Simulação
-        for power in powers:
+        with self._phase("simulacao"):
+            if kernel:
+                if self._profiler is not None:
+                    bat, cap = self._batt.getState(), self._uc.getState()
+                if checkpoint_every is not None:
+                    self._start_replay(powers, threshold, dt, strategy, checkpoint_every)
+                else:
+                    if strategy is None:
+                        results = simulate_cached(self._cache, powers, threshold, self._batt, self._uc, dt)
+                    else:
+                        results = simulate_strategy(powers, strategy, self._batt, self._uc, dt)
+                    self._store_results(results, dt)
+            else:
+                self.simulate_loop(powers, threshold, dt)
+
+        if self._profiler is not None:
+            if kernel and checkpoint_every is None:
+                self._count_rejections(powers, threshold, results, bat, cap, strategy,
+                                       None if strategy is None else strategy.split(powers, dt))
+            self._profiler.add_rejections(self._trace.column("p_reject"))
+
+        if plot:
+            with self._phase("graficos"):
+                # Plota resultados
+                self.plot_results(self._trace.column("Tempo"))
+
+        return self.results()
+
+    def simulate_loop(self, powers, threshold: float, dt=1) -> None:
+        """
+        Simulação de referência, passo a passo, usando os métodos de Batt e Uc
+        :param iterable powers: Potência total requerida a cada passo (kW)
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param float|array dt: Intervalo de tempo de cada passo (s), único ou um por amostra
+        """
+        powers = np.asarray(powers, dtype=float)
+        dts = np.broadcast_to(np.asarray(dt, dtype=float), powers.shape).tolist()
+        for power, dt in zip(powers.tolist(), dts):
             # Distribuição de potência
             power_bat, power_uc = self.supervisory_control(power, threshold)
             
             # Atualiza bateria
             i_bat, p_bat_reject_1 = self._batt.setCurrent(power_bat)
-            SoC, v_banco_bat, p_bat_reject_2 = self._batt.updateEnergy(i_bat, 1)
+            SoC, v_banco_bat, p_bat_reject_2 = self._batt.updateEnergy(i_bat, dt)
             p_bat_reject = p_bat_reject_1 + p_bat_reject_2
             
             # Atualiza supercapacitor
             i_uc, p_uc_reject_1 = self._uc.setCurrent(power_uc)
-            SoC_uc, v_banco_uc, p_uc_reject_2 = self._uc.updateEnergy(i_uc, 1)
+            SoC_uc, v_banco_uc, p_uc_reject_2 = self._uc.updateEnergy(i_uc, dt)
             p_uc_reject = p_uc_reject_1 + p_uc_reject_2
 
             p_reject = p_bat_reject + p_uc_reject
             
-            # Armazena resultados
-            self._SoC.append(SoC)
-            self._v_banco_bat.append(v_banco_bat)
-            self._i_bat.append(i_bat)
-            self._p_bat_reject.append(p_bat_reject)
-
-            self._SoC_UC.append(SoC_uc)
-            self._i_uc.append(i_uc)
-            self._v_banco_uc.append(v_banco_uc)
-            self._p_uc_reject.append(p_uc_reject)
+            # Armazena resultados (ordem de engine.RESULT_COLUMNS)
+            self._trace.append(dt, SoC, v_banco_bat, i_bat, p_bat_reject,
+                               SoC_uc, v_banco_uc, i_uc, p_uc_reject, p_reject)
 
-            self._p_reject.append(p_reject)
+    def _count_rejections(self, powers: np.ndarray, threshold: float, results: dict, bat: dict, cap: dict,
+                          strategy: Strategy | None = None, bat_ref=None) -> None:
+        """
+        Contadores de saturação de corrente e de limite de SoC de um trecho simulado pelo kernel: o kernel não chama
+        os métodos instrumentados, então as contagens são refeitas a partir dos vetores (profiling.reject_breakdown)
+        :param np.ndarray powers: Potência total de cada passo do trecho (kW)
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param dict results: Vetores do trecho retornados por engine.simulate_arrays
+        :param dict bat: Estado da bateria antes do trecho (Batt.getState)
+        :param dict cap: Estado do supercapacitor antes do trecho (Uc.getState)
+        :param Strategy strategy: Estratégia de gerenciamento de energia; limiar simétrico se None
+        :param array bat_ref: Referência de potência da bateria do trecho (kW), com estratégia
+        """
+        feedback = {} if strategy is None else {"bat_ref": bat_ref, "fb_gain": strategy.feedback_gain,
+                                                "fb_target": strategy.feedback_target,
+                                                "bat_p_max": strategy.p_max_bat, "uc_SoC0": cap["SoC"]}
+        flags = reject_breakdown(powers, threshold, results, bat["v_banco"], cap["v_banco"],
+                                 6 * bat["Np"] * bat["C"], 280 * cap["Np"], **feedback)
+        for name, mask in flags.items():
+            self._profiler.count(name, np.count_nonzero(mask))
+
+    def _start_replay(self, powers: np.ndarray, threshold: float, dt, strategy: Strategy | None, interval: float) -> None:
+        """
+        Simula o perfil guardando pontos de restauração e tudo o que resimulate precisa para retomar dali
+        :param np.ndarray powers: Potência total requerida a cada passo (kW)
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param float|array dt: Intervalo de tempo de cada passo (s)
+        :param Strategy strategy: Estratégia de gerenciamento de energia; limiar simétrico se None
+        :param float interval: Intervalo entre pontos de restauração (s)
+        """
+        n = powers.shape[0]
+        dts = np.array(np.broadcast_to(np.asarray(dt, dtype=float), (n,)))
+        self._replay = {
+            "powers": powers,
+            "dt": dts,
+            "threshold": np.full(n, float(threshold)),      # Limiar de cada passo (kW)
+            "bat_ref": None if strategy is None else strategy.split(powers, dt),
+            "strategy": strategy,
+            "changes": {},                                  # Passo -> {"bat": estado parcial, "uc": estado parcial}
+            "checkpoints": Checkpoints(dts, interval),
+        }
+        self._replay["checkpoints"].save(0, self._batt, self._uc)
+        self._run_replay(0, count=self._profiler is not None)
 
-        # Plota resultados
-        # print(self._SoC_UC)                                     # APAGAR DEPOIS
-        self.plot_results(data["Time"])
+    def _run_replay(self, start: int, count: bool = False) -> None:
+        """
+        Simula do ponto de restauração start até o fim do perfil, aplicando as mudanças de parâmetro no caminho
+        e guardando novos pontos de restauração
+        :param int start: Índice de um ponto de restauração guardado
+        :param bool count: Acumula os contadores de rejeição de cada trecho no profiler
+        """
+        replay = self._replay
+        checkpoints = replay["checkpoints"]
+        powers, dts, thresholds, bat_ref = replay["powers"], replay["dt"], replay["threshold"], replay["bat_ref"]
+        strategy = replay["strategy"]
+        n = powers.shape[0]
+
+        checkpoints.restore(start, self._batt, self._uc)
+        checkpoints.discard_after(start)
+        self._trace.truncate(start)
+
+        # Trechos entre pontos de restauração, mudanças de bancos e mudanças de limiar
+        grid = set(checkpoints.grid.tolist())
+        bounds = np.union1d(checkpoints.grid, np.fromiter(replay["changes"], dtype=np.int64))
+        bounds = np.union1d(bounds, np.flatnonzero(np.diff(thresholds)) + 1)
+        bounds = np.append(bounds[(bounds > start) & (bounds < n)], n)
+
+        k = start
+        for stop in bounds.tolist():
+            if k != start and k in grid:
+                checkpoints.save(k, self._batt, self._uc)
+            changes = replay["changes"].get(k, {})
+            if "bat" in changes:
+                self._batt.setState(changes["bat"])
+            if "uc" in changes:
+                self._uc.setState(changes["uc"])
+
+            if count:
+                bat, cap = self._batt.getState(), self._uc.getState()
+            if bat_ref is None:
+                results = simulate_arrays(powers[k:stop], thresholds[k], self._batt, self._uc, dts[k:stop])
+            else:
+                results = simulate_arrays(powers[k:stop], 0, self._batt, self._uc, dts[k:stop], bat_ref=bat_ref[k:stop],
+                                          fb_gain=strategy.feedback_gain, fb_target=strategy.feedback_target,
+                                          bat_p_max=strategy.p_max_bat)
+            if count:
+                self._count_rejections(powers[k:stop], thresholds[k], results, bat, cap, strategy,
+                                       None if bat_ref is None else bat_ref[k:stop])
+            self._trace.extend(results, dts[k:stop])
+            k = stop
+
+    def resimulate(self, time: float, threshold: float | None = None, batt: dict | None = None,
+                   uc: dict | None = None) -> float:
+        """
+        Muda parâmetros a partir de um instante e simula de novo só a partir do ponto de restauração mais próximo
+        antes dele (exige simulate(..., checkpoint_every=...)). As mudanças se acumulam entre chamadas.
+        Os resultados ficam em results(); montar o DataFrame custa mais que a própria ressimulação em perfis longos.
+        :param float time: Instante a partir do qual valem os novos parâmetros (s)
+        :param float threshold: Novo limiar de potência (kW); mantém o atual se None (não se aplica com estratégia)
+        :param dict batt: Estado parcial da bateria a aplicar (ex.: {"min_SoC": 20}); sem mudança se None
+        :param dict uc: Estado parcial do supercapacitor a aplicar (ex.: {"SoC_min": 10, "SoC_max": 90}); sem mudança se None
+        :return float: Instante do ponto de restauração de onde a simulação foi retomada (s)
+        :raises ValueError: Sem simulação com pontos de restauração, limiar com estratégia, chave de estado desconhecida
+                            ou ponto de restauração já descartado pelo buffer circular
+        """
+        replay = self._replay
+        if replay is None:
+            raise ValueError("Nenhuma simulação com pontos de restauração (simulate(..., checkpoint_every=...))")
+        if threshold is not None and replay["bat_ref"] is not None:
+            raise ValueError("O limiar não se aplica a simulações com estratégia")
+        for bank, change in ((self._batt, batt), (self._uc, uc)):
+            unknown = set(change or ()) - set(bank._STATE_KEYS)
+            if unknown:
+                raise ValueError(f"Chaves de estado desconhecidas: {sorted(unknown)}")
+
+        checkpoints = replay["checkpoints"]
+        index = checkpoints.index(time)
+        start = checkpoints.nearest(index)
+        if start < self._trace.total - len(self._trace):
+            raise ValueError(f"O ponto de restauração em {checkpoints.starts[start]} s já saiu do buffer circular de resultados")
+        if threshold is not None:
+            replay["threshold"][index:] = threshold
+        for name, change in (("bat", batt), ("uc", uc)):
+            if not change:
+                continue
+            # O novo valor vale até o fim do perfil: remove as mudanças posteriores das mesmas chaves
+            for later in [step for step in replay["changes"] if step > index]:
+                state = replay["changes"][later].get(name, {})
+                for key in change:
+                    state.pop(key, None)
+                if name in replay["changes"][later] and not state:
+                    del replay["changes"][later][name]
+                if not replay["changes"][later]:
+                    del replay["changes"][later]
+            replay["changes"].setdefault(index, {}).setdefault(name, {}).update(change)
+
+        with self._phase("simulacao"):
+            self._run_replay(start)
+        return float(checkpoints.starts[start]) if start < checkpoints.starts.shape[0] else 0.0
+
+    def restore_checkpoint(self, time: float) -> float:
+        """
+        Restaura nos bancos o estado do ponto de restauração mais próximo antes de um instante
+        :param float time: Instante (s)
+        :return float: Instante do ponto restaurado (s)
+        :raises ValueError: Se não houver simulação com pontos de restauração
+        """
+        if self._replay is None:
+            raise ValueError("Nenhuma simulação com pontos de restauração (simulate(..., checkpoint_every=...))")
+        checkpoints = self._replay["checkpoints"]
+        index = checkpoints.nearest(checkpoints.index(time))
+        checkpoints.restore(index, self._batt, self._uc)
+        return float(checkpoints.starts[index]) if index < checkpoints.starts.shape[0] else 0.0
+
+    def _store_results(self, results: dict, dt=1) -> None:
+        """
+        Armazena os vetores de resultado do kernel no buffer de resultados da simulação
+        :param dict results: Vetores retornados por engine.simulate_arrays
+        :param float|array dt: Intervalo de tempo de cada passo (s)
+        """
+        self._trace.extend(results, dt)
 
     def supervisory_control(self, power: float, threshold : float) -> tuple[float, float]:
         """
@@ -213,7 +460,34 @@ class Simulation():
             
         return power_bat, power_uc
 
-    def size_energy_storage(self, data: pd.DataFrame, threshold: float, config_bat : dict, config_uc : dict) -> tuple[dict, dict]:
+    @_profiled("dimensionamento")
+    def size_energy_storage(self, data: pd.DataFrame, threshold: float, config_bat : dict, config_uc : dict, verbose: bool = True, dt=None) -> tuple[dict, dict]:
+        """
+        Dimensiona banco de baterias e supercapacitores baseado no limiar de potência.
+        Com cache (Simulation(cache=...)), reaproveita o resultado para o mesmo perfil, intervalos, limiar e configurações.
+
+        :param pd.DataFrame data: DataFrame com dados de potência
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param float config_bat: Configuração de tensão desejada (número de celulas serie e modulos)
+        :param float config_uc: Configuração de tensão desejada (número de UC serie e modulos)
+        :param bool verbose: Imprime as energias máximas acumuladas
+        :param float|array dt: Intervalo de cada amostra (s); se None, usa a coluna "Time" quando existir, senão 1 s
+        :return: Dicionários com parâmetros da bateria e supercapacitor
+        """
+        if self._cache is None:
+            return self._size_energy_storage(data, threshold, config_bat, config_uc, verbose, dt)
+
+        key = make_key("size_energy_storage", data["Traction Power"], data["Braking Power"],
+                       np.asarray(sample_steps(data, dt), dtype=float), threshold, config_bat, config_uc)
+        params = self._cache.get(key)
+        if params is None:
+            params = self._size_energy_storage(data, threshold, config_bat, config_uc, verbose, dt)
+            self._cache.put(key, params)
+        elif verbose:
+            print(f'max_energy_bat: {params[0]["max_energy"]} Wh ;   max_energy_uc: {params[1]["max_energy"]} Wh')
+        return params
+
+    def _size_energy_storage(self, data: pd.DataFrame, threshold: float, config_bat : dict, config_uc : dict, verbose: bool = True, dt=None) -> tuple[dict, dict]:
         """
         Dimensiona banco de baterias e supercapacitores baseado no limiar de potência
         
@@ -221,6 +495,8 @@ class Simulation():
         :param float threshold: Limiar de potência para distribuição (kW)
         :param float config_bat: Configuração de tensão desejada (número de celulas serie e modulos)
         :param float config_uc: Configuração de tensão desejada (número de UC serie e modulos)
+        :param bool verbose: Imprime as energias máximas acumuladas
+        :param float|array dt: Intervalo de cada amostra (s); se None, usa a coluna "Time" quando existir, senão 1 s
         :return: Dicionários com parâmetros da bateria e supercapacitor
         """
         # Converte threshold para W
@@ -246,7 +522,7 @@ class Simulation():
         power_uc[powers < -threshold] = powers[powers < -threshold] + threshold
         
         # Calcula energias acumuladas
-        dt = 1  # intervalo de 1s
+        dt = sample_steps(data, dt)
         energy_bat = np.cumsum(power_bat * dt / 3600)  # Wh
         energy_uc = np.cumsum(power_uc * dt / 3600)    # Wh
         
@@ -254,7 +530,8 @@ class Simulation():
         max_energy_bat = np.max(np.abs(energy_bat))             
         max_energy_uc = np.max(np.abs(energy_uc))    
 
-        print(f'max_energy_bat: {max_energy_bat} Wh ;   max_energy_uc: {max_energy_uc} Wh')           
+        if verbose:
+            print(f'max_energy_bat: {max_energy_bat} Wh ;   max_energy_uc: {max_energy_uc} Wh')           
         
         # Aplicação fator de segurança
         n = 1
@@ -322,78 +599,56 @@ class Simulation():
         
         return battery_params, uc_params
     
-    def save_data(self, path: str, therehold: int) -> None:
+    @_profiled("gravacao")
+    def save_data(self, path: str, threshold: float, route: str | None = None, dtype: str = "float64") -> int:
         """
-        Método para salvar os dados de simulação.
-        :param str path: Caminho para salvar os dados
-        :param int threshold: Limiar de potência para distribuição (kW)
+        Método para salvar os dados de simulação no conjunto de resultados colunar.
+        :param str path: Diretório do conjunto de resultados (store.ResultStore)
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param str route: Nome da rota simulada
+        :param str dtype: Tipo das séries ao criar o conjunto ("float64" ou "float32")
+        :return int: Identificador da execução no conjunto
         """
-        nome = f"simulacao_{threshold}kW.pkl"
-        data = {
-            "Tempo"          : range(0, len(self._SoC)),
+        from store import ResultStore
+
+        metadata = {
+            "threshold"      : threshold,
+            "route"          : route,
             "C_bat"          : self._batt_params['C'],
             "Ns_bat"         : self._batt_params['Ns'],
             "Np_bat"         : self._batt_params['Np'],
             "Nm_bat"         : self._batt_params['Nm'],
             "Vnom_bat"       : self._batt_params['Vnom'],
             "SoC_inicial_bat": self._batt_params['SoC'],
-            'SoC_bat': self._SoC,
-            'v_banco_bat': self._v_banco_bat,
-            'i_bat': self._i_bat,
-            'p_bat_reject': self._p_bat_reject,
-            'C_uc': self._uc_params['C'],
-            'Ns_uc': self._uc_params['Ns'],
-            'Np_uc': self._uc_params['Np'],
-            'Nm_uc': self._uc_params['Nm'],
-            'Vnom_uc': self._uc_params['Vnom'],
-            'SoC_inicial_uc': self._uc_params['SoC'],
-            'SoC_UC': self._SoC_UC,
-            'v_banco_uc': self._v_banco_uc,
-            'i_uc': self._i_uc,
-            'p_uc_reject': self._p_uc_reject,
-            'p_reject': self._p_reject
+            'C_uc'           : self._uc_params['C'],
+            'Ns_uc'          : self._uc_params['Ns'],
+            'Np_uc'          : self._uc_params['Np'],
+            'Nm_uc'          : self._uc_params['Nm'],
+            'Vnom_uc'        : self._uc_params['Vnom'],
+            'SoC_inicial_uc' : self._uc_params['SoC'],
         }
         
-        df = pd.DataFrame(data)
-        df.to_pickle(path + nome)
+        return ResultStore(path, dtype=dtype).append(self.results(), metadata, dt=self._trace.column("dt"))
 
 
 if __name__ == "__main__":
-    data = r"data\CR-3112_28-09-24_AGGREGATED.xlsx"
+    data = os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx")
     sheet = "Dados"
     simulation = Simulation()
     
-    # Carrega dados
-    df = pd.read_excel(data, sheet_name=sheet)
+    # Carrega dados (uma única vez, do cache binário após o primeiro uso)
+    df = load_cycle(data, sheet)
     
     # Dimensiona componentes
     threshold = 600  # 500 kW
 
-    # Parâmetros da bateria para diferentes níveis de tensão
-    voltage_configs_bat = {
-        540: {"Ns": 16, "Nm": 10},   # 16 * 10 * 3.35 ≈ 540V
-        720: {"Ns": 16, "Nm": 13},   # 16 * 13 * 3.35 ≈ 720V
-        960: {"Ns": 16, "Nm": 18},   # 16 * 18 * 3.35 ≈ 960V
-        1080: {"Ns": 16, "Nm": 20},  # 16 * 20 * 3.35 ≈ 1080V
-        1260: {"Ns": 16, "Nm": 24},  # 16 * 24 * 3.35 ≈ 1260V
-        1440: {"Ns": 16, "Nm": 27}   # 16 * 27 * 3.35 ≈ 1440V
-    }
-
     # Seleciona configuração desejada
     target_voltage_bat = 1260  # Escolha uma das tensões válidas
-    config_bat = voltage_configs_bat[target_voltage_bat]
-
-    # Parâmetros do supercapacitor para diferentes níveis de tensão    
-    voltage_configs_uc = {240  : {"Ns": 16, "Nm" : 5},  # 16 * 5 * 3.0 ≈ 240V
-                          480  : {"Ns": 16, "Nm" : 10},  # 16 * 10 * 3.0 ≈ 480V
-                          720  : {"Ns": 16, "Nm" : 15},  # 16 * 15 * 3.0 ≈ 720V
-                          960  : {"Ns": 16, "Nm" : 20},  # 16 * 20 * 3.0 ≈ 960V
-                          1200 : {"Ns": 16, "Nm" : 25},  # 16 * 25 * 3.0 ≈ 1200V
-    }
+    config_bat = VOLTAGE_CONFIGS_BAT[target_voltage_bat]
 
     # Seleciona configuração desejada
     target_voltage_uc = 960  # Escolha uma das tensões válidas
-    config_uc = voltage_configs_uc[target_voltage_uc]
+    config_uc = VOLTAGE_CONFIGS_UC[target_voltage_uc]
 
 
     batt_params, uc_params = simulation.size_energy_storage(df, threshold, config_bat, config_uc)
@@ -437,8 +692,8 @@ if __name__ == "__main__":
     print(f'uc_params: {uc_params}')
     
     # Executa simulação
-    simulation.simulate(data, sheet, threshold)
-    simulation.save_data(r"resultados\\", threshold)
+    simulation.simulate(df, sheet, threshold, plot=True)
+    simulation.save_data(os.path.join("resultados", "simulacoes"), threshold, route="CR-3112")
     
     # Mostra resultados do dimensionamento
     print("\nResultados do dimensionamento:")
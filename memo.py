@@ -0,0 +1,233 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from engine import simulate_arrays
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results")
+EVICT_TARGET = 0.9          # Fração de max_bytes que resta após uma remoção (folga até a próxima varredura do diretório)
+
+_MISSING = object()
+
+
+def _canonical(obj):
+    """Forma canônica (serializável em JSON) de parâmetros escalares, listas e dicionários"""
+    if isinstance(obj, dict):
+        return {str(key): _canonical(value) for key, value in sorted(obj.items(), key=lambda item: str(item[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(value) for value in obj]
+    if isinstance(obj, (bool, np.bool_)) or obj is None or isinstance(obj, str):
+        return obj if not isinstance(obj, np.bool_) else bool(obj)
+    if isinstance(obj, (int, float, np.integer, np.floating)):
+        # 600 e 600.0 geram a mesma chave
+        return float(obj)
+    return repr(obj)
+
+
+def make_key(*parts) -> str:
+    """
+    Chave de conteúdo (SHA-256) de um conjunto de entradas
+    :param parts: Vetores (hash do conteúdo, tipo e forma) e parâmetros escalares, listas ou dicionários
+    :return str: Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray) or hasattr(part, "to_numpy"):
+            array = np.ascontiguousarray(part.to_numpy() if hasattr(part, "to_numpy") else part)
+            digest.update(f"array:{array.dtype.str}:{array.shape}".encode("utf-8"))
+            digest.update(array.view(np.uint8).reshape(-1) if array.size else b"")
+        else:
+            digest.update(json.dumps(_canonical(part), sort_keys=True).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResultCache():
+    def __init__(self, maxsize: int = 256, directory: str | None = None, max_bytes: int = 1 << 30):
+        """
+        Cache de resultados endereçado por conteúdo: LRU em memória e, opcionalmente, uma camada em disco
+        com tamanho máximo (os arquivos menos usados recentemente são removidos primeiro)
+        :param int maxsize: Número máximo de entradas em memória
+        :param str directory: Diretório da camada em disco; apenas em memória se None
+        :param int max_bytes: Tamanho máximo da camada em disco (bytes)
+        """
+        self._maxsize = maxsize
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._disk_bytes = None                             # Total estimado da camada em disco; None até a primeira varredura
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str | None:
+        """Diretório da camada em disco (None se apenas em memória)"""
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        """Tamanho máximo da camada em disco (bytes)"""
+        return self._max_bytes
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or (self._directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.pkl")
+
+    def get(self, key: str, default=None):
+        """
+        Busca um resultado, primeiro em memória e depois em disco
+        :param str key: Chave (make_key)
+        :param default: Valor retornado se a chave não existir
+        :return: Cópia do resultado armazenado
+        """
+        value = self._memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self._memory.move_to_end(key)
+        elif self._directory is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = pickle.load(f)
+                os.utime(self._path(key))                       # Marca como usado recentemente
+                self._remember(key, value)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                value = _MISSING
+
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value) -> None:
+        """
+        Armazena um resultado em memória e, se houver, em disco
+        :param str key: Chave (make_key)
+        :param value: Resultado (serializável com pickle)
+        """
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self._directory is None:
+            return
+
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        # Só varre o diretório quando o total estimado passa do limite (ou na primeira gravação)
+        if self._disk_bytes is not None:
+            self._disk_bytes += size - replaced
+        if self._disk_bytes is None or self._disk_bytes > self._max_bytes:
+            self._evict()
+
+    def get_or_compute(self, key: str, func, *args, **kwargs):
+        """
+        Retorna o resultado armazenado ou calcula e armazena
+        :param str key: Chave (make_key)
+        :param callable func: Função chamada com args e kwargs se a chave não existir
+        :return: Resultado
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            self.put(key, value)
+        return value
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Esvazia o cache em memória
+        :param bool disk: Também remove os arquivos da camada em disco
+        """
+        self._memory.clear()
+        if disk and self._directory is not None:
+            for name in os.listdir(self._directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self._directory, name))
+            self._disk_bytes = None
+
+    def _remember(self, key: str, value) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """
+        Se a camada em disco passar do tamanho máximo, remove os arquivos menos usados recentemente até
+        EVICT_TARGET * max_bytes. Recalcula o total estimado: gravações de outros processos no mesmo diretório
+        só entram nesta varredura.
+        """
+        files = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except OSError:                                 # Removido por outro processo
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        target = self._max_bytes if total <= self._max_bytes else EVICT_TARGET * self._max_bytes
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+def simulate_cached(cache: ResultCache | None, powers, threshold: float, batt, uc, dt=1) -> dict:
+    """
+    engine.simulate_arrays com cache: a chave inclui o perfil, o limiar, dt, o estado completo dos bancos e a LUT.
+    Em um acerto, o estado final de batt e uc é restaurado como se a simulação tivesse sido executada.
+    :param ResultCache cache: Cache de resultados; simula sem cache se None
+    :param array powers: Potência total requerida a cada passo (kW)
+    :param float threshold: Limiar de potência para distribuição (kW)
+    :param Batt batt: Bateria, com estado inicial já configurado (atualizada ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (atualizado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :return dict: Vetores de resultado (engine.RESULT_COLUMNS)
+    """
+    if cache is None:
+        return simulate_arrays(powers, threshold, batt, uc, dt)
+
+    lut = batt.getLUT()
+    key = make_key("simulate_arrays", np.asarray(powers, dtype=np.float64), threshold, np.asarray(dt, dtype=np.float64),
+                   batt.getState(), uc.getState(), batt.getLUTMethod(),
+                   *((lut.SoC, lut.tensao) if lut is not None else ()))
+    cached = cache.get(key)
+    if cached is not None:
+        results, batt_state, uc_state = cached
+        batt.setState(batt_state)
+        uc.setState(uc_state)
+        return results
+
+    results = simulate_arrays(powers, threshold, batt, uc, dt)
+    cache.put(key, (results, batt.getState(), uc.getState()))
+    return results
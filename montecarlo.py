@@ -0,0 +1,200 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from drive_cycle import load_cycle
+from engine import simulate_arrays
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from UC import Uc
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Faixas padrão das perturbações de cada cenário
+SCENARIO_PARAMS = {
+    "block": 60,                    # Tamanho dos blocos do bootstrap (amostras)
+    "payload": (0.85, 1.15),        # Fator sobre a potência de tração (carga e condição da pista)
+    "regen": (0.8, 1.1),            # Fator sobre a potência de frenagem (estilo de condução)
+    "noise": 0.05,                  # Desvio padrão do ruído multiplicativo por bloco
+}
+
+SCENARIO_COLUMNS = ("scenario", "payload", "regen", "max_energy_bat", "max_energy_uc", "Np_bat", "Np_uc",
+                    "E_tracao", "E_frenagem", "E_reject_tracao", "E_reject_frenagem", "E_reject",
+                    "SoC_bat_min", "SoC_UC_min")
+
+_worker_args = None
+
+
+def block_bootstrap(traction: np.ndarray, braking: np.ndarray, rng: np.random.Generator, block: int = 60,
+                    length: int | None = None, noise: float = 0.0, dt=1) -> tuple[np.ndarray, np.ndarray, np.ndarray | float]:
+    """
+    Reamostra um perfil por bootstrap circular de blocos: trechos contínuos do registro em ordem aleatória,
+    o que preserva a estrutura de curto prazo (acelerações, frenagens) e varia a sequência do ciclo
+    :param np.ndarray traction: Potência de tração (kW)
+    :param np.ndarray braking: Potência de frenagem (kW)
+    :param np.random.Generator rng: Gerador aleatório
+    :param int block: Tamanho dos blocos (amostras)
+    :param int length: Tamanho do perfil gerado; o do registro se None
+    :param float noise: Desvio padrão do ruído multiplicativo aplicado a cada bloco
+    :param float|array dt: Intervalo de tempo de cada amostra (s); um intervalo por amostra é reamostrado junto com as potências
+    :return tuple: Potência de tração e de frenagem reamostradas (kW) e intervalos (s)
+    """
+    n = traction.shape[0]
+    length = n if length is None else length
+    block = max(1, min(block, n))
+    n_blocks = -(-length // block)
+    starts = rng.integers(0, n, n_blocks)
+    index = ((starts[:, None] + np.arange(block)) % n).ravel()[:length]
+
+    traction = traction[index]
+    braking = braking[index]
+    if np.ndim(dt):
+        dt = np.asarray(dt, dtype=float)[index]
+    if noise > 0:
+        gain = np.repeat(np.maximum(1 + noise * rng.standard_normal(n_blocks), 0), block)[:length]
+        traction = traction * gain
+        braking = braking * gain
+    return traction, braking, dt
+
+
+def _scenario(k: int, traction: np.ndarray, braking: np.ndarray, threshold: float, config_bat: dict, config_uc: dict,
+              batt_params: dict, uc_params: dict, scenario_params: dict, seed: int, dt) -> dict:
+    """Gera, dimensiona e simula um cenário; o gerador depende só de (seed, k), então o resultado não depende da divisão entre processos"""
+    rng = np.random.default_rng([seed, k])
+    payload = rng.uniform(*scenario_params["payload"])
+    regen = rng.uniform(*scenario_params["regen"])
+    traction, braking, dt = block_bootstrap(traction, braking, rng, scenario_params["block"], noise=scenario_params["noise"], dt=dt)
+    traction = traction * payload
+    braking = braking * regen
+
+    data = pd.DataFrame({"Traction Power": traction, "Braking Power": braking})
+    sized_bat, sized_uc = Simulation().size_energy_storage(data, threshold, config_bat, config_uc, verbose=False, dt=dt)
+
+    # Projeto fixo submetido ao cenário
+    batt = Batt()
+    batt.setParams(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+    uc = Uc()
+    uc.setParams(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+    results = simulate_arrays(traction - braking, threshold, batt, uc, dt)
+    p_reject = results["p_reject"]
+
+    return {
+        "scenario": k,
+        "payload": payload,
+        "regen": regen,
+        "max_energy_bat": sized_bat["max_energy"],
+        "max_energy_uc": sized_uc["max_energy"],
+        "Np_bat": sized_bat["Np"],
+        "Np_uc": sized_uc["Np"],
+        "E_tracao": np.sum(traction * dt) / 3600,
+        "E_frenagem": np.sum(braking * dt) / 3600,
+        "E_reject_tracao": np.sum(np.maximum(p_reject, 0) * dt) / 3600,
+        "E_reject_frenagem": np.sum(np.maximum(-p_reject, 0) * dt) / 3600,
+        "E_reject": np.sum(np.abs(p_reject) * dt) / 3600,
+        "SoC_bat_min": np.min(results["SoC_bat"]),
+        "SoC_UC_min": np.min(results["SoC_UC"]),
+    }
+
+
+def _init_worker(args: tuple) -> None:
+    """Guarda o perfil base e a configuração uma única vez por processo"""
+    global _worker_args
+    _worker_args = args
+
+
+def _run_batch(scenarios: range) -> list:
+    """Executa um lote de cenários no processo trabalhador"""
+    return [_scenario(k, *_worker_args) for k in scenarios]
+
+
+def run_monte_carlo(data: pd.DataFrame, n_scenarios: int, threshold: float, config_bat: dict, config_uc: dict,
+                    batt_params: dict | None = None, uc_params: dict | None = None, SoC_bat: float = 50, SoC_uc: float = 20,
+                    scenario_params: dict | None = None, seed: int = 0, dt=None,
+                    processes: int | None = None, batch: int = 100) -> pd.DataFrame:
+    """
+    Monte Carlo de ciclos de condução para o dimensionamento: cada cenário é o registro reamostrado por blocos
+    e perturbado (carga, regeneração, ruído). Para cada cenário calcula o Np exigido pelo dimensionamento de
+    size_energy_storage e simula um projeto fixo, registrando a energia rejeitada.
+    Só uma linha de resumo por cenário é mantida em memória, então 10k cenários cabem em uma estação de trabalho.
+    :param pd.DataFrame data: DataFrame com colunas "Traction Power" e "Braking Power" (kW)
+    :param int n_scenarios: Número de cenários
+    :param float threshold: Limiar de potência para distribuição (kW)
+    :param dict config_bat: Configuração de tensão da bateria (Ns e Nm)
+    :param dict config_uc: Configuração de tensão do supercapacitor (Ns e Nm)
+    :param dict batt_params: Projeto da bateria avaliado (C, Ns, Np, Nm, Vnom); dimensionado pelo registro se None
+    :param dict uc_params: Projeto do supercapacitor avaliado (C, Ns, Np, Nm, Vnom); dimensionado pelo registro se None
+    :param float SoC_bat: Estado de carga inicial da bateria (%)
+    :param float SoC_uc: Estado de carga inicial do supercapacitor (%)
+    :param dict scenario_params: Faixas das perturbações (SCENARIO_PARAMS); valores ausentes usam o padrão
+    :param int seed: Semente; o cenário k usa sempre o mesmo gerador, qualquer que seja o número de processos
+    :param float|array dt: Intervalo de tempo de cada amostra (s); pela coluna "Time" se None (ver main.sample_steps)
+    :param int processes: Número de processos; usa todos os núcleos se None e roda em série se 1
+    :param int batch: Cenários por tarefa enviada aos processos
+    :return pd.DataFrame: Uma linha por cenário (colunas SCENARIO_COLUMNS)
+    """
+    dt = sample_steps(data, dt)
+    traction = data["Traction Power"].to_numpy(dtype=float)
+    braking = data["Braking Power"].to_numpy(dtype=float)
+    scenario_params = {**SCENARIO_PARAMS, **(scenario_params or {})}
+
+    if batt_params is None or uc_params is None:
+        sized_bat, sized_uc = Simulation().size_energy_storage(data, threshold, config_bat, config_uc, verbose=False, dt=dt)
+        batt_params = batt_params or sized_bat
+        uc_params = uc_params or sized_uc
+    batt_params = {**batt_params, "SoC": SoC_bat}
+    uc_params = {**uc_params, "SoC": SoC_uc}
+
+    args = (traction, braking, threshold, config_bat, config_uc, batt_params, uc_params, scenario_params, seed, dt)
+    batches = [range(start, min(start + batch, n_scenarios)) for start in range(0, n_scenarios, batch)]
+
+    if processes == 1:
+        _init_worker(args)
+        rows = [row for scenarios in batches for row in _run_batch(scenarios)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_init_worker, initargs=(args,)) as executor:
+            rows = [row for rows in executor.map(_run_batch, batches) for row in rows]
+
+    return pd.DataFrame(rows, columns=SCENARIO_COLUMNS)
+
+
+def summarize(scenarios: pd.DataFrame, percentiles=PERCENTILES) -> pd.DataFrame:
+    """
+    Percentis das exigências de dimensionamento e das energias rejeitadas entre os cenários
+    :param pd.DataFrame scenarios: Resultado de run_monte_carlo
+    :param iterable percentiles: Percentis (%)
+    :return pd.DataFrame: Uma linha por percentil; Np arredondado para cima
+    """
+    columns = ["Np_bat", "Np_uc", "max_energy_bat", "max_energy_uc", "E_reject_tracao", "E_reject_frenagem", "E_reject"]
+    table = pd.DataFrame({column: np.percentile(scenarios[column], percentiles) for column in columns},
+                         index=pd.Index([f"P{p:g}" for p in percentiles], name="percentil"))
+    table[["Np_bat", "Np_uc"]] = np.ceil(table[["Np_bat", "Np_uc"]]).astype(int)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo de ciclos de condução para o dimensionamento dos bancos")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--cenarios", type=int, default=1000, help="Número de cenários")
+    parser.add_argument("--limiar", type=float, default=600, help="Limiar de potência (kW)")
+    parser.add_argument("--bloco", type=int, default=SCENARIO_PARAMS["block"], help="Tamanho dos blocos do bootstrap (amostras)")
+    parser.add_argument("--tensao-bat", type=int, default=1260, choices=sorted(VOLTAGE_CONFIGS_BAT), help="Tensão da bateria (V)")
+    parser.add_argument("--tensao-uc", type=int, default=960, choices=sorted(VOLTAGE_CONFIGS_UC), help="Tensão do supercapacitor (V)")
+    parser.add_argument("--soc-bat", type=float, default=50, help="SoC inicial da bateria (%%)")
+    parser.add_argument("--soc-uc", type=float, default=20, help="SoC inicial do supercapacitor (%%)")
+    parser.add_argument("--semente", type=int, default=0, help="Semente dos cenários")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "monte_carlo.csv"), help="Arquivo CSV com os cenários")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    scenarios = run_monte_carlo(df, args.cenarios, args.limiar, VOLTAGE_CONFIGS_BAT[args.tensao_bat], VOLTAGE_CONFIGS_UC[args.tensao_uc],
+                                SoC_bat=args.soc_bat, SoC_uc=args.soc_uc, scenario_params={"block": args.bloco},
+                                seed=args.semente, processes=args.processos)
+    scenarios.to_csv(args.saida, index=False)
+
+    print(summarize(scenarios).to_string())
+    print(f"\nCenários salvos em {args.saida}")
@@ -0,0 +1,188 @@
+import argparse
+import os
+
+import numpy as np
+
+from batt import Batt
+from drive_cycle import load_cycle, total_power
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from strategies import Strategy, ThresholdStrategy, compare_strategies
+from UC import Uc
+
+# Resolução padrão da programação dinâmica
+DP_PARAMS = {
+    "n_bat": 41,                # Pontos da grade de SoC da bateria
+    "n_uc": 41,                 # Pontos da grade de SoC do UC
+    "n_controls": 41,           # Níveis de potência da bateria testados a cada passo (além de "tudo na bateria")
+    "current_weight": 0.1,      # Custo da corrente da bateria (kWh por hora à corrente máxima)
+    "terminal_weight": 1.0,     # Custo da energia final abaixo da inicial, em cada banco (kWh por kWh)
+}
+
+
+def _bank_step(E, v, power, dt, E_min, E_max, i_max, k):
+    """
+    Passo de um banco com as mesmas operações de setCurrent/updateEnergy, vetorizado sobre estados e controles
+    :param k: Conversão de W·s para a unidade de energia do banco (1/3600 na bateria, em Wh; 1 no UC, em J)
+    :return tuple: Nova energia, corrente saturada (A) e energia não atendida (kWh, sempre positiva)
+    """
+    i = power / v
+    i_sat = np.minimum(np.maximum(i, -i_max), i_max)
+    new_energy = E + v * (-i_sat * dt * k)
+    clip_energy = np.minimum(np.maximum(new_energy, E_min), E_max)
+    unmet = (np.abs(i - i_sat) * v * dt + np.abs(new_energy - clip_energy) / k) / 3.6e6
+    return clip_energy, i_sat, unmet
+
+
+def _interp_index(E, E_min, step, n):
+    """Índice inferior e peso do ponto superior na grade uniforme de energia"""
+    x = (E - E_min) / step
+    index = np.minimum(np.maximum(np.floor(x).astype(np.intp), 0), n - 2)
+    return index, np.minimum(np.maximum(x - index, 0.0), 1.0)
+
+
+def optimal_split(powers, batt: Batt, uc: Uc, dt=1, n_bat: int = 41, n_uc: int = 41, n_controls: int = 41,
+                  current_weight: float = 0.1, terminal_weight: float = 1.0, p_max_bat: float | None = None) -> np.ndarray:
+    """
+    Distribuição ótima de potência bateria/UC em todo o ciclo por programação dinâmica (referência offline,
+    com o perfil inteiro conhecido, para avaliar estratégias como o limiar de supervisory_control).
+    Minimiza a energia rejeitada (saturação de corrente e limites de SoC dos dois bancos), o esforço de corrente
+    da bateria e a energia final abaixo da inicial. O estado é a grade (n_bat x n_uc) de energia dos dois bancos;
+    cada passo da recursão é vetorizado sobre toda a grade e todos os controles, com interpolação bilinear do
+    custo futuro. A trajetória é refeita a partir do estado real dos bancos, com o modelo exato.
+    Guarda o custo futuro de todos os passos (float32): ~6,7 MB por 1000 passos na grade 41 x 41.
+    :param array powers: Potência total requerida a cada passo (kW, tração - frenagem)
+    :param Batt batt: Bateria, com estado inicial configurado (não é alterada)
+    :param Uc uc: Banco de supercapacitores, com estado inicial configurado (não é alterado)
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :param int n_bat: Pontos da grade de SoC da bateria
+    :param int n_uc: Pontos da grade de SoC do UC
+    :param int n_controls: Níveis de potência da bateria entre -p_max_bat e p_max_bat
+    :param float current_weight: Custo da corrente da bateria: current_weight * (i / i_max)² * dt / 3600 (kWh)
+    :param float terminal_weight: Custo de cada kWh a menos, ao final, em relação à energia inicial de cada banco
+    :param float p_max_bat: Potência máxima da bateria nos controles (kW); corrente máxima x tensão máxima se None
+    :return np.ndarray: Referência de potência da bateria a cada passo (kW)
+    """
+    powers = np.asarray(powers, dtype=np.float64) * 1000                      # Conversão para W
+    n = powers.shape[0]
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,))
+    bat, cap = batt.getState(), uc.getState()
+
+    # Bateria: energia em Wh, tensão pela LUT
+    bat_E_min = (bat["min_SoC"] / 100) * bat["total_energy"]
+    bat_E_max = (bat["max_SoC"] / 100) * bat["total_energy"]
+    bat_i_max = 6 * bat["Np"] * bat["C"]
+    bat_grid = np.linspace(bat_E_min, bat_E_max, n_bat)
+    bat_step = bat_grid[1] - bat_grid[0]
+    bat_Ns_Nm = bat["Ns"] * bat["Nm"]
+
+    def bat_v(E):
+        return bat_Ns_Nm * np.asarray(batt.LUT((E * 100) / bat["total_energy"]), dtype=np.float64)
+
+    # UC: energia em J, tensão pela capacitância equivalente
+    uc_E_min = cap["total_energy"] * (cap["SoC_min"] / 100)
+    uc_E_max = cap["total_energy"] * (cap["SoC_max"] / 100)
+    uc_i_max = 280 * cap["Np"]
+    uc_grid = np.linspace(uc_E_min, uc_E_max, n_uc)
+    uc_step = uc_grid[1] - uc_grid[0]
+
+    def uc_v(E):
+        return np.sqrt((2 * E) / cap["C_eq"])
+
+    if p_max_bat is None:
+        p_max_bat = bat_i_max * float(np.max(bat_v(bat_grid))) / 1000
+    levels = np.linspace(-p_max_bat, p_max_bat, n_controls) * 1000
+
+    def controls(k):
+        # Níveis fixos mais "tudo na bateria", que reproduz o caso sem UC
+        return np.append(levels, powers[k])
+
+    def stage(k, E_b, v_b, E_u, v_u):
+        u = controls(k)
+        new_b, i_bat, unmet_b = _bank_step(E_b[:, None], v_b[:, None], u[None, :], dts[k],
+                                           bat_E_min, bat_E_max, bat_i_max, 1 / 3600)
+        new_u, _, unmet_u = _bank_step(E_u[:, None], v_u[:, None], (powers[k] - u)[None, :], dts[k],
+                                       uc_E_min, uc_E_max, uc_i_max, 1)
+        cost_b = unmet_b + current_weight * (i_bat / bat_i_max) ** 2 * dts[k] / 3600
+        return u, new_b, cost_b, new_u, unmet_u
+
+    def cost_to_go(V, new_b, new_u):
+        """Custo futuro interpolado para todas as combinações (estado bateria, estado UC, controle)"""
+        ib, wb = _interp_index(new_b, bat_E_min, bat_step, n_bat)             # (Nb, M)
+        iu, wu = _interp_index(new_u, uc_E_min, uc_step, n_uc)                # (Nu, M)
+        V1 = V[ib] * (1 - wb)[..., None] + V[ib + 1] * wb[..., None]          # (Nb, M, n_uc)
+        m = np.arange(new_b.shape[1])[None, :]
+        return V1[:, m, iu] * (1 - wu) + V1[:, m, iu + 1] * wu                # (Nb, Nu, M)
+
+    # Recursão para trás sobre a grade
+    V = np.empty((n + 1, n_bat, n_uc), dtype=np.float32)
+    V[n] = terminal_weight * (np.maximum(bat["SoC_Energy"] - bat_grid, 0)[:, None] / 1000
+                              + np.maximum(cap["stored_energy"] - uc_grid, 0)[None, :] / 3.6e6)
+    v_b_grid, v_u_grid = bat_v(bat_grid), uc_v(uc_grid)
+    for k in range(n - 1, -1, -1):
+        _, new_b, cost_b, new_u, cost_u = stage(k, bat_grid, v_b_grid, uc_grid, v_u_grid)
+        Q = cost_b[:, None, :] + cost_u[None, :, :] + cost_to_go(V[k + 1].astype(np.float64), new_b, new_u)
+        V[k] = Q.min(axis=-1)
+
+    # Trajetória a partir do estado real
+    reference = np.empty(n)
+    E_b, v_b = np.array([bat["SoC_Energy"]], dtype=np.float64), np.array([bat["v_banco"]], dtype=np.float64)
+    E_u, v_u = np.array([cap["stored_energy"]], dtype=np.float64), np.array([cap["v_banco"]], dtype=np.float64)
+    for k in range(n):
+        u, new_b, cost_b, new_u, cost_u = stage(k, E_b, v_b, E_u, v_u)
+        Q = cost_b[:, None, :] + cost_u[None, :, :] + cost_to_go(V[k + 1].astype(np.float64), new_b, new_u)
+        best = int(np.argmin(Q[0, 0]))
+        reference[k] = u[best] / 1000
+        E_b, E_u = new_b[:, best], new_u[:, best]
+        v_b, v_u = bat_v(E_b), uc_v(E_u)
+    return reference
+
+
+class OptimalStrategy(Strategy):
+    def __init__(self, batt: Batt, uc: Uc, **params):
+        """
+        Distribuição ótima por programação dinâmica (optimal_split), calculada para o estado dos bancos no momento
+        de split; usada como referência em strategies.compare_strategies
+        :param Batt batt: Bateria simulada
+        :param Uc uc: Banco de supercapacitores simulado
+        :param params: Parâmetros de optimal_split (DP_PARAMS, p_max_bat)
+        """
+        self._batt = batt
+        self._uc = uc
+        self.params = {**DP_PARAMS, **params}
+
+    def split(self, powers, dt=1):
+        return optimal_split(powers, self._batt, self._uc, dt, **self.params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distribuição ótima bateria/UC por programação dinâmica comparada ao limiar")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--limiar", type=float, default=600, help="Limiar de potência (kW)")
+    parser.add_argument("--tensao-bat", type=int, default=1260, choices=sorted(VOLTAGE_CONFIGS_BAT), help="Tensão da bateria (V)")
+    parser.add_argument("--tensao-uc", type=int, default=960, choices=sorted(VOLTAGE_CONFIGS_UC), help="Tensão do supercapacitor (V)")
+    parser.add_argument("--soc-bat", type=float, default=50, help="SoC inicial da bateria (%%)")
+    parser.add_argument("--soc-uc", type=float, default=20, help="SoC inicial do supercapacitor (%%)")
+    parser.add_argument("--grade-bat", type=int, default=DP_PARAMS["n_bat"], help="Pontos da grade de SoC da bateria")
+    parser.add_argument("--grade-uc", type=int, default=DP_PARAMS["n_uc"], help="Pontos da grade de SoC do supercapacitor")
+    parser.add_argument("--controles", type=int, default=DP_PARAMS["n_controls"], help="Níveis de potência da bateria por passo")
+    parser.add_argument("--peso-corrente", type=float, default=DP_PARAMS["current_weight"], help="Custo da corrente da bateria (kWh por hora à corrente máxima)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "otimo_vs_limiar.csv"), help="Arquivo CSV com a comparação")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    dt = sample_steps(df)
+    simulation = Simulation()
+    batt_params, uc_params = simulation.size_energy_storage(df, args.limiar, VOLTAGE_CONFIGS_BAT[args.tensao_bat],
+                                                            VOLTAGE_CONFIGS_UC[args.tensao_uc], verbose=False, dt=dt)
+    simulation.setParam_Batt(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_bat)
+    simulation.setParam_UC(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), args.soc_uc)
+
+    optimal = OptimalStrategy(simulation._batt, simulation._uc, n_bat=args.grade_bat, n_uc=args.grade_uc,
+                              n_controls=args.controles, current_weight=args.peso_corrente)
+    table = compare_strategies(total_power(df), {"limiar": ThresholdStrategy(args.limiar), "otimo": optimal},
+                               simulation._batt, simulation._uc, dt)
+    table.to_csv(args.saida, index_label="estrategia")
+
+    print(table.to_string())
+    print(f"\nComparação salva em {args.saida}")
@@ -0,0 +1,201 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from drive_cycle import load_cycle, total_power
+from engine import simulate_arrays
+from main import VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from UC import Uc
+
+# Parâmetros das células usados no dimensionamento (mesmos de Simulation.size_energy_storage)
+C_BAT = 40          # Ah
+VNOM_BAT = 3.2      # V
+C_UC = 3140         # F
+VNOM_UC = 3         # V
+
+# Massa típica por célula (kg): LFP prismática de 40 Ah e ultracapacitor de ~3000 F
+CELL_MASS_BAT = 1.0
+CELL_MASS_UC = 0.52
+
+
+def _split(powers: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Divide a potência (kW) entre bateria e UC pelo limiar, como supervisory_control"""
+    power_bat = np.clip(powers, -threshold, threshold)
+    return power_bat, powers - power_bat
+
+
+def _np_lower_bound_bat(power_bat: np.ndarray, config_bat: dict, SoC_bat: float, SoC_window_bat: tuple, dt) -> int:
+    """
+    Limite inferior de Np da bateria para rejeição nula, sem simular: corrente máxima na maior
+    tensão possível do banco e excursão de energia a partir do SoC inicial dentro da janela.
+    Sem saturação de corrente, a variação de energia do contador de Coulomb é exatamente P * dt.
+    """
+    lut = Batt().getLUT()
+    v_max = config_bat["Ns"] * config_bat["Nm"] * (lut.tensao.max() if lut is not None else VNOM_BAT)
+    n_current = np.max(np.abs(power_bat)) * 1000 / (v_max * 6 * C_BAT)
+
+    energy = np.cumsum(power_bat * dt / 3600) * 1000                                       # Wh descarregados
+    energy_np1 = C_BAT * config_bat["Ns"] * config_bat["Nm"] * VNOM_BAT                    # Wh por string em paralelo
+    n_discharge = max(np.max(energy), 0) / max((SoC_bat - SoC_window_bat[0]) / 100 * energy_np1, 1e-12)
+    n_charge = max(-np.min(energy), 0) / max((SoC_window_bat[1] - SoC_bat) / 100 * energy_np1, 1e-12)
+    return max(1, int(np.ceil(max(n_current, n_discharge, n_charge) - 1e-9)))
+
+
+def _np_lower_bound_uc(power_uc: np.ndarray, config_uc: dict) -> int:
+    """Limite inferior de Np do supercapacitor para rejeição nula: corrente máxima na tensão nominal do banco"""
+    v_max = config_uc["Ns"] * config_uc["Nm"] * VNOM_UC
+    return max(1, int(np.ceil(np.max(np.abs(power_uc)) * 1000 / (v_max * 280) - 1e-9)))
+
+
+def _evaluate(powers: np.ndarray, threshold: float, config_bat: dict, np_bat: int, config_uc: dict, np_uc: int,
+              SoC_bat: float, SoC_uc: float, dt) -> dict:
+    """Simula um candidato e retorna, por banco, energia rejeitada (kWh) e faixa de SoC"""
+    batt = Batt()
+    batt.setParams(C_BAT, config_bat["Ns"], np_bat, config_bat["Nm"], VNOM_BAT, SoC_bat)
+    uc = Uc()
+    uc.setParams(C_UC, config_uc["Ns"], np_uc, config_uc["Nm"], VNOM_UC, SoC_uc)
+    results = simulate_arrays(powers, threshold, batt, uc, dt)
+    return {
+        "reject_bat": np.sum(np.abs(results["p_bat_reject"]) * dt) / 3600,
+        "reject_uc": np.sum(np.abs(results["p_uc_reject"]) * dt) / 3600,
+        "SoC_bat": (np.min(results["SoC_bat"]), np.max(results["SoC_bat"])),
+        "SoC_uc": (np.min(results["SoC_UC"]), np.max(results["SoC_UC"])),
+    }
+
+
+def optimize_sizing(powers, thresholds, configs_bat: dict = VOLTAGE_CONFIGS_BAT, configs_uc: dict = VOLTAGE_CONFIGS_UC,
+                    objective: str = "cells", max_reject: float = 0.0,
+                    SoC_window_bat: tuple = (10, 90), SoC_window_uc: tuple = (3, 100),
+                    SoC_bat: float = 50, SoC_uc: float = 20, np_max: int = 200, dt=1) -> pd.DataFrame:
+    """
+    Busca conjunta do limiar de potência, configuração de tensão e Np de cada banco
+    que minimiza o número de células (ou a massa) respeitando as restrições.
+
+    Como a divisão de potência depende apenas do limiar, a rejeição e o SoC de cada banco
+    dependem só do seu próprio arranjo: para cada limiar, Np é varrido uma única vez por banco
+    (as duas varreduras andam juntas no mesmo kernel) e as combinações são avaliadas sem nova simulação.
+    Candidatos são podados por limites inferiores de Np (corrente e energia) e pelo custo do melhor
+    candidato já encontrado.
+    :param array powers: Potência total requerida (kW, tração - frenagem)
+    :param iterable thresholds: Limiares de potência candidatos (kW)
+    :param dict configs_bat: Configurações de tensão da bateria {tensão: {"Ns", "Nm"}}
+    :param dict configs_uc: Configurações de tensão do supercapacitor {tensão: {"Ns", "Nm"}}
+    :param str objective: "cells" (número de células) ou "mass" (massa em kg)
+    :param float max_reject: Energia rejeitada total máxima admitida (kWh)
+    :param tuple SoC_window_bat: Faixa de SoC (%) que a bateria deve respeitar durante o ciclo
+    :param tuple SoC_window_uc: Faixa de SoC (%) que o supercapacitor deve respeitar durante o ciclo
+    :param float SoC_bat: Estado de carga inicial da bateria (%)
+    :param float SoC_uc: Estado de carga inicial do supercapacitor (%)
+    :param int np_max: Maior Np avaliado em cada banco
+    :param float|array dt: Intervalo de tempo de cada amostra (s)
+    :return pd.DataFrame: Melhor candidato de cada limiar viável, ordenado por custo (primeira linha é o ótimo)
+    :raises ValueError: Se o objetivo for inválido
+    """
+    if objective not in ("cells", "mass"):
+        raise ValueError("Objetivo deve ser 'cells' ou 'mass'")
+    weight_bat, weight_uc = (1, 1) if objective == "cells" else (CELL_MASS_BAT, CELL_MASS_UC)
+    powers = np.asarray(powers, dtype=float)
+    configs_bat = list(configs_bat.items())
+    configs_uc = list(configs_uc.items())
+
+    def cost_bat(config, n):
+        return weight_bat * config["Ns"] * config["Nm"] * n
+
+    def cost_uc(config, n):
+        return weight_uc * config["Ns"] * config["Nm"] * n
+
+    best_cost = np.inf
+    rows = []
+    for threshold in thresholds:
+        threshold = float(threshold)
+
+        # Limites inferiores de Np (válidos apenas quando nenhuma rejeição é admitida)
+        power_bat, power_uc = _split(powers, threshold)
+        if max_reject == 0:
+            lb_bat = {v: _np_lower_bound_bat(power_bat, config, SoC_bat, SoC_window_bat, dt) for v, config in configs_bat}
+            lb_uc = {v: _np_lower_bound_uc(power_uc, config) for v, config in configs_uc}
+        else:
+            lb_bat = {v: 1 for v, _ in configs_bat}
+            lb_uc = {v: 1 for v, _ in configs_uc}
+
+        min_uc = min(cost_uc(config, lb_uc[v]) for v, config in configs_uc)
+        min_bat = min(cost_bat(config, lb_bat[v]) for v, config in configs_bat)
+        if min_bat + min_uc >= best_cost:
+            continue                                                        # Poda: nem o limite inferior melhora o ótimo
+
+        # Curvas rejeição x Np de cada banco; as varreduras da bateria e do UC andam juntas
+        curves_bat = {v: [] for v, _ in configs_bat}
+        curves_uc = {v: [] for v, _ in configs_uc}
+        pending_bat = [(v, config, lb_bat[v]) for v, config in configs_bat]
+        pending_uc = [(v, config, lb_uc[v]) for v, config in configs_uc]
+        while pending_bat or pending_uc:
+            next_bat, next_uc = [], []
+            for k in range(max(len(pending_bat), len(pending_uc))):
+                item_bat = pending_bat[k] if k < len(pending_bat) else None
+                item_uc = pending_uc[k] if k < len(pending_uc) else None
+                v_bat, config_bat, n_bat = item_bat or (None, configs_bat[0][1], lb_bat[configs_bat[0][0]])
+                v_uc, config_uc, n_uc = item_uc or (None, configs_uc[0][1], lb_uc[configs_uc[0][0]])
+                result = _evaluate(powers, threshold, config_bat, n_bat, config_uc, n_uc, SoC_bat, SoC_uc, dt)
+
+                if item_bat is not None:
+                    ok = SoC_window_bat[0] <= result["SoC_bat"][0] and result["SoC_bat"][1] <= SoC_window_bat[1]
+                    curves_bat[v_bat].append((n_bat, result["reject_bat"], ok))
+                    # Para quando o banco já não rejeita, quando Np deixa de caber no orçamento ou no limite de Np
+                    done = (ok and result["reject_bat"] == 0) or n_bat >= np_max or cost_bat(config_bat, n_bat + 1) + min_uc >= best_cost
+                    if not done:
+                        next_bat.append((v_bat, config_bat, n_bat + 1))
+                if item_uc is not None:
+                    ok = SoC_window_uc[0] <= result["SoC_uc"][0] and result["SoC_uc"][1] <= SoC_window_uc[1]
+                    curves_uc[v_uc].append((n_uc, result["reject_uc"], ok))
+                    done = (ok and result["reject_uc"] == 0) or n_uc >= np_max or min_bat + cost_uc(config_uc, n_uc + 1) >= best_cost
+                    if not done:
+                        next_uc.append((v_uc, config_uc, n_uc + 1))
+            pending_bat, pending_uc = next_bat, next_uc
+
+        # Combina as curvas: menor custo com rejeição total dentro do limite
+        best_row = None
+        for v_bat, config_bat in configs_bat:
+            for n_bat, reject_bat, ok_bat in curves_bat[v_bat]:
+                if not ok_bat or reject_bat > max_reject:
+                    continue
+                for v_uc, config_uc in configs_uc:
+                    for n_uc, reject_uc, ok_uc in curves_uc[v_uc]:
+                        cost = cost_bat(config_bat, n_bat) + cost_uc(config_uc, n_uc)
+                        if not ok_uc or reject_bat + reject_uc > max_reject or (best_row is not None and cost >= best_row["cost"]):
+                            continue
+                        best_row = {
+                            "threshold": threshold,
+                            "tensao_bat": v_bat, "Ns_bat": config_bat["Ns"], "Np_bat": n_bat, "Nm_bat": config_bat["Nm"],
+                            "tensao_uc": v_uc, "Ns_uc": config_uc["Ns"], "Np_uc": n_uc, "Nm_uc": config_uc["Nm"],
+                            "cells_bat": config_bat["Ns"] * config_bat["Nm"] * n_bat,
+                            "cells_uc": config_uc["Ns"] * config_uc["Nm"] * n_uc,
+                            "E_reject": reject_bat + reject_uc,
+                            "cost": cost,
+                        }
+        if best_row is not None:
+            rows.append(best_row)
+            best_cost = min(best_cost, best_row["cost"])
+
+    columns = ["threshold", "tensao_bat", "Ns_bat", "Np_bat", "Nm_bat", "tensao_uc", "Ns_uc", "Np_uc", "Nm_uc",
+               "cells_bat", "cells_uc", "E_reject", "cost"]
+    return pd.DataFrame(rows, columns=columns).sort_values("cost", kind="stable").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Otimização conjunta do limiar e do arranjo dos bancos")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--inicio", type=float, default=200, help="Primeiro limiar (kW)")
+    parser.add_argument("--fim", type=float, default=3000, help="Último limiar (kW)")
+    parser.add_argument("--passo", type=float, default=100, help="Passo entre limiares (kW)")
+    parser.add_argument("--objetivo", default="cells", choices=("cells", "mass"), help="Função objetivo")
+    parser.add_argument("--rejeicao-max", type=float, default=0.0, help="Energia rejeitada máxima (kWh)")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    thresholds = np.arange(args.inicio, args.fim + args.passo / 2, args.passo)
+    ranking = optimize_sizing(total_power(df), thresholds, objective=args.objetivo, max_reject=args.rejeicao_max, dt=sample_steps(df))
+    print(ranking.to_string(index=False))
@@ -1,8 +1,10 @@
-import pandas as pd
+import os
+
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import datetime
-import tabulate
+from cycle_stats import stats_table
+from drive_cycle import load_drive_cycle
 
 params = {'text.usetex' : True,
           'font.size' : 11,
@@ -14,9 +16,10 @@ plt.rcParams.update(params)
 fig_width_cm = 8/1.4
 fig_height_cm = 3.54/1.4
 
-data_path= r'data\CR-3112_28-09-24_AGGREGATED.xlsx'
-df = pd.read_excel(data_path, sheet_name = "Log")
-df2 = pd.read_excel(data_path, sheet_name = "Dados")
+data_path = os.path.join('data', 'CR-3112_28-09-24_AGGREGATED.xlsx')
+sheets = load_drive_cycle(data_path, ("Log", "Dados"))
+df = sheets["Log"]
+df2 = sheets["Dados"]
 
 # print(df["Time"][0])
 # print(type(df["Time"][0]))
@@ -46,7 +49,7 @@ axs[1].set_xlabel("Horário", fontweight = 'bold')
 axs[1].legend(loc='upper right')
 plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
 plt.tight_layout()
-plt.savefig("figuras\\perfil_de_tensao.pdf", bbox_inches='tight')
+plt.savefig(os.path.join("figuras", "perfil_de_tensao.pdf"), bbox_inches='tight')
 # plt.gca().xaxis.set_major_locator(mdates.HourLocator(interval=6))  # Ajuste o intervalo conforme necessário
 # plt.gcf().autofmt_xdate()  # Rotacionar labels do eixo X para melhor leitura
 
@@ -65,7 +68,7 @@ plt.xlabel("Horário", fontweight = 'bold')
 plt.xlim([df["Time"][0], df["Time"][len(df["Time"])-1]])
 plt.legend(loc='lower left')
 plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-plt.savefig("figuras\\perfil_de_potencia.pdf", bbox_inches='tight')
+plt.savefig(os.path.join("figuras", "perfil_de_potencia.pdf"), bbox_inches='tight')
 plt.show()
 
 
@@ -73,23 +76,7 @@ plt.show()
 # ------------------- Dados de Operação --------------------
 # ----------------------------------------------------------
 
-energia_requerida_total = df2["Traction Energy"].sum()
-energia_gerada_total = df2["Braking Energy"].sum()
-potencia_maxima = df2["Traction Power"].max()
-potencia_minima = df2["Braking Power"].max()
-# fazer uma column para fa00_altoutvolts para quando fa08_m2amps for maior que 0:
-tensao_tracao = df['fa00_altoutvolts'][df['fa08_m2amps'] > 0]
-tensao_frenagem = df['fa00_altoutvolts'][df['fa08_m2amps'] < 0]
-tensao_tracao_maxmima = tensao_tracao.max()
-tensao_frenagem_maxima = tensao_frenagem.max()
-corrente_maxima_requerida = df['fa08_m2amps'].max()
-corrente_minima_requerida = df['fa08_m2amps'].min()
-
-print(tabulate.tabulate([["Energia Requerida Total [kWh]", energia_requerida_total],
-                         ["Energia Gerada Total [kWh]", energia_gerada_total],
-                         ["Potência Máxima [kW]", potencia_maxima],
-                         ["Potência Mínima [kW]", potencia_minima],
-                         ["Tensão Máxima de Tração [V]", tensao_tracao_maxmima],
-                         ["Tensão Máxima de Frenagem [V]", tensao_frenagem_maxima],
-                         ["Corrente Máxima Requerida [A]", corrente_maxima_requerida],
-                         ["Corrente Mínima Requerida [A]", corrente_minima_requerida]], tablefmt='fancy_grid'))     
+# Energias, picos, percentis, potência sustentada e extremos de tensão e corrente (cycle_stats.py)
+estatisticas = stats_table([data_path], processes=1)
+estatisticas.to_csv(os.path.join("resultados", "estatisticas_CR-3112.csv"))
+print(estatisticas.T.to_string())
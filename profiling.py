@@ -0,0 +1,179 @@
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+# Bordas padrão do histograma de potência rejeitada (kW); valores fora delas caem nas faixas extremas
+REJECT_BINS = (-1000, -500, -200, -100, -50, -10, -1, 0, 1, 10, 50, 100, 200, 500, 1000)
+
+
+class Profiler():
+    def __init__(self, bins=REJECT_BINS):
+        """
+        Instrumentação opcional da simulação: tempo por fase, contadores de saturação de corrente
+        e de limite de SoC e histograma da potência rejeitada.
+        Só tem custo quando associada a uma simulação (Simulation.enable_profiling) ou a um banco (attach).
+        :param iterable bins: Bordas do histograma de potência rejeitada (kW), em ordem crescente
+        """
+        self._bins = np.asarray(bins, dtype=float)
+        self._attached = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Zera tempos, contadores e histograma"""
+        self._phases = defaultdict(lambda: [0.0, 0])
+        self._counters = defaultdict(int)
+        self._histogram = np.zeros(self._bins.shape[0] + 1, dtype=np.int64)
+        self._zero_reject = 0
+        self._steps = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Mede o tempo de um trecho (ex.: "ingestao", "dimensionamento", "simulacao", "gravacao")
+        :param str name: Nome da fase; tempos de chamadas repetidas são somados
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer = self._phases[name]
+            timer[0] += time.perf_counter() - start
+            timer[1] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Incrementa um contador
+        :param str name: Nome do contador
+        :param int n: Incremento
+        """
+        self._counters[name] += int(n)
+
+    def add_rejections(self, p_reject) -> None:
+        """
+        Acumula a potência rejeitada de cada passo no histograma
+        :param array p_reject: Potência rejeitada por passo (kW, + tração não atendida, - frenagem não absorvida)
+        """
+        p_reject = np.asarray(p_reject, dtype=float)
+        nonzero = p_reject[p_reject != 0]
+        self._steps += p_reject.size
+        self._zero_reject += p_reject.size - nonzero.size
+        self._histogram += np.bincount(np.searchsorted(self._bins, nonzero, side="right"),
+                                       minlength=self._histogram.shape[0])
+
+    def attach(self, bank, name: str | None = None) -> None:
+        """
+        Instrumenta setCurrent e updateEnergy de um banco (Batt ou Uc) trocando a classe da instância por uma
+        subclasse instrumentada (Batt e Uc usam __slots__, sem atributos por instância).
+        Conta as chamadas com saturação de corrente (setCurrent) e com limite de SoC (updateEnergy)
+        e mede o tempo de cada método. A classe original não é alterada.
+        :param Batt|Uc bank: Banco a instrumentar
+        :param str name: Prefixo dos contadores; usa o nome da classe se None
+        """
+        if any(attached is bank for attached, _ in self._attached):
+            return
+        cls = type(bank)
+        name = name or cls.__name__
+        profiler = self
+
+        def setCurrent(self, power):
+            start = time.perf_counter()
+            i_sat, p_reject = cls.setCurrent(self, power)
+            timer = profiler._phases[f"{name}.setCurrent"]
+            timer[0] += time.perf_counter() - start
+            timer[1] += 1
+            if p_reject != 0:
+                profiler._counters[f"{name}_saturacao_corrente"] += 1
+            return i_sat, p_reject
+
+        def updateEnergy(self, current, dt):
+            start = time.perf_counter()
+            SoC, v_banco, p_reject = cls.updateEnergy(self, current, dt)
+            timer = profiler._phases[f"{name}.updateEnergy"]
+            timer[0] += time.perf_counter() - start
+            timer[1] += 1
+            if p_reject != 0:
+                profiler._counters[f"{name}_limite_SoC"] += 1
+            return SoC, v_banco, p_reject
+
+        bank.__class__ = type(cls.__name__, (cls,), {"__slots__": (), "setCurrent": setCurrent, "updateEnergy": updateEnergy})
+        self._attached.append((bank, cls))
+
+    def detach(self) -> None:
+        """Remove a instrumentação de todos os bancos, restaurando a classe original"""
+        for bank, cls in self._attached:
+            bank.__class__ = cls
+        self._attached = []
+
+    def report(self) -> dict:
+        """
+        Relatório estruturado da instrumentação
+        :return dict: Fases (tempo total e chamadas), contadores e histograma de potência rejeitada
+        """
+        return {
+            "fases": {name: {"tempo_s": total, "chamadas": calls} for name, (total, calls) in self._phases.items()},
+            "contadores": dict(self._counters),
+            "rejeicao": {
+                "passos": self._steps,
+                "passos_sem_rejeicao": self._zero_reject,
+                "bordas_kW": self._bins.tolist(),
+                "contagens": self._histogram.tolist(),
+            },
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Grava o relatório em JSON
+        :param str path: Caminho do arquivo
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+def reject_breakdown(powers, threshold: float, results: dict, v_bat, v_uc, i_max_bat: float, i_max_uc: float,
+                     bat_ref=None, fb_gain: float = 0.0, fb_target: float = 0.0, bat_p_max: float = math.inf,
+                     uc_SoC0: float = 0.0) -> dict:
+    """
+    Separa, por passo, a rejeição por saturação de corrente e por limite de SoC a partir dos vetores do kernel.
+    Refaz a distribuição de potência e as operações de setCurrent na mesma ordem do kernel (engine._kernel),
+    então o resultado é exato, sem nenhum custo adicional dentro do laço.
+    :param array powers: Potência total simulada (kW)
+    :param float threshold: Limiar de potência para distribuição (kW); ignorado se bat_ref for informado
+    :param dict results: Vetores retornados por engine.simulate_arrays
+    :param float v_bat: Tensão do banco de baterias antes do primeiro passo (V)
+    :param float v_uc: Tensão do banco de UC antes do primeiro passo (V)
+    :param float i_max_bat: Corrente máxima da bateria (A)
+    :param float i_max_uc: Corrente máxima do UC (A)
+    :param array bat_ref: Referência de potência da bateria de uma estratégia (kW); usa o limiar se None
+    :param float fb_gain: Ganho da realimentação pelo SoC do UC (kW por ponto percentual)
+    :param float fb_target: SoC alvo do UC na realimentação (%)
+    :param float bat_p_max: Potência máxima da bateria na distribuição por referência (kW)
+    :param float uc_SoC0: SoC do UC antes do primeiro passo (%), usado pela realimentação
+    :return dict: Máscaras booleanas por passo: bat_saturacao_corrente, bat_limite_SoC, uc_saturacao_corrente, uc_limite_SoC
+    """
+    power = np.asarray(powers, dtype=float) * 1000
+    if bat_ref is None:
+        threshold = threshold * 1000
+        power_bat = np.where(np.abs(power) > threshold, np.where(power > 0, threshold, -threshold), power)
+        power_uc = np.where(np.abs(power) > threshold, np.where(power > 0, power - threshold, power + threshold), 0.0)
+    else:
+        # Realimentação pelo SoC do UC no passo anterior
+        uc_SoC = np.concatenate(([uc_SoC0], results["SoC_UC"][:-1]))
+        power_bat = (np.asarray(bat_ref, dtype=float) + fb_gain * (fb_target - uc_SoC)) * 1000
+        power_bat = np.minimum(np.maximum(power_bat, -bat_p_max * 1000), bat_p_max * 1000)
+        power_uc = power - power_bat
+
+    breakdown = {}
+    for bank, power_bank, v0, i_max in (("bat", power_bat, v_bat, i_max_bat), ("uc", power_uc, v_uc, i_max_uc)):
+        # Tensão no início de cada passo: a do passo anterior
+        v = np.concatenate(([v0], results[f"v_banco_{bank}"][:-1]))
+        i = power_bank / v
+        i_sat = np.minimum(np.maximum(i, -i_max), i_max)
+        p_rej_1 = ((i - i_sat) * v) / 1000
+        p_rej_2 = results["p_bat_reject" if bank == "bat" else "p_uc_reject"] - p_rej_1
+        breakdown[f"{bank}_saturacao_corrente"] = p_rej_1 != 0
+        breakdown[f"{bank}_limite_SoC"] = p_rej_2 != 0
+    return breakdown
@@ -0,0 +1,113 @@
+import numpy as np
+
+FIG_WIDTH_CM = 24/2.4
+FIG_HEIGHT_CM = 18/2.4
+
+
+def _pyplot():
+    """Importa o matplotlib apenas quando algum gráfico é pedido"""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def plot_power_distribution(data, powers, fig_width_cm: float = FIG_WIDTH_CM, fig_height_cm: float = FIG_HEIGHT_CM) -> None:
+    """
+    Plota distribuição de potência
+    :param pd.DataFrame data: Dados com colunas "Time", "Traction Power" e "Braking Power"
+    :param array powers: Potência total (kW)
+    :param float fig_width_cm: Largura da figura
+    :param float fig_height_cm: Altura da figura
+    """
+    plt = _pyplot()
+    fig, axs = plt.subplots(figsize=(fig_width_cm, fig_height_cm), nrows=3, ncols=1, sharex=True)
+
+    axs[0].step(data["Time"], data["Traction Power"], where="post", linewidth=2, color="tab:blue", label="Tração")
+    axs[0].grid()
+    axs[0].legend(loc="upper right")
+    axs[0].set_ylabel("Potência [kW]")
+
+    axs[1].step(data["Time"], data["Braking Power"], where="post", linewidth=2, color="tab:orange", label="Frenagem")
+    axs[1].grid()
+    axs[1].legend(loc="upper right")
+    axs[1].set_ylabel("Potência [kW]")
+
+    axs[2].step(data["Time"], powers, where="post", linewidth=2, color="tab:green", label="Total")
+    axs[2].grid()
+    axs[2].set_ylabel("Potência [kW]")
+    axs[2].legend(loc="upper right")
+    axs[2].set_xlim(0, np.asarray(data["Time"])[-1])
+
+    plt.tight_layout()
+    plt.show(block=False)
+
+
+def plot_LUT(lut, fig_width_cm: float = FIG_WIDTH_CM, fig_height_cm: float = FIG_HEIGHT_CM) -> None:
+    """
+    Plota LUT da bateria
+    :param LUT lut: Tabela SoC x Tensão da célula
+    :param float fig_width_cm: Largura da figura
+    :param float fig_height_cm: Altura da figura
+    """
+    plt = _pyplot()
+    plt.figure(figsize=(fig_width_cm, fig_height_cm/2))
+    plt.plot(lut.SoC, lut.tensao, color = 'tab:blue', linewidth = 2, label = "LUT Bateria")
+    plt.grid()
+    plt.legend(loc="upper left")
+    plt.ylabel("Tensão [V]")
+    plt.xlabel("SoC [%]")
+    plt.title("Curva SoC x Tensão da bateria")
+    plt.xlim(0, 100)
+    plt.show(block = False)
+
+
+def plot_results(time, results, fig_width_cm: float = FIG_WIDTH_CM, fig_height_cm: float = FIG_HEIGHT_CM, block: bool = True) -> None:
+    """
+    Plota resultados da simulação
+    :param array time: Instantes de tempo (s)
+    :param dict|pd.DataFrame results: Resultados com as colunas de engine.RESULT_COLUMNS
+    :param float fig_width_cm: Largura da figura
+    :param float fig_height_cm: Altura da figura
+    :param bool block: Bloqueia até a janela ser fechada
+    """
+    plt = _pyplot()
+    fig, axs = plt.subplots(3, 2, figsize=(fig_width_cm*2, fig_height_cm), sharex=True)
+    t_end = np.asarray(time)[-1]
+
+    # Bateria (coluna esquerda)
+    axs[0,0].step(time, results["SoC_bat"], linewidth=2, color="tab:blue", label="SoC Bateria")
+    axs[0,0].grid()
+    axs[0,0].legend(loc="upper right")
+    axs[0,0].set_ylabel("SoC [%]")
+
+    axs[1,0].step(time, results["v_banco_bat"], linewidth=2, color="tab:orange", label="Tensão Bateria")
+    axs[1,0].grid()
+    axs[1,0].legend(loc="upper right")
+    axs[1,0].set_ylabel("Tensão [V]")
+
+    axs[2,0].step(time, results["i_bat"], linewidth=2, color="tab:green", label="Corrente Bateria")
+    axs[2,0].grid()
+    axs[2,0].legend(loc="upper right")
+    axs[2,0].set_ylabel("Corrente [A]")
+    axs[2,0].set_xlabel("Tempo [s]")
+    axs[2,0].set_xlim(0, t_end)
+
+    # Supercapacitor (coluna direita)
+    axs[0,1].step(time, results["SoC_UC"], linewidth=2, color="tab:blue", label="SoC UC")
+    axs[0,1].grid()
+    axs[0,1].legend(loc="upper right")
+    axs[0,1].set_ylabel("SoC [%]")
+
+    axs[1,1].step(time, results["v_banco_uc"], linewidth=2, color="tab:orange", label="Tensão UC")
+    axs[1,1].grid()
+    axs[1,1].legend(loc="upper right")
+    axs[1,1].set_ylabel("Tensão [V]")
+
+    axs[2,1].step(time, results["i_uc"], linewidth=2, color="tab:green", label="Corrente UC")
+    axs[2,1].grid()
+    axs[2,1].legend(loc="upper right")
+    axs[2,1].set_ylabel("Corrente [A]")
+    axs[2,1].set_xlabel("Tempo [s]")
+    axs[2,1].set_xlim(0, t_end)
+
+    plt.tight_layout()
+    plt.show(block=block)
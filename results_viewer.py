@@ -1,6 +1,13 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+import argparse
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine import HAS_NUMBA, njit
+from memo import CACHE_DIR, ResultCache, make_key
+from store import TIME_COLUMN, ResultStore, import_pickles
 
 fig_width_cm = 8/1.4
 fig_height_cm = 3.54/1.4
@@ -9,102 +16,229 @@ params = {'text.usetex' : True,
           'font.family' : 'lmodern',
           'axes.labelweight' : 'bold'
           }
-plt.rcParams.update(params)
 colors = ['tab:blue', 'tab:orange', 'tab:green', 'tab:red', 'tab:purple', 'tab:brown', 'tab:pink', 'tab:gray', 'tab:olive', 'tab:cyan']
 
-
-path = "resultados"
-files = sorted(os.listdir(path), key=lambda x: int(x.split('_')[1].replace('kW.pkl', '')))
-print(files)
-
-fig, axs = plt.subplots(figsize=(fig_width_cm, fig_height_cm * 2), nrows=3, ncols=1, sharex=True)
-i = 0
-for file in files:
-    df = pd.read_pickle(path + "\\" + file)
-    # print(df)
-    limiar = file.split("_")[1]
-    axs[0].plot(df["Tempo"], df['SoC_bat'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[1].plot(df["Tempo"], df['v_banco_bat'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[2].plot(df["Tempo"], df['i_bat'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    i += 1
-
-axs[0].grid()
-axs[0].set_ylabel(r"SoC [\%]", fontweight = 'bold')
-axs[0].legend(loc='upper right')
-
-axs[1].grid()
-axs[1].set_ylabel("Tensão [V]", fontweight = 'bold')
-axs[1].legend(loc='upper right')
-
-axs[2].grid()
-axs[2].set_ylabel("Corrente [A]", fontweight = 'bold')
-axs[2].set_xlabel("Tempo [s]", fontweight = 'bold')
-axs[2].set_xlim(df["Tempo"][0], df["Tempo"][len(df["Tempo"])-1])
-axs[2].legend(loc='upper right')
-plt.tight_layout()
-plt.savefig("figuras\\resultados_bat.pdf", bbox_inches='tight')
-
-fig, axs = plt.subplots(figsize=(fig_width_cm, fig_height_cm * 2), nrows=3, ncols=1, sharex=True)
-i = 0
-for file in files:
-    df = pd.read_pickle(path + "\\" + file)
-    # print(df)
-    limiar = file.split("_")[1]
-    axs[0].plot(df["Tempo"], df['SoC_UC'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[1].plot(df["Tempo"], df['v_banco_uc'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[2].plot(df["Tempo"], df['i_uc'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    i += 1
-
-axs[0].grid()
-axs[0].set_ylabel(r"SoC [\%]", fontweight = 'bold')
-axs[0].legend(loc='upper right')
-
-axs[1].grid()
-axs[1].set_ylabel("Tensão [V]", fontweight = 'bold')
-axs[1].legend(loc='upper right')
-
-axs[2].grid()
-axs[2].set_ylabel("Corrente [A]", fontweight = 'bold')
-axs[2].set_xlabel("Tempo [s]", fontweight = 'bold')
-axs[2].set_xlim(df["Tempo"][0], df["Tempo"][len(df["Tempo"])-1])
-axs[2].legend(loc='upper right')
-plt.tight_layout()
-plt.savefig("figuras\\resultados_UC.pdf", bbox_inches='tight')
-
-
-fig, axs = plt.subplots(figsize=(fig_width_cm, fig_height_cm * 2), nrows=3, ncols=1, sharex=True)
-i = 0
-for file in files:
-    df = pd.read_pickle(path + "\\" + file)
-    # print(df)
-    limiar = file.split("_")[1]
-    axs[0].plot(df["Tempo"], df['p_bat_reject'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[1].plot(df["Tempo"], df['p_uc_reject'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    axs[2].plot(df["Tempo"], df['p_reject'], linewidth = 2, color = colors[i], label = limiar.split(".")[0])
-    i += 1
-
-axs[0].grid()
-axs[0].set_ylabel("Potência [kW]", fontweight = 'bold')
-axs[0].set_title("Potência Rejeitada - Bateria", fontweight = 'bold')
-axs[0].legend(loc='upper right')
-
-axs[1].grid()
-axs[1].set_ylabel("Potência [kW]", fontweight = 'bold')
-axs[1].set_title("Potência Rejeitada - Supercapacitor", fontweight = 'bold')
-axs[1].legend(loc='upper right')
-
-axs[2].grid()
-axs[2].set_ylabel("Potência [kW]", fontweight = 'bold')
-axs[2].set_xlabel("Tempo [s]", fontweight = 'bold')
-axs[2].set_xlim(df["Tempo"][0], df["Tempo"][len(df["Tempo"])-1])
-axs[2].set_title("Potência Rejeitada - Total", fontweight = 'bold')
-axs[2].legend(loc='upper right')
-plt.tight_layout()
-plt.savefig("figuras\\resultados_reject.pdf", bbox_inches='tight')
-
-#Energia total do banco de baterias
-
-
-plt.show()
-
-    
\ No newline at end of file
+DPI = 300
+BUCKETS = int(fig_width_cm * DPI)           # Um intervalo de decimação por pixel da largura da figura
+MAX_LEGEND = len(colors)                    # Acima disso a legenda fica ilegível e é omitida
+RENDER_CACHE_DIR = os.path.join(os.path.dirname(CACHE_DIR), "figuras")
+
+# Figura -> painéis (coluna, rótulo do eixo y, título)
+FIGURES = {
+    "resultados_bat": (("SoC_bat", "SoC [%]", None),
+                       ("v_banco_bat", "Tensão [V]", None),
+                       ("i_bat", "Corrente [A]", None)),
+    "resultados_UC": (("SoC_UC", "SoC [%]", None),
+                      ("v_banco_uc", "Tensão [V]", None),
+                      ("i_uc", "Corrente [A]", None)),
+    "resultados_reject": (("p_bat_reject", "Potência [kW]", "Potência Rejeitada - Bateria"),
+                          ("p_uc_reject", "Potência [kW]", "Potência Rejeitada - Supercapacitor"),
+                          ("p_reject", "Potência [kW]", "Potência Rejeitada - Total")),
+}
+
+
+@njit(cache=True)
+def _minmax_indices(values, starts):
+    """Índices do mínimo e do máximo de cada intervalo (primeira ocorrência), em ordem cronológica"""
+    n = values.shape[0]
+    out = np.empty(2 * starts.shape[0], dtype=np.int64)
+    m = 0
+    for b in range(starts.shape[0]):
+        stop = starts[b + 1] if b + 1 < starts.shape[0] else n
+        i_min = i_max = starts[b]
+        for k in range(starts[b] + 1, stop):
+            if values[k] < values[i_min]:
+                i_min = k
+            if values[k] > values[i_max]:
+                i_max = k
+        out[m] = min(i_min, i_max)
+        m += 1
+        if i_min != i_max:
+            out[m] = max(i_min, i_max)
+            m += 1
+    return out[:m]
+
+
+def minmax_decimate(time, values, buckets: int = BUCKETS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz uma série longa para exibição mantendo o mínimo e o máximo de cada intervalo de tempo (um por pixel):
+    o traçado fica visualmente igual ao da série completa, inclusive os picos isolados
+    :param array time: Instantes das amostras (s), em ordem crescente
+    :param array values: Valores da série
+    :param int buckets: Número de intervalos (largura do gráfico em pixels)
+    :return tuple: Instantes e valores decimados (até 2 * buckets pontos, em ordem cronológica)
+    """
+    time = np.asarray(time, dtype=float)
+    values = np.asarray(values, dtype=float)
+    n = values.shape[0]
+    if n <= 2 * buckets:
+        return time, values
+
+    # Intervalos de mesma duração: com passo variável, cada intervalo tem um número diferente de amostras
+    edges = np.searchsorted(time, np.linspace(time[0], time[-1], buckets + 1)[:-1], side="left")
+    starts = np.unique(edges)
+    if HAS_NUMBA:
+        index = _minmax_indices(values, starts)
+        return time[index], values[index]
+
+    counts = np.diff(np.append(starts, n))
+    bucket = np.repeat(np.arange(starts.shape[0]), counts)
+
+    # Primeira amostra de cada intervalo que atinge o mínimo (e o máximo) do intervalo
+    selected = []
+    for reduce in (np.minimum, np.maximum):
+        hits = np.flatnonzero(values == np.repeat(reduce.reduceat(values, starts), counts))
+        selected.append(hits[np.diff(bucket[hits], prepend=-1) != 0])
+
+    index = np.unique(np.concatenate(selected))
+    return time[index], values[index]
+
+
+def decimate_runs(store: ResultStore, run_ids, columns, buckets: int = BUCKETS) -> dict:
+    """
+    Lê cada execução uma única vez (memória mapeada) e decima as colunas pedidas
+    :param ResultStore store: Conjunto de resultados
+    :param iterable run_ids: Execuções
+    :param iterable columns: Colunas a decimar
+    :param int buckets: Intervalos de decimação
+    :return dict: run_id -> coluna -> (instantes, valores) decimados
+    """
+    series = {}
+    for run_id, df in store.load(run_ids, columns).items():
+        time = df["Tempo"].to_numpy()
+        series[run_id] = {column: minmax_decimate(time, df[column].to_numpy(), buckets) for column in columns}
+    return series
+
+
+def render_figure(panels: tuple, series: dict, labels: dict, style: dict = params, fmt: str = "pdf") -> bytes:
+    """
+    Desenha uma figura de painéis empilhados, uma curva por execução
+    :param tuple panels: Painéis (coluna, rótulo do eixo y, título), como em FIGURES
+    :param dict series: run_id -> coluna -> (instantes, valores), na ordem das curvas
+    :param dict labels: Legenda de cada execução
+    :param dict style: rcParams do matplotlib
+    :param str fmt: Formato do arquivo ("pdf", "png", ...)
+    :return bytes: Conteúdo do arquivo
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams.update(style)
+    usetex = plt.rcParams["text.usetex"]
+    fig, axs = plt.subplots(figsize=(fig_width_cm, fig_height_cm * 2), nrows=len(panels), ncols=1, sharex=True)
+    t_min, t_max = np.inf, -np.inf
+    for i, (run_id, columns) in enumerate(series.items()):
+        for ax, (column, _, _) in zip(axs, panels):
+            time, values = columns[column]
+            ax.plot(time, values, linewidth = 2, color = colors[i % len(colors)], label = labels[run_id])
+            if time.shape[0]:
+                t_min, t_max = min(t_min, time[0]), max(t_max, time[-1])
+
+    for ax, (_, ylabel, title) in zip(axs, panels):
+        ax.grid()
+        ax.set_ylabel(ylabel.replace("%", r"\%") if usetex else ylabel, fontweight = 'bold')
+        if title is not None:
+            ax.set_title(title, fontweight = 'bold')
+        if len(series) <= MAX_LEGEND:
+            ax.legend(loc='upper right')
+    axs[-1].set_xlabel("Tempo [s]", fontweight = 'bold')
+    if t_min < t_max:
+        axs[-1].set_xlim(t_min, t_max)
+    plt.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches='tight', dpi=DPI)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def _render_task(args: tuple) -> bytes:
+    """Executa render_figure no processo trabalhador"""
+    return render_figure(*args)
+
+
+def render_figures(store: ResultStore, runs, output: str = "figuras", figures: dict = FIGURES, buckets: int = BUCKETS,
+                   style: dict = params, fmt: str = "pdf", processes: int | None = None,
+                   cache: ResultCache | None = None) -> list:
+    """
+    Gera as figuras de várias execuções: reaproveita do cache as figuras cujas execuções e parâmetros não mudaram,
+    lê e decima os dados só das que faltam (cada execução uma única vez) e desenha essas figuras em paralelo
+    :param ResultStore store: Conjunto de resultados
+    :param pd.DataFrame runs: Metadados das execuções a exibir (ResultStore.runs), na ordem das curvas
+    :param str output: Diretório das figuras
+    :param dict figures: Figuras a gerar (FIGURES)
+    :param int buckets: Intervalos de decimação por série
+    :param dict style: rcParams do matplotlib
+    :param str fmt: Formato dos arquivos
+    :param int processes: Número de processos; uma figura por processo se None e em série se 1
+    :param ResultCache cache: Cache das figuras geradas; sem cache se None
+    :return list: Caminhos das figuras geradas
+    """
+    labels = {run_id: f"{run['threshold']:g}kW" for run_id, run in runs.iterrows()}
+    # Os metadados identificam os dados de cada execução; a versão dos arquivos .bin lidos pela figura
+    # invalida o cache se o conjunto for regravado com os mesmos metadados
+    keys = {name: make_key("render_figure", store.path, runs.to_csv(),
+                           store.versions(list(dict.fromkeys(column for column, _, _ in panels)) + [TIME_COLUMN]),
+                           panels, labels, buckets, style, fmt, fig_width_cm, fig_height_cm)
+            for name, panels in figures.items()}
+    rendered = {}
+    if cache is not None:
+        rendered = {name: cache.get(key) for name, key in keys.items()}
+        rendered = {name: content for name, content in rendered.items() if content is not None}
+
+    missing = [name for name in figures if name not in rendered]
+    if missing:
+        columns = list(dict.fromkeys(column for name in missing for column, _, _ in figures[name]))
+        series = decimate_runs(store, runs.index, columns, buckets)
+        tasks = [(figures[name], {run_id: {column: series[run_id][column] for column, _, _ in figures[name]}
+                                  for run_id in runs.index}, labels, style, fmt) for name in missing]
+        if processes == 1 or len(tasks) == 1:
+            outputs = [_render_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(processes or os.cpu_count(), len(tasks))) as executor:
+                outputs = list(executor.map(_render_task, tasks))
+        for name, content in zip(missing, outputs):
+            rendered[name] = content
+            if cache is not None:
+                cache.put(keys[name], content)
+
+    os.makedirs(output, exist_ok=True)
+    paths = []
+    for name in figures:
+        path = os.path.join(output, f"{name}.{fmt}")
+        with open(path, "wb") as f:
+            f.write(rendered[name])
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Figuras dos resultados de várias simulações")
+    parser.add_argument("--resultados", default="resultados", help="Diretório dos resultados (conjunto em simulacoes/ e .pkl antigos)")
+    parser.add_argument("--rota", default=None, help="Exibe só as execuções desta rota")
+    parser.add_argument("--limiares", type=float, nargs="+", default=None, help="Exibe só estes limiares (kW)")
+    parser.add_argument("--pontos", type=int, default=BUCKETS, help="Intervalos de decimação por série (mínimo e máximo de cada)")
+    parser.add_argument("--formato", default="pdf", help="Formato das figuras")
+    parser.add_argument("--sem-latex", action="store_true", help="Texto pelo matplotlib em vez do LaTeX (mais rápido)")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: uma figura por processo)")
+    parser.add_argument("--sem-cache", action="store_true", help="Desenha de novo mesmo as figuras já geradas")
+    parser.add_argument("--saida", default="figuras", help="Diretório das figuras")
+    args = parser.parse_args()
+
+    store = ResultStore(os.path.join(args.resultados, "simulacoes"))
+    if len(store) == 0:
+        import_pickles(store, args.resultados)                  # Converte os .pkl antigos na primeira execução
+
+    # Execuções em ordem crescente de limiar
+    runs = store.runs().sort_values("threshold")
+    if args.rota is not None:
+        runs = runs[runs["route"] == args.rota]
+    if args.limiares:
+        runs = runs[runs["threshold"].isin(args.limiares)]
+    print(f"{len(runs)} execuções: {[f'{threshold:g}kW' for threshold in runs['threshold']]}")
+
+    style = {**params, "text.usetex": params["text.usetex"] and not args.sem_latex}
+    paths = render_figures(store, runs, args.saida, buckets=args.pontos, style=style, fmt=args.formato,
+                           processes=args.processos, cache=None if args.sem_cache else ResultCache(directory=RENDER_CACHE_DIR))
+    print("\n".join(paths))
@@ -0,0 +1,294 @@
+import argparse
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS = 6371000.0    # m
+G = 9.81                    # m/s²
+
+# Parâmetros típicos de um caminhão fora de estrada diesel-elétrico; ajuste ao caminhão estudado.
+# Com massa carregada de ~100 t, as energias de tração e frenagem ficam na ordem das do registro CR-3112.
+TRUCK_PARAMS = {
+    "mass": 100e3,              # Massa carregada (kg)
+    "mass_empty": 45e3,         # Massa vazio, usada no retorno (kg)
+    "rotating_mass": 1.05,      # Fator de massa girante
+    "Crr": 0.025,               # Coeficiente de resistência ao rolamento
+    "CdA": 12.0,                # Área frontal x coeficiente de arrasto (m²)
+    "rho": 1.2,                 # Densidade do ar (kg/m³)
+    "eta_traction": 0.85,       # Eficiência da tração (barramento -> roda)
+    "eta_braking": 0.85,        # Eficiência da frenagem elétrica (roda -> barramento)
+    "P_max_traction": 1400,     # Potência máxima de tração (kW)
+    "P_max_braking": 2300,      # Potência máxima de frenagem elétrica (kW); o excesso vai para o freio mecânico
+}
+
+# Limites do perfil de velocidade
+SPEED_PARAMS = {
+    "v_max": 36 / 3.6,          # Velocidade máxima (m/s), a máxima do registro CR-3112
+    "a_max": 0.5,               # Aceleração máxima (m/s²)
+    "d_max": 0.8,               # Desaceleração máxima (m/s²)
+    "v_min": 0.5,               # Velocidade mínima na integração do tempo, evita tempo infinito nas paradas (m/s)
+}
+
+
+def read_gpx(path: str) -> pd.DataFrame:
+    """
+    Lê os pontos de um arquivo GPX e calcula a distância acumulada (haversine)
+    :param str path: Caminho do arquivo .gpx
+    :return pd.DataFrame: Colunas "Latitude", "Longitude", "Distance" (m) e "Elevation" (m)
+    """
+    points = [(float(point.get("lat")), float(point.get("lon")), float(point.findtext("{*}ele", "nan")))
+              for point in ET.parse(path).getroot().iter() if point.tag.endswith("trkpt")]
+    lat, lon, elevation = np.array(points, dtype=float).reshape(-1, 3).T
+
+    phi, lam = np.radians(lat), np.radians(lon)
+    a = np.sin(np.diff(phi) / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2
+    distance = np.concatenate(([0.0], np.cumsum(2 * EARTH_RADIUS * np.arcsin(np.sqrt(a)))))
+    return pd.DataFrame({"Latitude": lat, "Longitude": lon, "Distance": distance, "Elevation": elevation})
+
+
+def read_route_csv(path: str) -> pd.DataFrame:
+    """
+    Lê um CSV de rota derivado do GPX (Distance, Elevation, Grade).
+    A coluna Grade desses arquivos é a elevação acumulada dividida pela distância acumulada, não a inclinação local,
+    por isso é descartada; use route_grade.
+    :param str path: Caminho do arquivo .csv
+    :return pd.DataFrame: Colunas "Distance" (m) e "Elevation" (m)
+    """
+    return pd.read_csv(path)[["Distance", "Elevation"]]
+
+
+def read_route(path: str) -> pd.DataFrame:
+    """
+    Lê uma rota de um arquivo GPX ou CSV, com pontos repetidos na mesma distância removidos
+    :param str path: Caminho do arquivo (.gpx ou .csv)
+    :return pd.DataFrame: Colunas "Distance" (m, a partir de zero) e "Elevation" (m)
+    """
+    route = read_gpx(path) if path.lower().endswith(".gpx") else read_route_csv(path)
+    route = route[["Distance", "Elevation"]].drop_duplicates("Distance").sort_values("Distance")
+    route["Distance"] -= route["Distance"].iloc[0]
+    return route.reset_index(drop=True)
+
+
+def route_grade(distance, elevation, step: float = 5.0, window: float = 50.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reamostra a rota em distância uniforme e calcula a inclinação local com elevação suavizada.
+    A elevação do GPX é quantizada (degraus de 0,1 m a alguns metros), então a inclinação ponto a ponto é ruidosa.
+    :param array distance: Distância acumulada (m), crescente
+    :param array elevation: Elevação (m)
+    :param float step: Passo da reamostragem (m)
+    :param float window: Largura da média móvel da elevação (m)
+    :return tuple: Distância (m), elevação suavizada (m) e inclinação (m/m)
+    """
+    distance = np.asarray(distance, dtype=float)
+    grid = np.arange(0.0, distance[-1] + step / 2, step)
+    elevation = np.interp(grid, distance, np.asarray(elevation, dtype=float))
+
+    width = max(1, int(round(window / step)))
+    if width > 1 and grid.shape[0] > width:
+        # Média móvel por soma acumulada, com as bordas replicadas para manter o tamanho
+        padded = np.pad(elevation, (width // 2, width - 1 - width // 2), mode="edge")
+        cumsum = np.concatenate(([0.0], np.cumsum(padded)))
+        elevation = (cumsum[width:] - cumsum[:-width]) / width
+
+    grade = np.gradient(elevation, grid) if grid.shape[0] > 1 else np.zeros_like(grid)
+    return grid, elevation, grade
+
+
+def speed_profile(distance, v_max=SPEED_PARAMS["v_max"], a_max: float = SPEED_PARAMS["a_max"],
+                  d_max: float = SPEED_PARAMS["d_max"], stops=(), v_start: float = 0.0, v_end: float = 0.0) -> np.ndarray:
+    """
+    Perfil de velocidade ao longo da distância, limitado pela velocidade máxima e pelas taxas de aceleração e frenagem.
+    As passagens direta e reversa (v² <= v_j² + 2 a (s - s_j)) são resolvidas com mínimos acumulados, sem laço.
+    :param array distance: Distância acumulada (m), crescente
+    :param float|array v_max: Velocidade máxima (m/s), única ou por ponto (ex.: limites em rampas e curvas)
+    :param float a_max: Aceleração máxima (m/s²)
+    :param float d_max: Desaceleração máxima (m/s²)
+    :param iterable stops: Distâncias com parada obrigatória (m)
+    :param float v_start: Velocidade no início da rota (m/s)
+    :param float v_end: Velocidade no fim da rota (m/s)
+    :return np.ndarray: Velocidade em cada ponto (m/s)
+    """
+    distance = np.asarray(distance, dtype=float)
+    v2_max = np.broadcast_to(np.asarray(v_max, dtype=float), distance.shape) ** 2
+    v2_max = v2_max.copy()
+    v2_max[0] = min(v2_max[0], v_start ** 2)
+    v2_max[-1] = min(v2_max[-1], v_end ** 2)
+    for stop in stops:
+        v2_max[min(np.searchsorted(distance, stop), distance.shape[0] - 1)] = 0.0
+
+    forward = 2 * a_max * distance + np.minimum.accumulate(v2_max - 2 * a_max * distance)
+    backward = -2 * d_max * distance + np.minimum.accumulate((v2_max + 2 * d_max * distance)[::-1])[::-1]
+    return np.sqrt(np.maximum(np.minimum(forward, backward), 0.0))
+
+
+def distance_to_time(distance, speed, dt: float = 1, v_min: float = SPEED_PARAMS["v_min"]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converte um perfil ao longo da distância em uma série temporal com passo uniforme
+    :param array distance: Distância acumulada (m)
+    :param array speed: Velocidade em cada ponto (m/s)
+    :param float dt: Intervalo de amostragem (s)
+    :param float v_min: Velocidade mínima na integração (m/s), evita tempo infinito nas paradas
+    :return tuple: Tempo de cada amostra (s) e distância correspondente (m)
+    """
+    distance = np.asarray(distance, dtype=float)
+    speed = np.maximum(np.asarray(speed, dtype=float), v_min)
+    # Tempo de cada trecho com a velocidade média do trecho
+    elapsed = np.concatenate(([0.0], np.cumsum(2 * np.diff(distance) / (speed[1:] + speed[:-1]))))
+    time = np.arange(0.0, elapsed[-1] + dt / 2, dt)
+    return time, np.interp(time, elapsed, distance)
+
+
+def wheel_power(speed, grade, dt: float = 1, params: dict = TRUCK_PARAMS, mass=None) -> np.ndarray:
+    """
+    Potência na roda pelo balanço de forças longitudinal (inércia, rampa, rolamento e arrasto).
+    Opera no último eixo, então aceita vários ciclos de mesmo tamanho de uma vez (matriz ciclos x amostras).
+    :param array speed: Velocidade (m/s)
+    :param array grade: Inclinação (m/m, positiva em subida)
+    :param float dt: Intervalo de amostragem (s)
+    :param dict params: Parâmetros do caminhão (TRUCK_PARAMS)
+    :param float|array mass: Massa (kg); usa params["mass"] se None. Um vetor dá uma massa por ciclo.
+    :return np.ndarray: Potência na roda (W, positiva em tração)
+    """
+    speed = np.asarray(speed, dtype=float)
+    theta = np.arctan(np.asarray(grade, dtype=float))
+    mass = params["mass"] if mass is None else np.asarray(mass, dtype=float)
+    if np.ndim(mass):
+        mass = np.reshape(mass, np.shape(mass) + (1,) * (speed.ndim - np.ndim(mass)))
+
+    acceleration = np.gradient(speed, dt, axis=-1) if speed.shape[-1] > 1 else np.zeros_like(speed)
+    force = (mass * params["rotating_mass"] * acceleration
+             + mass * G * np.sin(theta)
+             + mass * G * params["Crr"] * np.cos(theta) * (speed > 0)
+             + 0.5 * params["rho"] * params["CdA"] * speed ** 2)
+    return force * speed
+
+
+def electric_power(power_wheel, params: dict = TRUCK_PARAMS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Potências elétricas de tração e de frenagem a partir da potência na roda, com eficiências e limites do acionamento
+    :param array power_wheel: Potência na roda (W)
+    :param dict params: Parâmetros do caminhão (TRUCK_PARAMS)
+    :return tuple: Potência de tração e de frenagem (kW, ambas positivas)
+    """
+    power_wheel = np.asarray(power_wheel, dtype=float) / 1000
+    traction = np.minimum(np.maximum(power_wheel, 0) / params["eta_traction"], params["P_max_traction"])
+    braking = np.minimum(np.maximum(-power_wheel, 0) * params["eta_braking"], params["P_max_braking"])
+    return traction, braking
+
+
+def route_profile(route: pd.DataFrame, dt: float = 1, params: dict = TRUCK_PARAMS, speed_params: dict = SPEED_PARAMS,
+                  mass: float | None = None, reverse: bool = False, speed_scale: float = 1.0,
+                  stops=(), step: float = 5.0, window: float = 50.0) -> pd.DataFrame:
+    """
+    Gera o perfil de potência de um trajeto, no mesmo formato da planilha "Dados" dos registros
+    :param pd.DataFrame route: Rota com colunas "Distance" (m) e "Elevation" (m) (read_route)
+    :param float dt: Intervalo de amostragem (s)
+    :param dict params: Parâmetros do caminhão (TRUCK_PARAMS)
+    :param dict speed_params: Limites do perfil de velocidade (SPEED_PARAMS)
+    :param float mass: Massa do caminhão (kg); usa params["mass"] se None
+    :param bool reverse: Percorre a rota no sentido inverso (ex.: retorno vazio)
+    :param float speed_scale: Fator sobre a velocidade máxima (variação entre operadores)
+    :param iterable stops: Distâncias com parada obrigatória, no sentido percorrido (m)
+    :param float step: Passo da reamostragem da rota (m)
+    :param float window: Largura da suavização da elevação (m)
+    :return pd.DataFrame: Colunas "Traction Power", "Braking Power" (kW), "Speed (kph)", "Accumulated Distance (m)" e "Elevation"
+    """
+    distance, elevation, _ = route_grade(route["Distance"].to_numpy(), route["Elevation"].to_numpy(), step, window)
+    if reverse:
+        elevation = elevation[::-1]
+    grade = np.gradient(elevation, distance) if distance.shape[0] > 1 else np.zeros_like(distance)
+
+    speed = speed_profile(distance, speed_params["v_max"] * speed_scale, speed_params["a_max"], speed_params["d_max"], stops)
+    time, position = distance_to_time(distance, speed, dt, speed_params["v_min"])
+    speed_t = np.interp(position, distance, speed)
+    elevation_t = np.interp(position, distance, elevation)
+    grade_t = np.interp(position, distance, grade)
+
+    traction, braking = electric_power(wheel_power(speed_t, grade_t, dt, params, mass), params)
+    return pd.DataFrame({
+        "Traction Power": traction,
+        "Braking Power": braking,
+        "Speed (kph)": speed_t * 3.6,
+        "Accumulated Distance (m)": position,
+        "Elevation": elevation_t - elevation_t[0],
+    })
+
+
+def haul_cycle(route: pd.DataFrame, dt: float = 1, params: dict = TRUCK_PARAMS, speed_params: dict = SPEED_PARAMS,
+               payload_factor: float = 1.0, speed_scale: float = 1.0, dwell: float = 0.0) -> pd.DataFrame:
+    """
+    Ciclo de transporte completo: ida carregado pela rota e retorno vazio pelo sentido inverso
+    :param pd.DataFrame route: Rota com colunas "Distance" (m) e "Elevation" (m)
+    :param float dt: Intervalo de amostragem (s)
+    :param dict params: Parâmetros do caminhão (TRUCK_PARAMS)
+    :param dict speed_params: Limites do perfil de velocidade (SPEED_PARAMS)
+    :param float payload_factor: Fração da carga útil (mass - mass_empty) transportada
+    :param float speed_scale: Fator sobre a velocidade máxima
+    :param float dwell: Tempo parado entre a ida e o retorno (basculamento, s)
+    :return pd.DataFrame: Perfil do ciclo, no formato da planilha "Dados"
+    """
+    mass = params["mass_empty"] + payload_factor * (params["mass"] - params["mass_empty"])
+    loaded = route_profile(route, dt, params, speed_params, mass=mass, speed_scale=speed_scale)
+    empty = route_profile(route, dt, params, speed_params, mass=params["mass_empty"], reverse=True, speed_scale=speed_scale)
+
+    parts = [loaded]
+    n_dwell = int(round(dwell / dt))
+    if n_dwell:
+        parts.append(pd.DataFrame({
+            "Traction Power": np.zeros(n_dwell), "Braking Power": np.zeros(n_dwell), "Speed (kph)": np.zeros(n_dwell),
+            "Accumulated Distance (m)": np.full(n_dwell, loaded["Accumulated Distance (m)"].iloc[-1]),
+            "Elevation": np.full(n_dwell, loaded["Elevation"].iloc[-1]),
+        }))
+    empty["Accumulated Distance (m)"] += loaded["Accumulated Distance (m)"].iloc[-1]
+    empty["Elevation"] += loaded["Elevation"].iloc[-1]
+    parts.append(empty)
+    return pd.concat(parts, ignore_index=True)
+
+
+def synthetic_cycles(route: pd.DataFrame, n: int, seed: int = 0, dt: float = 1, params: dict = TRUCK_PARAMS,
+                     speed_params: dict = SPEED_PARAMS, payload_range: tuple = (0.85, 1.1),
+                     speed_range: tuple = (0.8, 1.05), dwell_range: tuple = (30, 120)) -> list:
+    """
+    Gera ciclos de transporte sintéticos de uma rota com carga, velocidade e tempo de basculamento aleatórios.
+    A rota é reamostrada e suavizada uma única vez; cada ciclo é calculado de forma vetorizada.
+    :param pd.DataFrame route: Rota com colunas "Distance" (m) e "Elevation" (m)
+    :param int n: Número de ciclos
+    :param int seed: Semente do gerador
+    :param float dt: Intervalo de amostragem (s)
+    :param dict params: Parâmetros do caminhão (TRUCK_PARAMS)
+    :param dict speed_params: Limites do perfil de velocidade (SPEED_PARAMS)
+    :param tuple payload_range: Faixa da fração de carga útil
+    :param tuple speed_range: Faixa do fator de velocidade máxima
+    :param tuple dwell_range: Faixa do tempo de basculamento (s)
+    :return list: Vetores de potência total de cada ciclo (kW, tração - frenagem), prontos para fleet.simulate_fleet
+    """
+    rng = np.random.default_rng(seed)
+    distance, elevation, _ = route_grade(route["Distance"].to_numpy(), route["Elevation"].to_numpy())
+    resampled = pd.DataFrame({"Distance": distance, "Elevation": elevation})
+
+    profiles = []
+    for payload, speed_scale, dwell in zip(rng.uniform(*payload_range, n), rng.uniform(*speed_range, n), rng.uniform(*dwell_range, n)):
+        cycle = haul_cycle(resampled, dt, params, speed_params, payload, speed_scale, dwell)
+        profiles.append((cycle["Traction Power"] - cycle["Braking Power"]).to_numpy())
+    return profiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de potência a partir de uma rota (GPX ou CSV de elevação)")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR3112.gpx"), help="Rota (.gpx ou .csv)")
+    parser.add_argument("--massa", type=float, default=TRUCK_PARAMS["mass"], help="Massa carregada (kg)")
+    parser.add_argument("--ciclo", action="store_true", help="Gera o ciclo completo (ida carregado e retorno vazio)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "perfil_rota.csv"), help="Arquivo CSV de saída")
+    args = parser.parse_args()
+
+    route = read_route(args.arquivo)
+    params = {**TRUCK_PARAMS, "mass": args.massa}
+    profile = haul_cycle(route, params=params) if args.ciclo else route_profile(route, params=params)
+    profile.to_csv(args.saida, index=False)
+
+    print(f"Distância: {profile['Accumulated Distance (m)'].iloc[-1]:.0f} m ; Duração: {len(profile)} s")
+    print(f"Energia de tração: {profile['Traction Power'].sum() / 3600:.1f} kWh ; "
+          f"Energia de frenagem: {profile['Braking Power'].sum() / 3600:.1f} kWh")
+    print(f"Perfil salvo em {args.saida}")
@@ -0,0 +1,235 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine import RESULT_COLUMNS
+
+TIME_COLUMN = "Tempo"
+
+
+class ResultStore():
+    def __init__(self, path: str, dtype: str = "float64", columns: tuple = RESULT_COLUMNS):
+        """
+        Conjunto de resultados de simulação em formato colunar.
+        Cada coluna é um arquivo binário contínuo (<coluna>.bin) com todas as execuções
+        concatenadas, lido por memória mapeada; os metadados de cada execução
+        (parâmetros dos bancos, limiar, rota, posição nos arquivos) ficam em runs.csv.
+        :param str path: Diretório do conjunto (criado se não existir)
+        :param str dtype: Tipo das séries ("float64" ou "float32"); ignorado se o conjunto já existir
+        :param tuple columns: Colunas das séries temporais; ignorado se o conjunto já existir
+        :raises ValueError: Se o tipo for inválido
+        """
+        self._path = path
+        self._info_path = os.path.join(path, "dataset.json")
+        self._runs_path = os.path.join(path, "runs.csv")
+        self._runs = None                               # runs.csv já lido e a (data, tamanho) do arquivo nessa leitura
+
+        if os.path.exists(self._info_path):
+            with open(self._info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        else:
+            if np.dtype(dtype) not in (np.float32, np.float64):
+                raise ValueError("dtype deve ser float32 ou float64")
+            info = {"dtype": np.dtype(dtype).name, "columns": list(columns)}
+            os.makedirs(path, exist_ok=True)
+            with open(self._info_path, "w", encoding="utf-8") as f:
+                json.dump(info, f, indent=2)
+
+        self._dtype = np.dtype(info["dtype"])
+        self._columns = tuple(info["columns"])
+
+    @property
+    def path(self) -> str:
+        """Diretório do conjunto (absoluto)"""
+        return os.path.abspath(self._path)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Tipo das séries armazenadas"""
+        return self._dtype
+
+    @property
+    def columns(self) -> tuple:
+        """Colunas das séries temporais"""
+        return self._columns
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self._path, f"{column}.bin")
+
+    def versions(self, columns=None) -> tuple:
+        """
+        Versão dos arquivos das séries, para invalidar caches de dados derivados quando o conjunto é regravado
+        :param iterable columns: Colunas consultadas; todas (e "Tempo") se None
+        :return tuple: (coluna, data de modificação em ns, tamanho em bytes) de cada arquivo; (coluna, None, None) se não existir
+        """
+        columns = (*self._columns, TIME_COLUMN) if columns is None else columns
+        versions = []
+        for column in columns:
+            try:
+                stat = os.stat(self._column_path(column))
+            except FileNotFoundError:
+                versions.append((column, None, None))
+            else:
+                versions.append((column, stat.st_mtime_ns, stat.st_size))
+        return tuple(versions)
+
+    def runs(self) -> pd.DataFrame:
+        """
+        Tabela de metadados, uma linha por execução
+        :return pd.DataFrame: Metadados indexados por run_id (cópia)
+        """
+        return self._table().copy()
+
+    def _table(self) -> pd.DataFrame:
+        """
+        Tabela de metadados sem cópia: runs.csv só é lido de novo se mudar (append ou outro processo)
+        :return pd.DataFrame: Metadados indexados por run_id (não modificar)
+        """
+        try:
+            stat = os.stat(self._runs_path)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=["offset", "length", "dt"]).rename_axis("run_id")
+        version = (stat.st_mtime_ns, stat.st_size)
+        if self._runs is None or self._runs[1] != version:
+            self._runs = (pd.read_csv(self._runs_path, index_col="run_id"), version)
+        return self._runs[0]
+
+    def __len__(self) -> int:
+        return len(self._table())
+
+    def append(self, results, metadata: dict | None = None, dt=1) -> int:
+        """
+        Acrescenta uma execução ao conjunto.
+        Passos de tempo não uniformes são guardados como a série "Tempo" (float64) e registrados com dt vazio em runs.csv.
+        :param dict|pd.DataFrame results: Séries temporais com as colunas do conjunto
+        :param dict metadata: Metadados escalares da execução (limiar, rota, parâmetros dos bancos...)
+        :param float|array dt: Intervalo de tempo entre amostras (s), único ou um por amostra
+        :return int: Identificador da execução
+        :raises ValueError: Se faltar alguma coluna ou os tamanhos forem diferentes
+        """
+        missing = [column for column in self._columns if column not in results]
+        if missing:
+            raise ValueError(f"Colunas ausentes: {missing}")
+        arrays = {column: np.ascontiguousarray(results[column], dtype=self._dtype) for column in self._columns}
+        lengths = {array.shape[0] for array in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("Todas as colunas devem ter o mesmo tamanho")
+
+        length = lengths.pop()
+
+        dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), (length,))
+        if length and np.all(dts == dts[0]):
+            dt = float(dts[0])
+        elif length:
+            # Passo variável: o instante de cada amostra passa a ser uma série própria
+            arrays[TIME_COLUMN] = np.cumsum(dts) - dts
+            dt = np.nan
+
+        runs = self._table()
+        run_id = int(runs.index.max()) + 1 if len(runs) else 0
+        offset = int((runs["offset"] + runs["length"]).max()) if len(runs) else 0
+
+        # Grava as séries antes dos metadados: uma falha no meio deixa apenas bytes órfãos no fim dos arquivos
+        for column, array in arrays.items():
+            itemsize = array.dtype.itemsize
+            with open(self._column_path(column), "r+b" if os.path.exists(self._column_path(column)) else "wb") as f:
+                f.seek(offset * itemsize)
+                f.write(array.tobytes())
+                f.truncate()
+
+        row = pd.DataFrame([{"offset": offset, "length": length, "dt": dt, **(metadata or {})}],
+                           index=pd.Index([run_id], name="run_id"))
+        runs = row if runs.empty else pd.concat([runs, row])
+        runs.to_csv(self._runs_path)
+        self._runs = None
+        return run_id
+
+    def column(self, run_id: int, column: str, mmap: bool = True) -> np.ndarray:
+        """
+        Série de uma coluna de uma execução
+        :param int run_id: Identificador da execução
+        :param str column: Nome da coluna
+        :param bool mmap: Retorna uma visão somente leitura mapeada em memória; se False, lê para a RAM
+        :return np.ndarray: Série temporal
+        """
+        run = self._table().loc[run_id]
+        return self._read(column, int(run["offset"]), int(run["length"]), mmap)
+
+    def _read(self, column: str, offset: int, length: int, mmap: bool) -> np.ndarray:
+        if column == TIME_COLUMN:
+            dtype = np.dtype(np.float64)
+        elif column in self._columns:
+            dtype = self._dtype
+        else:
+            raise KeyError(column)
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        if mmap:
+            return np.memmap(self._column_path(column), dtype=dtype, mode="r",
+                             offset=offset * dtype.itemsize, shape=(length,))
+        with open(self._column_path(column), "rb") as f:
+            f.seek(offset * dtype.itemsize)
+            return np.fromfile(f, dtype=dtype, count=length)
+
+    def time(self, run_id: int, mmap: bool = True) -> np.ndarray:
+        """
+        Instante de cada amostra de uma execução
+        :param int run_id: Identificador da execução
+        :param bool mmap: Usa memória mapeada para execuções com passo variável
+        :return np.ndarray: Tempo (s)
+        """
+        run = self._table().loc[run_id]
+        return self._time(run, mmap)
+
+    def _time(self, run: pd.Series, mmap: bool) -> np.ndarray:
+        if pd.isna(run["dt"]):
+            return self._read(TIME_COLUMN, int(run["offset"]), int(run["length"]), mmap)
+        return np.arange(int(run["length"])) * run["dt"]
+
+    def load(self, run_ids=None, columns=None, mmap: bool = True) -> dict:
+        """
+        Carrega execuções selecionadas, apenas com as colunas pedidas
+        :param iterable run_ids: Execuções a carregar; todas se None
+        :param iterable columns: Colunas a carregar; todas se None
+        :param bool mmap: Usa memória mapeada (sem cópia) em vez de ler para a RAM
+        :return dict: DataFrame de cada execução, indexado por run_id, com a coluna "Tempo"
+        """
+        runs = self._table()
+        if run_ids is not None:
+            runs = runs.loc[list(run_ids)]
+        columns = self._columns if columns is None else tuple(columns)
+
+        loaded = {}
+        for run_id, run in runs.iterrows():
+            offset, length = int(run["offset"]), int(run["length"])
+            data = {"Tempo": self._time(run, mmap)}
+            data.update({column: self._read(column, offset, length, mmap) for column in columns})
+            loaded[run_id] = pd.DataFrame(data, copy=False)
+        return loaded
+
+
+def import_pickles(store: ResultStore, path: str, route: str | None = None) -> list:
+    """
+    Importa os arquivos simulacao_{threshold}kW.pkl gerados pela versão antiga de save_data
+    :param ResultStore store: Conjunto de destino
+    :param str path: Diretório com os arquivos .pkl
+    :param str route: Nome da rota associada às execuções
+    :return list: Identificadores das execuções importadas, em ordem crescente de limiar
+    """
+    files = glob.glob(os.path.join(path, "simulacao_*kW.pkl"))
+    files = sorted(files, key=lambda x: int(os.path.basename(x).split('_')[1].replace('kW.pkl', '')))
+
+    run_ids = []
+    for file in files:
+        df = pd.read_pickle(file)
+        # Parâmetros escalares eram repetidos em todas as linhas; guarda apenas o primeiro valor
+        metadata = {column: df[column].iloc[0] for column in df.columns
+                    if column != "Tempo" and column not in store.columns}
+        metadata["threshold"] = int(os.path.basename(file).split('_')[1].replace('kW.pkl', ''))
+        if route is not None:
+            metadata["route"] = route
+        run_ids.append(store.append(df, metadata))
+    return run_ids
@@ -0,0 +1,192 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from engine import njit, simulate_arrays
+from UC import Uc
+
+
+class Strategy():
+    """
+    Estratégia de gerenciamento de energia: divide o perfil completo de potência entre bateria e UC.
+    split calcula, de forma vetorizada, a referência de potência da bateria para todo o perfil; o UC recebe
+    o restante. A realimentação pelo SoC do UC (feedback_gain, feedback_target) depende do estado e é
+    aplicada dentro do kernel (engine._kernel), passo a passo.
+    """
+    feedback_gain = 0.0             # kW por ponto percentual de SoC do UC abaixo do alvo
+    feedback_target = 0.0           # SoC alvo do UC (%)
+    p_max_bat = math.inf            # Potência máxima da bateria (kW)
+
+    def split(self, powers: np.ndarray, dt=1) -> np.ndarray:
+        """
+        Referência de potência da bateria a cada passo
+        :param np.ndarray powers: Potência total requerida a cada passo (kW, tração - frenagem)
+        :param float|array dt: Intervalo de tempo de cada passo (s)
+        :return np.ndarray: Potência da bateria (kW)
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{key}={value!r}" for key, value in vars(self).items() if not key.startswith("_"))
+        return f"{type(self).__name__}({params})"
+
+
+class ThresholdStrategy(Strategy):
+    def __init__(self, threshold: float):
+        """
+        Limiar simétrico (Simulation.supervisory_control): a bateria atende até o limiar e o UC absorve os picos
+        :param float threshold: Limiar de potência para distribuição (kW)
+        """
+        self.threshold = threshold
+
+    def split(self, powers, dt=1):
+        return np.clip(np.asarray(powers, dtype=np.float64), -self.threshold, self.threshold)
+
+
+@njit(cache=True)
+def _low_pass(powers, dts, tau, y):
+    """Filtro passa-baixas de primeira ordem (Euler implícito), estável para qualquer dt"""
+    out = np.empty(powers.shape[0])
+    for k in range(powers.shape[0]):
+        y += dts[k] / (tau + dts[k]) * (powers[k] - y)
+        out[k] = y
+    return out
+
+
+class LowPassStrategy(Strategy):
+    def __init__(self, tau: float, p_max_bat: float = math.inf, initial: float | None = None):
+        """
+        Filtro passa-baixas: a bateria segue a componente lenta do perfil e o UC as variações rápidas
+        :param float tau: Constante de tempo do filtro (s)
+        :param float p_max_bat: Potência máxima da bateria (kW); o excedente vai para o UC
+        :param float initial: Saída inicial do filtro (kW); a primeira amostra do perfil se None
+        """
+        self.tau = tau
+        self.p_max_bat = p_max_bat
+        self.initial = initial
+
+    def split(self, powers, dt=1):
+        powers = np.ascontiguousarray(powers, dtype=np.float64)
+        if powers.shape[0] == 0:
+            return powers.copy()
+        dts = np.ascontiguousarray(np.broadcast_to(np.asarray(dt, dtype=np.float64), powers.shape))
+        initial = powers[0] if self.initial is None else self.initial
+        return _low_pass(powers, dts, float(self.tau), float(initial))
+
+
+class RuleTableStrategy(Strategy):
+    def __init__(self, edges, fractions, p_max_bat: float = math.inf):
+        """
+        Tabela de regras por faixa de potência: em cada faixa a bateria atende uma fração da potência total
+        :param iterable edges: Bordas das faixas de potência (kW), em ordem crescente
+        :param iterable fractions: Fração atendida pela bateria em cada faixa (len(edges) + 1 valores)
+        :param float p_max_bat: Potência máxima da bateria (kW); o excedente vai para o UC
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.fractions = np.asarray(fractions, dtype=float)
+        self.p_max_bat = p_max_bat
+        if self.fractions.shape[0] != self.edges.shape[0] + 1:
+            raise ValueError("fractions deve ter uma fração a mais que edges")
+
+    def split(self, powers, dt=1):
+        powers = np.asarray(powers, dtype=np.float64)
+        return self.fractions[np.searchsorted(self.edges, powers, side="right")] * powers
+
+
+class LookaheadStrategy(Strategy):
+    def __init__(self, horizon: float, p_max_bat: float = math.inf):
+        """
+        Antecipação: a bateria segue a média da potência no horizonte à frente (perfil conhecido, ex.: rota
+        planejada), então começa a carregar/descarregar antes dos picos que o UC vai cobrir
+        :param float horizon: Horizonte de antecipação (s)
+        :param float p_max_bat: Potência máxima da bateria (kW); o excedente vai para o UC
+        """
+        self.horizon = horizon
+        self.p_max_bat = p_max_bat
+
+    def split(self, powers, dt=1):
+        powers = np.asarray(powers, dtype=np.float64)
+        dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), powers.shape)
+        # Média ponderada pelo tempo em [t_k, t_k + horizon), pelas somas acumuladas de energia e de tempo
+        start = np.concatenate(([0.0], np.cumsum(dts)))
+        energy = np.concatenate(([0.0], np.cumsum(powers * dts)))
+        end = np.searchsorted(start, start[:-1] + self.horizon, side="left")
+        end = np.maximum(np.minimum(end, powers.shape[0]), np.arange(1, powers.shape[0] + 1))
+        return (energy[end] - energy[:-1]) / (start[end] - start[:-1])
+
+
+class SoCFeedbackStrategy(Strategy):
+    def __init__(self, base: Strategy, gain: float, target: float = 50, p_max_bat: float | None = None):
+        """
+        Realimentação pelo SoC do UC sobre outra estratégia: com o UC abaixo do alvo a bateria assume mais
+        potência (e o recarrega), acima do alvo assume menos
+        :param Strategy base: Estratégia que define a referência da bateria
+        :param float gain: Ganho (kW por ponto percentual de SoC do UC)
+        :param float target: SoC alvo do UC (%)
+        :param float p_max_bat: Potência máxima da bateria (kW); a da estratégia base se None
+        """
+        self.base = base
+        self.feedback_gain = gain
+        self.feedback_target = target
+        self.p_max_bat = base.p_max_bat if p_max_bat is None else p_max_bat
+
+    def split(self, powers, dt=1):
+        return self.base.split(powers, dt)
+
+
+def simulate_strategy(powers, strategy: Strategy, batt: Batt, uc: Uc, dt=1) -> dict:
+    """
+    Simula um perfil completo com uma estratégia de gerenciamento de energia (engine.simulate_arrays)
+    :param array powers: Potência total requerida a cada passo (kW, tração - frenagem)
+    :param Strategy strategy: Estratégia de distribuição
+    :param Batt batt: Bateria, com estado inicial já configurado (atualizada ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (atualizado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :return dict: Vetores de resultado (engine.RESULT_COLUMNS)
+    """
+    powers = np.ascontiguousarray(powers, dtype=np.float64)
+    return simulate_arrays(powers, 0, batt, uc, dt, bat_ref=strategy.split(powers, dt),
+                           fb_gain=strategy.feedback_gain, fb_target=strategy.feedback_target,
+                           bat_p_max=strategy.p_max_bat)
+
+
+def compare_strategies(powers, strategies: dict, batt: Batt, uc: Uc, dt=1) -> pd.DataFrame:
+    """
+    Simula o mesmo perfil com cada estratégia, a partir do mesmo estado inicial dos bancos
+    :param array powers: Potência total requerida a cada passo (kW)
+    :param dict strategies: Estratégias por nome
+    :param Batt batt: Bateria, com estado inicial já configurado (restaurado ao final)
+    :param Uc uc: Banco de supercapacitores, com estado inicial já configurado (restaurado ao final)
+    :param float|array dt: Intervalo de tempo de cada passo (s)
+    :return pd.DataFrame: Uma linha por estratégia: energias rejeitadas e processadas (kWh), pico e RMS da corrente
+                          da bateria (A) e faixa de SoC
+    """
+    powers = np.asarray(powers, dtype=np.float64)
+    dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), powers.shape)
+    bat, cap = batt.getState(), uc.getState()
+
+    rows = {}
+    for name, strategy in strategies.items():
+        batt.setState(bat)
+        uc.setState(cap)
+        results = simulate_strategy(powers, strategy, batt, uc, dt)
+        p_reject = results["p_reject"]
+        p_bat = results["v_banco_bat"] * results["i_bat"] / 1000
+        p_uc = results["v_banco_uc"] * results["i_uc"] / 1000
+        rows[name] = {
+            "E_reject_tracao": np.sum(np.maximum(p_reject, 0) * dts) / 3600,
+            "E_reject_frenagem": np.sum(np.maximum(-p_reject, 0) * dts) / 3600,
+            "E_bat": np.sum(np.abs(p_bat) * dts) / 3600,
+            "E_uc": np.sum(np.abs(p_uc) * dts) / 3600,
+            "i_bat_pico": np.max(np.abs(results["i_bat"]), initial=0.0),
+            "i_bat_rms": math.sqrt(np.sum(results["i_bat"] ** 2 * dts) / max(np.sum(dts), 1e-12)),
+            "SoC_bat_min": np.min(results["SoC_bat"], initial=np.inf),
+            "SoC_UC_min": np.min(results["SoC_UC"], initial=np.inf),
+            "SoC_UC_max": np.max(results["SoC_UC"], initial=-np.inf),
+        }
+
+    batt.setState(bat)
+    uc.setState(cap)
+    return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,220 @@
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from batt import Batt
+from drive_cycle import load_cycle, time_steps
+from engine import RESULT_COLUMNS, simulate_arrays
+from UC import Uc
+
+
+def power_from_log(volts, amps) -> np.ndarray:
+    """
+    Potência elétrica a partir dos canais de tensão e corrente do registrador (ex.: fa00_altoutvolts e fa08_m2amps)
+    :param array volts: Tensão (V)
+    :param array amps: Corrente (A, positiva em tração e negativa em frenagem)
+    :return np.ndarray: Potência (kW)
+    """
+    return np.asarray(volts, dtype=float) * np.asarray(amps, dtype=float) / 1000
+
+
+def split_power(power) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Separa a potência total em potências de tração e de frenagem (ambas positivas)
+    :param array power: Potência total (kW)
+    :return tuple: Potência de tração e de frenagem (kW)
+    """
+    power = np.asarray(power, dtype=float)
+    return np.maximum(power, 0), np.maximum(-power, 0)
+
+
+class StreamingSimulation():
+    def __init__(self, batt: Batt, uc: Uc, threshold: float, dt: float = 1, history: int = 0):
+        """
+        Simulação incremental: mantém o estado da bateria e do UC entre blocos de amostras
+        e processa cada bloco no kernel vetorizado, com memória limitada ao tamanho do bloco.
+        :param Batt batt: Bateria, com estado inicial já configurado
+        :param Uc uc: Banco de supercapacitores, com estado inicial já configurado
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param float dt: Intervalo de tempo entre amostras (s), usado nos blocos recebidos sem intervalos próprios
+        :param int history: Número de amostras recentes mantidas em memória (0 para nenhuma)
+        """
+        self._batt = batt
+        self._uc = uc
+        self._threshold = threshold
+        self._dt = dt
+        self._n = 0
+        self._time = 0.0                                # Instante do fim da última amostra processada (s)
+        self._history = deque(maxlen=history) if history > 0 else None
+
+        # Acumuladores de resumo (tamanho constante)
+        self._E_traction = 0.0
+        self._E_braking = 0.0
+        self._E_reject_traction = 0.0
+        self._E_reject_braking = 0.0
+        self._SoC_bat_min = np.inf
+        self._SoC_UC_min = np.inf
+
+    @classmethod
+    def from_params(cls, batt_params: dict, uc_params: dict, threshold: float, dt: float = 1, history: int = 0) -> "StreamingSimulation":
+        """
+        Cria a simulação a partir dos dicionários de parâmetros (como os de size_energy_storage com "SoC")
+        :param dict batt_params: Parâmetros da bateria (C, Ns, Np, Nm, Vnom, SoC)
+        :param dict uc_params: Parâmetros do supercapacitor (C, Ns, Np, Nm, Vnom, SoC)
+        :param float threshold: Limiar de potência para distribuição (kW)
+        :param float dt: Intervalo de tempo entre amostras (s)
+        :param int history: Número de amostras recentes mantidas em memória
+        :return StreamingSimulation: Simulação pronta para receber amostras
+        """
+        batt = Batt()
+        batt.setParams(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+        uc = Uc()
+        uc.setParams(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+        return cls(batt, uc, threshold, dt, history)
+
+    @property
+    def samples(self) -> int:
+        """Número de amostras já processadas"""
+        return self._n
+
+    def setThreshold(self, threshold: float) -> None:
+        """
+        Altera o limiar de potência para as próximas amostras
+        :param float threshold: Limiar de potência para distribuição (kW)
+        """
+        self._threshold = threshold
+
+    def _advance(self, traction, braking, dt=None) -> tuple[np.ndarray, dict]:
+        """
+        Simula um bloco de amostras e atualiza os acumuladores e o histórico
+        :return tuple: Instante de início de cada amostra (s) e vetores de resultado (engine.RESULT_COLUMNS)
+        """
+        powers = np.atleast_1d(np.asarray(traction, dtype=float) - np.asarray(braking, dtype=float))
+        n = powers.shape[0]
+        dts = np.broadcast_to(np.asarray(self._dt if dt is None else dt, dtype=float), (n,))
+        results = simulate_arrays(powers, self._threshold, self._batt, self._uc, dts)
+
+        ends = self._time + np.cumsum(dts)
+        times = ends - dts
+        self._n += n
+
+        if n:
+            self._time = float(ends[-1])
+            p_reject = results["p_reject"]
+            self._E_traction += float(np.sum(np.maximum(powers, 0) * dts)) / 3600
+            self._E_braking += float(np.sum(np.maximum(-powers, 0) * dts)) / 3600
+            self._E_reject_traction += float(np.sum(np.maximum(p_reject, 0) * dts)) / 3600
+            self._E_reject_braking += float(np.sum(np.maximum(-p_reject, 0) * dts)) / 3600
+            self._SoC_bat_min = min(self._SoC_bat_min, float(np.min(results["SoC_bat"])))
+            self._SoC_UC_min = min(self._SoC_UC_min, float(np.min(results["SoC_UC"])))
+        if self._history is not None:
+            self._history.extend(zip(times.tolist(), *(results[column].tolist() for column in RESULT_COLUMNS)))
+        return times, results
+
+    def feed(self, traction, braking, dt=None) -> pd.DataFrame:
+        """
+        Processa um bloco de amostras
+        :param float|array traction: Potência de tração (kW)
+        :param float|array braking: Potência de frenagem (kW)
+        :param float|array dt: Intervalo de cada amostra (s), único ou um por amostra (ex.: o terceiro elemento
+                               dos blocos de replay); usa o dt da simulação se None
+        :return pd.DataFrame: Resultados do bloco, com o tempo absoluto em "Tempo"
+        """
+        times, results = self._advance(traction, braking, dt)
+        return pd.DataFrame({"Tempo": times, **results})
+
+    def step(self, traction: float, braking: float, dt: float | None = None) -> dict:
+        """
+        Processa uma única amostra, sem montar um DataFrame
+        :param float traction: Potência de tração (kW)
+        :param float braking: Potência de frenagem (kW)
+        :param float dt: Intervalo da amostra (s); usa o dt da simulação se None
+        :return dict: Resultado da amostra ("Tempo" e colunas de engine.RESULT_COLUMNS)
+        """
+        times, results = self._advance(traction, braking, dt)
+        return {"Tempo": float(times[0]), **{column: float(results[column][0]) for column in RESULT_COLUMNS}}
+
+    def stream(self, chunks):
+        """
+        Processa blocos conforme chegam
+        :param iterable chunks: Blocos (tração, frenagem) ou (tração, frenagem, dt), como os de replay,
+                                ou DataFrames com "Traction Power", "Braking Power" e, opcionalmente, "dt"
+        :return generator: Resultados de cada bloco
+        """
+        for chunk in chunks:
+            if isinstance(chunk, pd.DataFrame):
+                yield self.feed(chunk["Traction Power"].to_numpy(), chunk["Braking Power"].to_numpy(),
+                                chunk["dt"].to_numpy() if "dt" in chunk else None)
+            else:
+                yield self.feed(*chunk)
+
+    def history(self) -> pd.DataFrame:
+        """
+        Amostras recentes mantidas em memória
+        :return pd.DataFrame: Últimas amostras processadas (vazio se history = 0)
+        """
+        return pd.DataFrame(list(self._history or []), columns=("Tempo",) + RESULT_COLUMNS)
+
+    def state(self) -> dict:
+        """
+        Estado atual dos bancos
+        :return dict: Estados completos da bateria e do UC (Batt.getState / Uc.getState)
+        """
+        return {"batt": self._batt.getState(), "uc": self._uc.getState()}
+
+    def summary(self) -> dict:
+        """
+        Resumo acumulado desde o início do fluxo
+        :return dict: Energias (kWh) e SoC mínimos
+        """
+        return {
+            "amostras": self._n,
+            "E_tracao": self._E_traction,
+            "E_frenagem": self._E_braking,
+            "E_reject_tracao": self._E_reject_traction,
+            "E_reject_frenagem": self._E_reject_braking,
+            "SoC_bat_min": self._SoC_bat_min,
+            "SoC_UC_min": self._SoC_UC_min,
+        }
+
+
+def replay(path: str, sheet: str = "Dados", speed: float = 1.0, chunk_size: int = 1, dt: float = 1,
+           volts: str = "fa00_altoutvolts", amps: str = "fa08_m2amps"):
+    """
+    Reproduz um registro existente como se as amostras chegassem do caminhão, N vezes mais rápido que o tempo real.
+    As amostras seguem os instantes da coluna "Time" do registro (com as falhas de amostragem) quando ela existir.
+    :param str path: Caminho da planilha (.xlsx)
+    :param str sheet: "Dados" (potências de tração e frenagem) ou "Log" (potência calculada pelos canais de tensão e corrente)
+    :param float speed: Fator de aceleração em relação ao tempo real; sem espera se <= 0 ou infinito
+    :param int chunk_size: Número de amostras por bloco
+    :param float dt: Intervalo de tempo entre amostras (s), usado só se o registro não tiver coluna "Time"
+    :param str volts: Canal de tensão, usado com a planilha "Log"
+    :param str amps: Canal de corrente, usado com a planilha "Log"
+    :return generator: Blocos (tração, frenagem, dt): potências em kW e intervalo de cada amostra (s)
+    """
+    data = load_cycle(path, sheet)
+    if "Traction Power" in data:
+        traction = data["Traction Power"].to_numpy(dtype=float)
+        braking = data["Braking Power"].to_numpy(dtype=float)
+    else:
+        traction, braking = split_power(power_from_log(data[volts], data[amps]))
+
+    # Intervalo de cada amostra e instante (s, desde o início) em que ela termina de ser registrada
+    if "Time" in data:
+        steps = time_steps(data["Time"].to_numpy())
+    else:
+        steps = np.full(len(traction), float(dt))
+    arrival = np.cumsum(steps)
+
+    paced = 0 < speed < np.inf
+    start = time.monotonic()
+    for begin in range(0, len(traction), chunk_size):
+        end = min(begin + chunk_size, len(traction))
+        if paced:
+            # Espera até o instante em que a última amostra do bloco teria sido registrada
+            delay = start + arrival[end - 1] / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        yield traction[begin:end], braking[begin:end], steps[begin:end]
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from drive_cycle import load_cycle
+from memo import CACHE_DIR, ResultCache
+from main import VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from route import haul_cycle, read_route
+from sweep import SUMMARY_COLUMNS, run_threshold
+
+# Manifesto padrão: rotas operadas x projetos de banco x limiares
+STUDY_MANIFEST = {
+    "routes": {                                  # Nome -> registro agregado (.xlsx) ou rota (.csv/.gpx)
+        "CR-3112": os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"),
+        "UMAX": os.path.join("data", "UMAX_18-10-24.xlsx"),
+    },
+    "packs": {                                   # Nome -> tensões (V) e, opcionalmente, Np fixo de cada banco
+        "1260V/960V": {"bat": 1260, "uc": 960},
+    },
+    "thresholds": [400, 600, 800],               # kW
+    "sheet": "Dados",                            # Planilha dos registros .xlsx
+    "SoC_bat": 50,                               # SoC inicial da bateria (%)
+    "SoC_uc": 20,                                # SoC inicial do supercapacitor (%)
+}
+
+STUDY_COLUMNS = ("route", "pack", "E_tracao", "E_frenagem") + SUMMARY_COLUMNS
+
+_worker_profiles = None
+_worker_cache = None
+
+
+def load_manifest(path: str | None = None) -> dict:
+    """
+    Lê o manifesto do estudo (JSON); chaves ausentes usam STUDY_MANIFEST
+    :param str path: Arquivo JSON do manifesto; o manifesto padrão se None
+    :return dict: Manifesto com rotas, bancos, limiares, planilha e SoC iniciais
+    :raises ValueError: Se um banco usar tensão sem configuração em VOLTAGE_CONFIGS_BAT/VOLTAGE_CONFIGS_UC
+    """
+    manifest = dict(STUDY_MANIFEST)
+    if path is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest.update(json.load(f))
+
+    for name, pack in manifest["packs"].items():
+        if int(pack["bat"]) not in VOLTAGE_CONFIGS_BAT:
+            raise ValueError(f"Banco {name}: tensão da bateria {pack['bat']} V fora de {sorted(VOLTAGE_CONFIGS_BAT)}")
+        if int(pack["uc"]) not in VOLTAGE_CONFIGS_UC:
+            raise ValueError(f"Banco {name}: tensão do supercapacitor {pack['uc']} V fora de {sorted(VOLTAGE_CONFIGS_UC)}")
+    return manifest
+
+
+def load_route_profile(path: str, sheet: str = "Dados", dt: float = 1) -> tuple[pd.DataFrame, float | np.ndarray]:
+    """
+    Perfil de potência de uma rota: o registro agregado (.xlsx) ou o ciclo de transporte gerado
+    a partir do traçado (.csv/.gpx, route.haul_cycle)
+    :param str path: Caminho do registro ou da rota
+    :param str sheet: Nome da planilha dos registros .xlsx
+    :param float dt: Intervalo de amostragem dos ciclos gerados pelo traçado (s)
+    :return tuple: DataFrame com "Traction Power" e "Braking Power" (kW) e intervalo de cada amostra (s)
+    """
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xls"):
+        data = load_cycle(path, sheet)
+        steps = sample_steps(data)
+    else:
+        data = haul_cycle(read_route(path), dt)
+        steps = dt
+    return data[["Traction Power", "Braking Power"]], steps
+
+
+def load_profiles(routes: dict, sheet: str = "Dados") -> dict:
+    """
+    Carrega o perfil de cada rota uma única vez (rotas com o mesmo arquivo compartilham o perfil)
+    :param dict routes: Caminho do registro ou da rota por nome
+    :param str sheet: Nome da planilha dos registros .xlsx
+    :return dict: (DataFrame, intervalos) por nome de rota
+    """
+    loaded = {}
+    profiles = {}
+    for name, path in routes.items():
+        key = os.path.abspath(path)
+        if key not in loaded:
+            loaded[key] = load_route_profile(path, sheet)
+        profiles[name] = loaded[key]
+    return profiles
+
+
+def _init_worker(profiles: dict, cache_dir: str | None = None, cache_max_bytes: int = 1 << 30) -> None:
+    """Guarda os perfis de todas as rotas (e abre o cache em disco) uma única vez por processo"""
+    global _worker_profiles, _worker_cache
+    _worker_profiles = profiles
+    _worker_cache = ResultCache(directory=cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+
+
+def _run_case(profiles: dict, task: tuple, cache: ResultCache | None) -> dict:
+    """Simula uma combinação rota x banco x limiar e acrescenta as energias da rota à linha do resumo"""
+    route, pack, threshold, config_bat, config_uc, SoC_bat, SoC_uc, Np_bat, Np_uc = task
+    data, dt = profiles[route]
+    row = run_threshold(data, threshold, config_bat, config_uc, SoC_bat, SoC_uc, dt, cache=cache,
+                        Np_bat=Np_bat, Np_uc=Np_uc)
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), (len(data),))
+    return {
+        "route": route,
+        "pack": pack,
+        "E_tracao": np.sum(data["Traction Power"].to_numpy() * dt) / 3600,
+        "E_frenagem": np.sum(data["Braking Power"].to_numpy() * dt) / 3600,
+        **row,
+    }
+
+
+def _run_worker(task: tuple) -> dict:
+    """Executa _run_case no processo trabalhador com os perfis compartilhados"""
+    return _run_case(_worker_profiles, task, _worker_cache)
+
+
+def run_study(manifest: dict, processes: int | None = None, cache: ResultCache | None = None,
+              profiles: dict | None = None) -> pd.DataFrame:
+    """
+    Avalia todas as combinações rota x banco x limiar do manifesto em paralelo
+    :param dict manifest: Manifesto do estudo (load_manifest)
+    :param int processes: Número de processos; usa todos os núcleos se None e roda em série se 1
+    :param ResultCache cache: Cache de dimensionamentos e simulações; em paralelo, cada processo usa apenas a camada em disco
+    :param dict profiles: Perfis já carregados (load_profiles); carregados pelo manifesto se None
+    :return pd.DataFrame: Uma linha por combinação (colunas STUDY_COLUMNS)
+    """
+    if profiles is None:
+        profiles = load_profiles(manifest["routes"], manifest.get("sheet", "Dados"))
+
+    tasks = []
+    for route in manifest["routes"]:
+        for name, pack in manifest["packs"].items():
+            for threshold in manifest["thresholds"]:
+                tasks.append((route, name, float(threshold),
+                              VOLTAGE_CONFIGS_BAT[int(pack["bat"])], VOLTAGE_CONFIGS_UC[int(pack["uc"])],
+                              manifest.get("SoC_bat", 50), manifest.get("SoC_uc", 20),
+                              pack.get("Np_bat"), pack.get("Np_uc")))
+
+    if processes == 1:
+        rows = [_run_case(profiles, task, cache) for task in tasks]
+    else:
+        processes = processes or os.cpu_count()
+        chunksize = max(1, len(tasks) // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(profiles, *((cache.directory, cache.max_bytes) if cache is not None else ()))) as executor:
+            rows = list(executor.map(_run_worker, tasks, chunksize=chunksize))
+
+    return pd.DataFrame(rows, columns=STUDY_COLUMNS)
+
+
+def compare_routes(study: pd.DataFrame, value: str = "E_reject") -> pd.DataFrame:
+    """
+    Tabela comparativa: uma linha por banco e limiar, uma coluna por rota
+    :param pd.DataFrame study: Resultado de run_study
+    :param str value: Coluna comparada (ex.: "E_reject", "Np_bat")
+    :return pd.DataFrame: Valores por (banco, limiar) e rota
+    """
+    return study.pivot_table(index=["pack", "threshold"], columns="route", values=value, sort=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estudo comparativo de projetos de banco em todas as rotas operadas")
+    parser.add_argument("--manifesto", default=None, help="Manifesto JSON (rotas, bancos e limiares); o padrão do módulo se omitido")
+    parser.add_argument("--limiares", type=float, nargs="+", default=None, help="Substitui os limiares do manifesto (kW)")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIR, default=None, help="Reaproveita resultados já calculados (diretório do cache em disco)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "estudo_rotas.csv"), help="Arquivo CSV de saída")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifesto)
+    if args.limiares:
+        manifest["thresholds"] = args.limiares
+
+    study = run_study(manifest, processes=args.processos,
+                      cache=ResultCache(directory=args.cache) if args.cache else None)
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    study.to_csv(args.saida, index=False)
+
+    print(compare_routes(study).to_string())
+    print(f"\nEstudo salvo em {args.saida}")
@@ -0,0 +1,151 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from drive_cycle import load_cycle
+from memo import CACHE_DIR, ResultCache, simulate_cached
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+
+SUMMARY_COLUMNS = ("threshold", "Ns_bat", "Np_bat", "Nm_bat", "max_energy_bat",
+                   "Ns_uc", "Np_uc", "Nm_uc", "max_energy_uc",
+                   "E_reject_bat", "E_reject_uc", "E_reject_tracao", "E_reject_frenagem", "E_reject")
+
+_worker_data = None
+_worker_cache = None
+
+
+def _init_worker(data: pd.DataFrame, cache_dir: str | None = None, cache_max_bytes: int = 1 << 30) -> None:
+    """Guarda o perfil de potência (e abre o cache em disco) uma única vez por processo"""
+    global _worker_data, _worker_cache
+    _worker_data = data
+    _worker_cache = ResultCache(directory=cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+
+
+def run_threshold(data: pd.DataFrame, threshold: float, config_bat: dict, config_uc: dict,
+                  SoC_bat: float = 50, SoC_uc: float = 20, dt=None, cache: ResultCache | None = None,
+                  Np_bat: int | None = None, Np_uc: int | None = None) -> dict:
+    """
+    Dimensiona e simula os bancos para um único limiar de potência
+    :param pd.DataFrame data: DataFrame com colunas "Traction Power" e "Braking Power" (kW)
+    :param float threshold: Limiar de potência para distribuição (kW)
+    :param dict config_bat: Configuração de tensão da bateria (Ns e Nm)
+    :param dict config_uc: Configuração de tensão do supercapacitor (Ns e Nm)
+    :param float SoC_bat: Estado de carga inicial da bateria (%)
+    :param float SoC_uc: Estado de carga inicial do supercapacitor (%)
+    :param float|array dt: Intervalo de tempo de cada amostra (s); pela coluna "Time" se None (ver main.sample_steps)
+    :param ResultCache cache: Cache de dimensionamentos e simulações; sem cache se None
+    :param int Np_bat: Células da bateria em paralelo de um banco já projetado; dimensionado pelo limiar se None
+    :param int Np_uc: Células do supercapacitor em paralelo de um banco já projetado; dimensionado pelo limiar se None
+    :return dict: Linha do resumo (arranjo dos bancos e energias rejeitadas em kWh)
+    """
+    dt = sample_steps(data, dt)
+    simulation = Simulation(cache=cache)
+    batt_params, uc_params = simulation.size_energy_storage(data, threshold, config_bat, config_uc, verbose=False, dt=dt)
+    if Np_bat is not None:
+        batt_params = {**batt_params, "Np": int(Np_bat)}
+    if Np_uc is not None:
+        uc_params = {**uc_params, "Np": int(Np_uc)}
+    row = {
+        "threshold": threshold,
+        "Ns_bat": batt_params["Ns"], "Np_bat": batt_params["Np"], "Nm_bat": batt_params["Nm"],
+        "max_energy_bat": batt_params["max_energy"],
+        "Ns_uc": uc_params["Ns"], "Np_uc": uc_params["Np"], "Nm_uc": uc_params["Nm"],
+        "max_energy_uc": uc_params["max_energy"],
+    }
+
+    try:
+        simulation.setParam_Batt(batt_params["C"], batt_params["Ns"], batt_params["Np"], batt_params["Nm"], batt_params["Vnom"], SoC_bat)
+        simulation.setParam_UC(uc_params["C"], uc_params["Ns"], uc_params["Np"], uc_params["Nm"], uc_params["Vnom"], SoC_uc)
+    except ValueError as e:
+        # Arranjo inválido (ex.: Np = 0 para limiares muito baixos): mantém a linha sem simulação
+        print(f"Limiar {threshold} kW: {e}")
+        return {**row, **{column: np.nan for column in SUMMARY_COLUMNS if column not in row}}
+
+    powers = (data["Traction Power"] - data["Braking Power"]).to_numpy()
+    results = simulate_cached(cache, powers, threshold, simulation._batt, simulation._uc, dt)
+
+    # Energias rejeitadas (kWh); potência rejeitada positiva é tração não atendida e negativa é frenagem não absorvida
+    p_reject = results["p_reject"]
+    if np.ndim(dt):
+        # Passo variável: integra cada amostra com o seu próprio intervalo
+        dt = np.asarray(dt, dtype=float)
+        row["E_reject_bat"] = np.sum(np.abs(results["p_bat_reject"]) * dt) / 3600
+        row["E_reject_uc"] = np.sum(np.abs(results["p_uc_reject"]) * dt) / 3600
+        row["E_reject_tracao"] = np.sum(np.maximum(p_reject, 0) * dt) / 3600
+        row["E_reject_frenagem"] = np.sum(np.maximum(-p_reject, 0) * dt) / 3600
+    else:
+        row["E_reject_bat"] = np.sum(np.abs(results["p_bat_reject"])) * dt / 3600
+        row["E_reject_uc"] = np.sum(np.abs(results["p_uc_reject"])) * dt / 3600
+        row["E_reject_tracao"] = np.sum(p_reject[p_reject > 0]) * dt / 3600
+        row["E_reject_frenagem"] = -np.sum(p_reject[p_reject < 0]) * dt / 3600
+    row["E_reject"] = row["E_reject_tracao"] + row["E_reject_frenagem"]
+    return row
+
+
+def _run_worker(args: tuple) -> dict:
+    """Executa run_threshold no processo trabalhador com o perfil compartilhado"""
+    return run_threshold(_worker_data, *args, cache=_worker_cache)
+
+
+def sweep_thresholds(data: pd.DataFrame, thresholds, config_bat: dict, config_uc: dict,
+                     SoC_bat: float = 50, SoC_uc: float = 20, dt=None,
+                     processes: int | None = None, cache: ResultCache | None = None) -> pd.DataFrame:
+    """
+    Varre limiares de potência, dimensionando e simulando os bancos para cada um em paralelo
+    :param pd.DataFrame data: DataFrame com colunas "Traction Power" e "Braking Power" (kW)
+    :param iterable thresholds: Limiares de potência a avaliar (kW)
+    :param dict config_bat: Configuração de tensão da bateria (Ns e Nm)
+    :param dict config_uc: Configuração de tensão do supercapacitor (Ns e Nm)
+    :param float SoC_bat: Estado de carga inicial da bateria (%)
+    :param float SoC_uc: Estado de carga inicial do supercapacitor (%)
+    :param float|array dt: Intervalo de tempo de cada amostra (s); pela coluna "Time" se None (ver main.sample_steps)
+    :param int processes: Número de processos; usa todos os núcleos se None e roda em série se 1
+    :param ResultCache cache: Cache de dimensionamentos e simulações; em paralelo, cada processo usa apenas a camada em disco
+    :return pd.DataFrame: Tabela de resumo, uma linha por limiar
+    """
+    # O intervalo vem da coluna "Time" antes de reduzir a planilha às potências enviadas aos processos
+    dt = sample_steps(data, dt)
+    data = data[["Traction Power", "Braking Power"]]
+    tasks = [(float(threshold), config_bat, config_uc, SoC_bat, SoC_uc, dt) for threshold in thresholds]
+
+    if processes == 1:
+        rows = [run_threshold(data, *task, cache=cache) for task in tasks]
+    else:
+        processes = processes or os.cpu_count()
+        chunksize = max(1, len(tasks) // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(data, *((cache.directory, cache.max_bytes) if cache is not None else ()))) as executor:
+            rows = list(executor.map(_run_worker, tasks, chunksize=chunksize))
+
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura do limiar de potência do controle supervisório")
+    parser.add_argument("--arquivo", default=os.path.join("data", "CR-3112_28-09-24_AGGREGATED.xlsx"), help="Planilha com o perfil de potência")
+    parser.add_argument("--planilha", default="Dados", help="Nome da planilha")
+    parser.add_argument("--inicio", type=float, default=100, help="Primeiro limiar (kW)")
+    parser.add_argument("--fim", type=float, default=3000, help="Último limiar (kW)")
+    parser.add_argument("--passo", type=float, default=50, help="Passo entre limiares (kW)")
+    parser.add_argument("--tensao-bat", type=int, default=1260, choices=sorted(VOLTAGE_CONFIGS_BAT), help="Tensão da bateria (V)")
+    parser.add_argument("--tensao-uc", type=int, default=960, choices=sorted(VOLTAGE_CONFIGS_UC), help="Tensão do supercapacitor (V)")
+    parser.add_argument("--soc-bat", type=float, default=50, help="SoC inicial da bateria (%%)")
+    parser.add_argument("--soc-uc", type=float, default=20, help="SoC inicial do supercapacitor (%%)")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIR, default=None, help="Reaproveita resultados já calculados (diretório do cache em disco)")
+    parser.add_argument("--saida", default=os.path.join("resultados", "varredura_limiar.csv"), help="Arquivo CSV de saída")
+    args = parser.parse_args()
+
+    df = load_cycle(args.arquivo, args.planilha)
+    thresholds = np.arange(args.inicio, args.fim + args.passo / 2, args.passo)
+
+    summary = sweep_thresholds(df, thresholds, VOLTAGE_CONFIGS_BAT[args.tensao_bat], VOLTAGE_CONFIGS_UC[args.tensao_uc],
+                               SoC_bat=args.soc_bat, SoC_uc=args.soc_uc, processes=args.processos,
+                               cache=ResultCache(directory=args.cache) if args.cache else None)
+    summary.to_csv(args.saida, index=False)
+
+    print(summary.to_string(index=False))
+    print(f"\nResumo salvo em {args.saida}")
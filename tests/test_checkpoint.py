@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import RESULT_COLUMNS, simulate_arrays
+from main import Simulation
+from strategies import LowPassStrategy
+
+BATT = (40, 16, 2, 24, 3.2, 60)
+UC = (3140, 18, 2, 18, 3, 50)
+
+
+def _profile(n: int = 1500, seed: int = 0) -> pd.DataFrame:
+    """Perfil com passo variável e descarga líquida, para que a bateria percorra boa parte da faixa de SoC"""
+    rng = np.random.default_rng(seed)
+    powers = np.repeat(rng.normal(60, 250, n // 15), 15) + rng.normal(0, 40, n)
+    time = np.cumsum(rng.choice([0.5, 1.0, 2.0], n))
+    return pd.DataFrame({"Traction Power": np.maximum(powers, 0), "Braking Power": np.maximum(-powers, 0), "Time": time})
+
+
+def _index(data: pd.DataFrame, time: float) -> int:
+    """Primeiro passo que começa em time ou depois"""
+    return int(np.searchsorted((data["Time"] - data["Time"].iloc[0]).to_numpy(), time))
+
+
+def _simulation() -> Simulation:
+    simulation = Simulation()
+    simulation.setParam_Batt(*BATT)
+    simulation.setParam_UC(*UC)
+    return simulation
+
+
+def _reference(data: pd.DataFrame, index: int, thresholds: tuple, change: dict | None = None) -> dict:
+    """Duas execuções seguidas do kernel: até o passo index com o primeiro limiar e dali em diante com o segundo"""
+    simulation = _simulation()
+    batt, uc = simulation._batt, simulation._uc
+    powers = (data["Traction Power"] - data["Braking Power"]).to_numpy()
+    dts = np.diff(data["Time"].to_numpy(), append=np.nan)
+    dts[-1] = np.median(dts[:-1])
+    first = simulate_arrays(powers[:index], thresholds[0], batt, uc, dts[:index])
+    if change:
+        batt.setState(change)
+    second = simulate_arrays(powers[index:], thresholds[1], batt, uc, dts[index:])
+    return {column: np.concatenate((first[column], second[column])) for column in RESULT_COLUMNS}
+
+
+@pytest.mark.parametrize("change_time", [0.0, 333.3, 600.0, 1e9])
+def test_resimulate_matches_two_segments(change_time):
+    data = _profile()
+    simulation = _simulation()
+    original = simulation.simulate(data, "Dados", 500, checkpoint_every=120)
+    index = _index(data, change_time)
+
+    resumed = simulation.resimulate(change_time, threshold=250, batt={"min_SoC": 55})
+    starts = (data["Time"] - data["Time"].iloc[0]).to_numpy()
+    assert resumed in starts and (index == len(data) or resumed <= starts[index])     # Ponto de restauração antes da mudança
+    reference = _reference(data, index, (500, 250), {"min_SoC": 55})
+    results = simulation.results()
+    for column in RESULT_COLUMNS:
+        np.testing.assert_array_equal(results[column].to_numpy(), reference[column], err_msg=column)
+    # A mudança de fato altera o trecho depois de change_time, e só ele
+    np.testing.assert_array_equal(results["p_reject"][:index], original["p_reject"][:index])
+    assert index == len(data) or not np.array_equal(results["p_reject"][index:], original["p_reject"][index:])
+
+
+def test_changes_accumulate_between_calls():
+    data = _profile(seed=1)
+    simulation = _simulation()
+    simulation.simulate(data, "Dados", 500, checkpoint_every=100)
+    simulation.resimulate(900, threshold=250)
+    simulation.resimulate(300, threshold=800)              # Vale até o fim: substitui a mudança em 900 s
+    index = _index(data, 300)
+
+    reference = _reference(data, index, (500, 800))
+    for column in RESULT_COLUMNS:
+        np.testing.assert_array_equal(simulation.results()[column].to_numpy(), reference[column], err_msg=column)
+
+
+def test_resimulate_requires_checkpoints():
+    simulation = _simulation()
+    with pytest.raises(ValueError):
+        simulation.resimulate(10, threshold=300)
+    simulation.simulate(_profile(), "Dados", 500, strategy=LowPassStrategy(tau=20), checkpoint_every=60)
+    with pytest.raises(ValueError):
+        simulation.resimulate(10, threshold=300)           # O limiar não se aplica com estratégia
+    with pytest.raises(ValueError):
+        simulation.resimulate(10, batt={"SoC_inexistente": 1})
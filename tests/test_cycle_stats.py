@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cycle_stats import CycleStats, file_stats
+from drive_cycle import time_steps
+
+DURATIONS = (1, 10, 30, 60)
+THRESHOLDS = (100, 250, 400)
+
+
+def _cycle(n: int = 5000, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    power = np.repeat(rng.normal(30, 200, n // 25), 25) + rng.normal(0, 80, n)
+    return np.maximum(power, 0), np.maximum(-power, 0)
+
+
+def _stats(traction, braking, dt, chunk: int) -> CycleStats:
+    stats = CycleStats(resolution=0.5, durations=DURATIONS, thresholds=THRESHOLDS)
+    dts = np.broadcast_to(dt, traction.shape)
+    for begin in range(0, traction.shape[0], chunk):
+        end = begin + chunk
+        stats.update(traction[begin:end], braking[begin:end], dts[begin:end])
+    return stats
+
+
+def _weighted_percentile(power, dts, q) -> np.ndarray:
+    order = np.argsort(power)
+    cumulative = np.cumsum(dts[order])
+    return power[order][np.searchsorted(cumulative, np.asarray(q) / 100 * cumulative[-1])]
+
+
+@pytest.mark.parametrize("chunk", [3, 7, 999, 5000])
+@pytest.mark.parametrize("steps", ["fixo", "variavel"])
+def test_single_pass_matches_numpy(chunk, steps):
+    traction, braking = _cycle()
+    dts = np.ones(traction.shape[0]) if steps == "fixo" else np.random.default_rng(1).choice([0.5, 1.0, 2.0], traction.shape[0])
+    power = traction - braking
+    stats = _stats(traction, braking, dts, chunk)
+
+    assert stats.samples == traction.shape[0]
+    assert stats.duration == pytest.approx(dts.sum(), rel=1e-12)
+    assert stats.E_tracao == pytest.approx(np.sum(traction * dts) / 3600, rel=1e-12)
+    assert stats.E_frenagem == pytest.approx(np.sum(braking * dts) / 3600, rel=1e-12)
+    assert stats.P_tracao_max == traction.max() and stats.P_frenagem_max == braking.max()
+
+    row = stats.summary((5, 50, 95))
+    for threshold in THRESHOLDS:
+        above = np.abs(power) > threshold
+        assert row[f"t_acima_{threshold:g}kW"] == pytest.approx(dts[above].sum(), rel=1e-12)
+        assert row[f"E_acima_{threshold:g}kW"] == pytest.approx(np.sum((np.abs(power) - threshold)[above] * dts[above]) / 3600,
+                                                                rel=1e-12)
+    # Percentis pelo histograma: erro de até uma faixa
+    np.testing.assert_allclose(stats.percentile([5, 50, 95]), _weighted_percentile(power, dts, [5, 50, 95]), atol=0.5)
+    curve = stats.duration_curve()
+    for level in (-300, 0, 150):
+        t_above = curve.loc[curve["P"] == np.floor(level / 0.5) * 0.5, "t_acima"].iloc[0]
+        assert t_above == pytest.approx(dts[power >= np.floor(level / 0.5) * 0.5].sum(), rel=1e-12)
+
+
+@pytest.mark.parametrize("chunk", [2, 13, 5000])
+def test_sustained_power_matches_rolling_mean(chunk):
+    traction, braking = _cycle(seed=2)
+    power = traction - braking
+    stats = _stats(traction, braking, 1.0, chunk)
+
+    sustained = stats.sustained_power()
+    for duration in DURATIONS:
+        means = np.convolve(power, np.ones(duration) / duration, mode="valid")
+        assert sustained.loc[duration, "P_tracao"] == pytest.approx(means.max(), rel=1e-9)
+        assert sustained.loc[duration, "P_frenagem"] == pytest.approx(-means.min(), rel=1e-9)
+
+
+def test_sustained_power_does_not_depend_on_chunks():
+    traction, braking = _cycle(seed=3)
+    dts = np.random.default_rng(4).choice([0.5, 1.0, 2.0], traction.shape[0])
+    one_shot = _stats(traction, braking, dts, traction.shape[0]).sustained_power()
+    pd.testing.assert_frame_equal(_stats(traction, braking, dts, 11).sustained_power(), one_shot, rtol=1e-9)
+
+
+def test_merge_matches_concatenation():
+    traction, braking = _cycle(seed=5)
+    half = traction.shape[0] // 2
+    merged = _stats(traction[:half], braking[:half], 1.0, 500).merge(_stats(traction[half:], braking[half:], 1.0, 500))
+    whole = _stats(traction, braking, 1.0, 500)
+
+    for name in ("samples", "duration", "E_tracao", "E_frenagem", "P_tracao_max", "P_frenagem_max"):
+        assert getattr(merged, name) == pytest.approx(getattr(whole, name), rel=1e-12)
+    pd.testing.assert_frame_equal(merged.duration_curve(), whole.duration_curve())
+    # As janelas não atravessam os registros: a potência sustentada combinada não supera a do registro inteiro
+    assert np.all(merged.sustained_power().to_numpy() <= whole.sustained_power().to_numpy() + 1e-9)
+    with pytest.raises(ValueError):
+        merged.merge(CycleStats(resolution=1.0))
+
+
+def test_file_stats_chunks_follow_time_column(tmp_path):
+    traction, braking = _cycle(n=1000, seed=6)
+    time = pd.Timestamp("2024-09-28") + pd.to_timedelta(np.cumsum(np.random.default_rng(7).choice([0.5, 1.0, 2.0], 1000)), "s")
+    path = tmp_path / "registro.csv"
+    pd.DataFrame({"Time": time, "Traction Power": traction, "Braking Power": braking}).to_csv(path, index=False)
+
+    dts = time_steps(time.to_numpy())
+    reference = _stats(traction, braking, dts, 1000)
+    for chunk_size in (1000, 64):
+        stats = file_stats(str(path), {"resolution": 0.5, "durations": DURATIONS, "thresholds": THRESHOLDS,
+                                       "chunk_size": chunk_size})
+        assert stats.duration == pytest.approx(reference.duration, rel=1e-12)
+        assert stats.E_tracao == pytest.approx(reference.E_tracao, rel=1e-12)
+        pd.testing.assert_frame_equal(stats.sustained_power(), reference.sustained_power(), rtol=1e-9)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from degradation import Rainflow, rainflow
+
+
+def _trajectory(n: int = 500, seed: int = 0) -> np.ndarray:
+    """Passeio aleatório de SoC com patamares, inclusive no início"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 1, n)
+    steps[rng.random(n) < 0.3] = 0
+    steps[:5] = 0
+    return 50 + np.cumsum(steps)
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64])
+def test_rainflow_streaming_matches_one_shot(chunk):
+    values = _trajectory()
+    times = np.arange(values.shape[0], dtype=float)
+    counter = Rainflow()
+    for begin in range(0, values.shape[0], chunk):
+        counter.update(values[begin:begin + chunk], times[begin:begin + chunk])
+    pd.testing.assert_frame_equal(counter.cycles(), rainflow(values))
+
+
+@pytest.mark.parametrize("values", [[5.0], [50, 50], [50, 50, 50, 51, 51, 49]])
+def test_rainflow_flat_start(values):
+    counter = Rainflow()
+    for k, value in enumerate(values):
+        counter.update([value], [k])
+    pd.testing.assert_frame_equal(counter.cycles(), rainflow(values))
+
+
+def test_rainflow_single_sample():
+    cycles = rainflow([5.0])
+    assert len(cycles) == 0
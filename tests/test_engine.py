@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from batt import Batt
+from drive_cycle import load_cycle, total_power
+from engine import RESULT_COLUMNS, simulate_arrays, simulate_segments
+from main import Simulation, VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC, sample_steps
+from UC import Uc
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "CR-3112_28-09-24_AGGREGATED.xlsx")
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return load_cycle(DATA, "Dados")
+
+
+def _sized(data, threshold: float) -> Simulation:
+    """Simulação com os bancos dimensionados para o limiar (1260 V / 960 V, SoC inicial 50% / 20%)"""
+    simulation = Simulation()
+    batt_params, uc_params = simulation.size_energy_storage(data, threshold, VOLTAGE_CONFIGS_BAT[1260],
+                                                            VOLTAGE_CONFIGS_UC[960], verbose=False, dt=1)
+    simulation.setParam_Batt(*(batt_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), 50)
+    simulation.setParam_UC(*(uc_params[key] for key in ("C", "Ns", "Np", "Nm", "Vnom")), 20)
+    return simulation
+
+
+@pytest.mark.parametrize("threshold", [300, 600, 1000, 3000])
+@pytest.mark.parametrize("steps", ["fixo", "registro"])
+def test_kernel_matches_loop(profile, threshold, steps):
+    powers = total_power(profile)
+    dt = 1 if steps == "fixo" else sample_steps(profile)
+
+    reference = _sized(profile, threshold)
+    reference.simulate_loop(powers, threshold, dt)
+
+    kernel = _sized(profile, threshold)
+    kernel._store_results(simulate_arrays(powers, threshold, kernel._batt, kernel._uc, dt), dt)
+
+    for column in RESULT_COLUMNS + ("Tempo",):
+        np.testing.assert_array_equal(kernel._trace.column(column), reference._trace.column(column), err_msg=column)
+    assert kernel._batt.getState() == reference._batt.getState()
+    assert kernel._uc.getState() == reference._uc.getState()
+
+
+def _banks(Np_bat: int, Np_uc: int, lut_method: str, SoC_bat: float = 50, SoC_uc: float = 20) -> tuple:
+    batt = Batt(lut_method=lut_method)
+    batt.setParams(40, 16, Np_bat, 24, 3.2, SoC_bat)
+    uc = Uc()
+    uc.setParams(3140, 18, Np_uc, 18, 3, SoC_uc)
+    return batt, uc
+
+
+@pytest.mark.parametrize("lut_method", ["nearest", "linear"])
+@pytest.mark.parametrize("steps", ["fixo", "variavel"])
+@pytest.mark.parametrize("Np_bat, Np_uc", [(20, 10), (1, 1)])     # Folgado / saturação de corrente e limites de SoC
+def test_segments_match_kernel(lut_method, steps, Np_bat, Np_uc):
+    rng = np.random.default_rng(1)
+    n = 3000
+    # Trechos de potência constante (caminhão parado, cruzeiro) intercalados com picos de tração e frenagem
+    powers = np.repeat(rng.normal(0, 400, n // 20), 20) + np.where(rng.random(n) < 0.05, rng.normal(0, 1500, n), 0)
+    powers[500:800] = 0
+    powers[1000:1700] = 900                                                 # Descarga longa até o SoC mínimo
+    powers[2000:2900] = -900                                                # Recarga longa até o SoC máximo
+    dt = 1 if steps == "fixo" else rng.choice([0.5, 1.0, 2.0], n)
+
+    batt_ref, uc_ref = _banks(Np_bat, Np_uc, lut_method)
+    reference = simulate_arrays(powers, 300, batt_ref, uc_ref, dt)
+    batt, uc = _banks(Np_bat, Np_uc, lut_method)
+    segments = simulate_segments(powers, 300, batt, uc, dt)
+
+    for column in RESULT_COLUMNS:
+        np.testing.assert_allclose(segments[column], reference[column], rtol=1e-11, atol=1e-9, err_msg=column)
+    assert batt.getState() == pytest.approx(batt_ref.getState(), rel=1e-11)
+    assert uc.getState() == pytest.approx(uc_ref.getState(), rel=1e-11)
+    if Np_bat == 1:
+        # O caso pequeno de fato satura os dois bancos e encosta nos limites de SoC
+        assert np.any(reference["p_bat_reject"] != 0) and np.any(reference["p_uc_reject"] != 0)
+        assert reference["SoC_bat"].min() == 10 and reference["SoC_bat"].max() == 90
+        assert reference["SoC_UC"].min() == 3 and reference["SoC_UC"].max() == 100
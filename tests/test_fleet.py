@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from batt import Batt
+from engine import RESULT_COLUMNS, simulate_arrays
+from fleet import simulate_fleet, size_fleet
+from main import VOLTAGE_CONFIGS_BAT, VOLTAGE_CONFIGS_UC
+from UC import Uc
+
+
+def _fleet():
+    """Dois perfis sintéticos de tamanhos diferentes, com bancos dimensionados para 300 kW"""
+    rng = np.random.default_rng(1)
+    profiles = [rng.normal(100, 400, 300), rng.normal(50, 300, 200)]
+    batt_params, uc_params = size_fleet(profiles, 300, VOLTAGE_CONFIGS_BAT[1260], VOLTAGE_CONFIGS_UC[960])
+    for bp, up in zip(batt_params, uc_params):
+        bp["SoC"], up["SoC"] = 50, 20
+    return profiles, batt_params, uc_params
+
+
+@pytest.mark.parametrize("dt", ["unico", "por_caminhao", "por_amostra"])
+def test_lockstep_matches_single_truck(dt):
+    profiles, batt_params, uc_params = _fleet()
+    dts = {"unico": [np.full(300, 1.0), np.full(200, 1.0)],
+           "por_caminhao": [np.full(300, 2.0), np.full(200, 0.5)],
+           "por_amostra": [np.full(300, 1.0), np.linspace(0.5, 2.0, 200)]}[dt]
+    fleet_dt = {"unico": 1, "por_caminhao": [2.0, 0.5], "por_amostra": dts}[dt]
+    thresholds = [300, 250]
+    fleet = simulate_fleet(profiles, thresholds, batt_params, uc_params, dt=fleet_dt)
+
+    for k, profile in enumerate(profiles):
+        batt, uc = Batt(), Uc()
+        batt.setParams(*(batt_params[k][key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+        uc.setParams(*(uc_params[k][key] for key in ("C", "Ns", "Np", "Nm", "Vnom", "SoC")))
+        single = simulate_arrays(profile, thresholds[k], batt, uc, dts[k])
+        truck = fleet.truck(k)
+        for column in RESULT_COLUMNS:
+            np.testing.assert_array_equal(truck[column].to_numpy(), single[column], err_msg=column)
+        np.testing.assert_allclose(truck["Tempo"].to_numpy(), np.cumsum(dts[k]) - dts[k])
+    assert np.isnan(fleet["SoC_bat"][1, 200:]).all()
+
+
+def test_lockstep_builds_no_bank_per_truck(monkeypatch):
+    profiles, batt_params, uc_params = _fleet()
+    created = []
+    init = Batt.__init__
+    monkeypatch.setattr(Batt, "__init__", lambda self, *args, **kwargs: created.append(1) or init(self, *args, **kwargs))
+    simulate_fleet(profiles * 10, 300, batt_params * 10, uc_params * 10)
+    assert len(created) == 1
+
+
+@pytest.mark.parametrize("bank, SoC", [("bat", 95), ("bat", 5), ("uc", 120)])
+def test_fleet_rejects_initial_SoC_out_of_range(bank, SoC):
+    profiles, batt_params, uc_params = _fleet()
+    (batt_params if bank == "bat" else uc_params)[1]["SoC"] = SoC
+    with pytest.raises(ValueError, match="Caminhão 1"):
+        simulate_fleet(profiles, 300, batt_params, uc_params)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lut import LUT, LUT_PATH
+
+
+def _idxmin_lookup(df: pd.DataFrame, SoC: float) -> float:
+    """Consulta original de Batt.LUT: linha de menor distância em SoC (primeira em caso de empate)"""
+    return float(df.loc[(df["SoC"] - SoC).abs().idxmin(), "Tensao"])
+
+
+def _inverted(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["SoC"] = 100 - df["SoC"]
+    return df
+
+
+def test_nearest_matches_idxmin_on_table():
+    df = _inverted(pd.read_csv(LUT_PATH, sep=";"))
+    lut = LUT.from_csv(LUT_PATH)
+    SoC = np.concatenate([np.linspace(-5, 105, 2001), df["SoC"].to_numpy(),
+                          (df["SoC"].to_numpy()[1:] + df["SoC"].to_numpy()[:-1]) / 2])
+    expected = np.array([_idxmin_lookup(df, x) for x in SoC])
+    np.testing.assert_array_equal(lut.nearest(SoC), expected)
+    assert all(lut(x) == e for x, e in zip(SoC[::50], expected[::50]))     # Escalar
+
+
+def test_nearest_ties_and_repeated_rows():
+    # Tabela em profundidade de descarga, com SoC repetido e pontos equidistantes
+    df = pd.DataFrame({"SoC": [0, 10, 10, 20, 30, 40], "Tensao": [3.6, 3.4, 3.5, 3.3, 3.25, 3.2]})
+    lut = LUT(100 - df["SoC"].to_numpy(), df["Tensao"].to_numpy())
+    df = _inverted(df)
+    SoC = np.arange(50, 110.5, 0.5)                                        # Inclui os pontos médios (empates)
+    np.testing.assert_array_equal(lut.nearest(SoC), [_idxmin_lookup(df, x) for x in SoC])
+
+
+def test_linear_interpolates_between_points():
+    lut = LUT.from_csv(LUT_PATH, method="linear")
+    np.testing.assert_array_equal(lut(lut.SoC), lut.tensao)
+    middle = (lut.SoC[1:] + lut.SoC[:-1]) / 2
+    np.testing.assert_allclose(lut(middle), (lut.tensao[1:] + lut.tensao[:-1]) / 2, rtol=1e-12)
+    assert lut(-10) == lut.tensao[0] and lut(110) == lut.tensao[-1]       # Fora da tabela: extremos
+    assert lut(50.0, "nearest") == LUT.from_csv(LUT_PATH).nearest(50.0)
+
+
+def test_invalid_tables():
+    with pytest.raises(ValueError):
+        LUT([], [])
+    with pytest.raises(ValueError):
+        LUT([0, 1], [3.0, 3.1], method="cubic")
+    with pytest.raises(ValueError):
+        LUT([0, 1], [3.0, 3.1])(0.5, "cubic")
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+from memo import ResultCache
+
+
+def _disk_bytes(directory: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".pkl"))
+
+
+def test_disk_layer_stays_within_max_bytes(tmp_path, monkeypatch):
+    max_bytes = 100_000
+    cache = ResultCache(maxsize=1, directory=str(tmp_path), max_bytes=max_bytes)
+    scans = []
+    evict = ResultCache._evict
+    monkeypatch.setattr(ResultCache, "_evict", lambda self: scans.append(1) or evict(self))
+
+    for k in range(100):
+        cache.put(f"chave{k}", np.full(500, float(k)))          # ~4 kB por entrada
+        assert _disk_bytes(tmp_path) <= max_bytes
+
+    # Varre o diretório só quando o total passa do limite, não a cada gravação
+    assert len(scans) <= 30
+    assert cache.get("chave99")[0] == 99.0
+    cache.clear()
+    assert cache.get("chave0") is None
+
+
+def test_overwrite_does_not_inflate_total(tmp_path):
+    cache = ResultCache(maxsize=1, directory=str(tmp_path), max_bytes=10_000)
+    for _ in range(20):
+        cache.put("chave", np.zeros(500))
+    cache.put("outra", np.ones(500))
+    assert cache._disk_bytes == _disk_bytes(tmp_path)
+    cache.clear()
+    assert cache.get("chave") is not None and cache.get("outra") is not None
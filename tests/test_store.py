@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from engine import RESULT_COLUMNS
+from store import ResultStore
+
+
+def _results(n: int, value: float) -> dict:
+    return {column: np.full(n, value) for column in RESULT_COLUMNS}
+
+
+def test_runs_table_read_once(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path))
+    for k in range(3):
+        store.append(_results(10 + k, float(k)), {"threshold": 100 * k})
+
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: reads.append(args) or read_csv(*args, **kwargs))
+    for run_id in range(3):
+        assert store.column(run_id, "SoC_bat")[0] == run_id
+        assert store.time(run_id).shape[0] == 10 + run_id
+    assert len(store.load()) == 3
+    assert len(reads) == 1
+
+
+def test_runs_table_follows_appends(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.append(_results(5, 1.0), {"threshold": 100})
+    runs = store.runs()
+    runs.loc[0, "threshold"] = -1                           # Cópia: não altera a tabela guardada
+    assert store.runs().loc[0, "threshold"] == 100
+
+    store.append(_results(7, 2.0), {"threshold": 200})
+    ResultStore(str(tmp_path)).append(_results(3, 3.0), {"threshold": 300})   # Outro escritor
+    assert len(store) == 3
+    assert store.column(2, "p_reject").shape[0] == 3
+    assert store.runs()["threshold"].tolist() == [100, 200, 300]
+
+
+def test_versions_follow_rewrites(tmp_path):
+    path = tmp_path / "conjunto"
+    store = ResultStore(str(path))
+    store.append(_results(5, 1.0), {"threshold": 100})
+    before = store.versions(["SoC_bat", "Tempo"])
+    assert before[1] == ("Tempo", None, None)                # Sem passo variável
+
+    # Conjunto refeito com os mesmos metadados e dados diferentes
+    for file in path.iterdir():
+        file.unlink()
+    store = ResultStore(str(path))
+    store.append(_results(5, 2.0), {"threshold": 100}, dt=np.arange(1.0, 6.0))
+    after = store.versions(["SoC_bat", "Tempo"])
+    assert after[0][0] == "SoC_bat"
+    assert after != before
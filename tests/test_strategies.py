@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from batt import Batt
+from strategies import LowPassStrategy, RuleTableStrategy, SoCFeedbackStrategy, ThresholdStrategy, simulate_strategy
+from UC import Uc
+
+
+def _profile(n: int = 2000, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    powers = np.repeat(rng.normal(0, 150, n // 10), 10) + rng.normal(0, 60, n)
+    return powers - powers.mean(), rng.choice([0.5, 1.0, 2.0], n)
+
+
+def _banks() -> tuple:
+    """Bancos folgados: nenhuma saturação nem limite de SoC no perfil de teste"""
+    batt = Batt()
+    batt.setParams(40, 16, 20, 24, 3.2, 50)
+    uc = Uc()
+    uc.setParams(3140, 18, 40, 18, 3, 50)
+    return batt, uc
+
+
+def _bank_powers(results: dict, bat: dict, cap: dict, dt: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Potência de cada banco a cada passo (kW), pela variação de energia armazenada (Wh na bateria e J no UC)"""
+    E_bat = np.concatenate(([bat["SoC_Energy"]], results["SoC_bat"] / 100 * bat["total_energy"]))
+    E_uc = np.concatenate(([cap["stored_energy"]], results["SoC_UC"] / 100 * cap["total_energy"]))
+    return -np.diff(E_bat) * 3600 / dt / 1000, -np.diff(E_uc) / dt / 1000
+
+
+@pytest.mark.parametrize("strategy", [ThresholdStrategy(120),
+                                      LowPassStrategy(tau=30),
+                                      LowPassStrategy(tau=10, p_max_bat=80, initial=0.0),
+                                      RuleTableStrategy([-100, 0, 100], [0.3, 1.0, 0.8, 0.4]),
+                                      RuleTableStrategy([0], [0.5, 0.9], p_max_bat=60)],
+                         ids=repr)
+def test_split_conserves_power(strategy):
+    powers, dt = _profile()
+    batt, uc = _banks()
+    bat, cap = batt.getState(), uc.getState()
+    results = simulate_strategy(powers, strategy, batt, uc, dt)
+    assert np.all(results["p_reject"] == 0)
+
+    power_bat, power_uc = _bank_powers(results, bat, cap, dt)
+    np.testing.assert_allclose(power_bat + power_uc, powers, rtol=0, atol=1e-6)
+    # A bateria segue a referência da estratégia, limitada a p_max_bat
+    np.testing.assert_allclose(power_bat, np.clip(strategy.split(powers, dt), -strategy.p_max_bat, strategy.p_max_bat),
+                               rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("base", [LowPassStrategy(tau=30), RuleTableStrategy([0], [0.5, 0.9])], ids=repr)
+def test_feedback_conserves_power(base):
+    powers, dt = _profile(seed=1)
+    strategy = SoCFeedbackStrategy(base, gain=2.0, target=60)
+    batt, uc = _banks()
+    bat, cap = batt.getState(), uc.getState()
+    results = simulate_strategy(powers, strategy, batt, uc, dt)
+    assert np.all(results["p_reject"] == 0)
+
+    power_bat, power_uc = _bank_powers(results, bat, cap, dt)
+    np.testing.assert_allclose(power_bat + power_uc, powers, rtol=0, atol=1e-6)
+    # Realimentação pelo SoC do UC no passo anterior: abaixo do alvo a bateria assume mais potência
+    SoC_uc = np.concatenate(([cap["SoC"]], results["SoC_UC"][:-1]))
+    np.testing.assert_allclose(power_bat, base.split(powers, dt) + 2.0 * (60 - SoC_uc), rtol=0, atol=1e-6)
+
+
+def test_rule_table_requires_matching_fractions():
+    with pytest.raises(ValueError):
+        RuleTableStrategy([0, 100], [0.5, 1.0])
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import streaming
+from drive_cycle import load_cycle, load_sheet, total_power
+from engine import RESULT_COLUMNS, simulate_arrays
+from main import sample_steps
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "CR-3112_28-09-24_AGGREGATED.xlsx")
+
+
+class _Clock():
+    """Relógio simulado: sleep avança o tempo sem esperar"""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.mark.parametrize("sheet", ["Log", "Dados"])
+def test_replay_paced_by_log_timestamps(sheet, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(streaming, "time", clock)
+    time = load_sheet(DATA, "Log")["Time"].to_numpy()
+    seconds = (time - time[0]) / np.timedelta64(1, "s")
+
+    arrivals = []
+    for _ in streaming.replay(DATA, sheet, speed=2.0, chunk_size=1):
+        arrivals.append(clock.now)
+    # Cada amostra chega ao fim do seu intervalo real (a última recebe o intervalo mediano)
+    np.testing.assert_allclose(arrivals[:-1], seconds[1:] / 2.0)
+    assert np.max(np.diff(arrivals)) == pytest.approx(1.0)     # Falha de 2 s no registro, reproduzida em 1 s com speed=2
+
+
+def _simulation(dt=1) -> streaming.StreamingSimulation:
+    batt_params = {"C": 40, "Ns": 16, "Np": 12, "Nm": 24, "Vnom": 3.25, "SoC": 50}
+    uc_params = {"C": 3400, "Ns": 16, "Np": 20, "Nm": 20, "Vnom": 3, "SoC": 50}
+    return streaming.StreamingSimulation.from_params(batt_params, uc_params, 400, dt, history=5000)
+
+
+def test_replay_feeds_logged_steps():
+    simulation = _simulation()
+    chunks = list(streaming.replay(DATA, "Dados", speed=0, chunk_size=100))
+    results = pd.concat(list(simulation.stream(chunks)), ignore_index=True)
+
+    data = load_cycle(DATA, "Dados")
+    dt = sample_steps(data)
+    reference = _simulation()
+    powers = total_power(data)
+    expected = simulate_arrays(powers, 400, reference._batt, reference._uc, dt)
+    for column in RESULT_COLUMNS:
+        np.testing.assert_array_equal(results[column].to_numpy(), expected[column], err_msg=column)
+    np.testing.assert_allclose(results["Tempo"].to_numpy(), np.cumsum(dt) - dt)
+    assert simulation.summary()["E_tracao"] == pytest.approx(np.sum(np.maximum(powers, 0) * dt) / 3600)
+
+
+def test_step_matches_feed():
+    rng = np.random.default_rng(0)
+    traction, braking = rng.uniform(0, 800, 50), rng.uniform(0, 300, 50)
+    dts = rng.uniform(0.5, 2.0, 50)
+    by_step, by_block = _simulation(), _simulation()
+    rows = [by_step.step(t, b, dt) for t, b, dt in zip(traction, braking, dts)]
+    block = by_block.feed(traction, braking, dts)
+    pd.testing.assert_frame_equal(pd.DataFrame(rows), block)
+    pd.testing.assert_frame_equal(by_step.history(), by_block.history())
+    assert by_step.summary() == pytest.approx(by_block.summary())
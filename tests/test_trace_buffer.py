@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from engine import RESULT_COLUMNS
+from trace_buffer import TraceBuffer
+
+
+def _chunks(sizes, variable: bool, seed: int = 0, start: int = 0) -> list:
+    """Trechos de resultados com valores distintos por amostra e o intervalo de cada passo"""
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for n in sizes:
+        results = {column: start + np.arange(n) + k / 10 for k, column in enumerate(RESULT_COLUMNS)}
+        dt = rng.choice([0.5, 1.0, 2.0], n) if variable else 1.0
+        chunks.append((results, dt))
+        start += n
+    return chunks
+
+
+def _reference(chunks) -> dict:
+    """Séries completas, sem descarte: concatenação dos trechos"""
+    dts = np.concatenate([np.broadcast_to(dt, (results[RESULT_COLUMNS[0]].shape[0],)) for results, dt in chunks])
+    reference = {column: np.concatenate([results[column] for results, _ in chunks]) for column in RESULT_COLUMNS}
+    return {"Tempo": np.cumsum(dts) - dts, "dt": dts, **reference}
+
+
+def _fill(buffer: TraceBuffer, chunks, by_step: bool) -> None:
+    for results, dt in chunks:
+        if not by_step:
+            buffer.extend(results, dt)
+            continue
+        dts = np.broadcast_to(dt, (results[RESULT_COLUMNS[0]].shape[0],))
+        for k, step in enumerate(dts):
+            buffer.append(float(step), *(results[column][k] for column in RESULT_COLUMNS))
+
+
+def _assert_last(buffer: TraceBuffer, reference: dict, size: int) -> None:
+    """O buffer guarda exatamente as últimas size amostras da referência"""
+    assert len(buffer) == size
+    for column, values in reference.items():
+        np.testing.assert_allclose(buffer.column(column), values[len(values) - len(buffer):], rtol=0, atol=1e-12,
+                                   err_msg=column)
+
+
+@pytest.mark.parametrize("variable", [False, True])
+@pytest.mark.parametrize("by_step", [False, True])
+def test_ring_keeps_last_samples(variable, by_step):
+    chunks = _chunks([7, 30, 1, 64, 3, 12], variable)   # Trechos maiores que a capacidade e voltas no buffer
+    reference = _reference(chunks)
+    buffer = TraceBuffer(capacity=16, ring=True)
+    _fill(buffer, chunks, by_step)
+
+    assert buffer.capacity == 16 and buffer.total == reference["dt"].shape[0]
+    _assert_last(buffer, reference, 16)
+    assert buffer.end_time == pytest.approx(reference["Tempo"][-1] + reference["dt"][-1])
+
+
+def test_ring_switches_to_variable_steps():
+    # Passo constante no início e variável depois: o tempo das amostras já guardadas é reconstruído
+    chunks = _chunks([10, 9], False) + _chunks([5, 20], True, seed=1, start=19)
+    buffer = TraceBuffer(capacity=12, ring=True)
+    _fill(buffer, chunks[:2], False)
+    _assert_last(buffer, _reference(chunks[:2]), 12)
+    _fill(buffer, chunks[2:3], False)
+    _assert_last(buffer, _reference(chunks[:3]), 12)
+    _fill(buffer, chunks[3:], False)
+    _assert_last(buffer, _reference(chunks), 12)
+
+
+def test_growing_buffer_keeps_everything():
+    chunks = _chunks([500, 700, 1], True)
+    buffer = TraceBuffer(capacity=8)
+    _fill(buffer, chunks, False)
+    assert buffer.capacity >= 1201
+    _assert_last(buffer, _reference(chunks), 1201)
+
+
+@pytest.mark.parametrize("variable", [False, True])
+@pytest.mark.parametrize("ring", [False, True])
+def test_truncate_then_resume(variable, ring):
+    chunks = _chunks([20, 15], variable)
+    buffer = TraceBuffer(capacity=32, ring=ring)
+    _fill(buffer, chunks, False)
+    dropped = 3 if ring else 0                          # 35 amostras recebidas, só 32 cabem no circular
+
+    # Descarta as 10 últimas amostras e simula de novo a partir dali
+    keep = 25
+    buffer.truncate(keep)
+    reference = _reference(chunks)
+    assert buffer.total == keep
+    assert buffer.end_time == pytest.approx(reference["Tempo"][keep])
+    _assert_last(buffer, {column: values[:keep] for column, values in reference.items()}, keep - dropped)
+
+    redo = _chunks([10], variable, seed=2)
+    _fill(buffer, redo, False)
+    expected = {column: values[:keep] for column, values in reference.items()}
+    expected = {column: np.concatenate((expected[column], redo[0][0][column])) for column in RESULT_COLUMNS}
+    dts = np.concatenate((reference["dt"][:keep], np.broadcast_to(redo[0][1], (10,))))
+    expected.update({"Tempo": np.cumsum(dts) - dts, "dt": dts})
+    _assert_last(buffer, expected, 35 - dropped)
+
+    buffer.truncate(buffer.total + 5)                   # Além do fim: nada a descartar
+    assert buffer.total == 35
+
+
+def test_truncate_before_ring_window():
+    buffer = TraceBuffer(capacity=8, ring=True)
+    _fill(buffer, _chunks([20], False), False)
+    buffer.truncate(12)                                 # Amostra mais antiga ainda guardada
+    assert len(buffer) == 0 and buffer.total == 12 and buffer.end_time == 12
+    with pytest.raises(ValueError):
+        buffer.truncate(11)
+
+
+def test_ring_requires_capacity():
+    with pytest.raises(ValueError):
+        TraceBuffer(ring=True)
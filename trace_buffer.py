@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+from engine import RESULT_COLUMNS
+
+TRACE_COLUMNS = ("Tempo", "dt") + RESULT_COLUMNS
+
+
+class TraceBuffer():
+    def __init__(self, capacity: int | None = None, ring: bool = False, dtype: str = "float64"):
+        """
+        Séries temporais da simulação em um único vetor estruturado pré-alocado: 8 bytes por valor em float64
+        (4 em float32), contra ~40 bytes por escalar NumPy guardado em lista. Enquanto o passo for constante,
+        "Tempo" e "dt" não são guardados por amostra (são calculados ao ler).
+        Com ring=True guarda só as últimas capacity amostras (ex.: monitorar vários dias de operação).
+        :param int capacity: Amostras pré-alocadas; cresce dobrando se excedida (obrigatória com ring)
+        :param bool ring: Buffer circular: descarta as amostras mais antigas ao atingir a capacidade
+        :param str dtype: Tipo das séries de resultado ("float64" ou "float32"); "Tempo" e "dt" são sempre float64
+        :raises ValueError: Se ring=True sem capacidade positiva
+        """
+        if ring and not capacity:
+            raise ValueError("O buffer circular exige uma capacidade positiva")
+        self._ring = ring
+        self._values_dtype = dtype
+        self._dtype = np.dtype([(name, dtype) for name in RESULT_COLUMNS])
+        self._data = np.empty(capacity or 1024, dtype=self._dtype)
+        self._start = 0                                 # Posição da amostra mais antiga (buffer circular)
+        self._size = 0
+        self._total = 0                                 # Amostras recebidas, inclusive as descartadas
+        self._end_time = 0.0                            # Instante ao fim do último passo (s)
+        self._dt = None                                 # Passo constante; None se ainda vazio ou se o passo varia
+        self._variable = False                          # "Tempo" e "dt" guardados por amostra
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Amostras alocadas"""
+        return self._data.shape[0]
+
+    @property
+    def total(self) -> int:
+        """Amostras recebidas desde a criação, inclusive as descartadas pelo buffer circular"""
+        return self._total
+
+    @property
+    def end_time(self) -> float:
+        """Instante ao fim do último passo (s): início do próximo trecho simulado"""
+        return self._end_time
+
+    @property
+    def nbytes(self) -> int:
+        """Memória alocada pelo buffer (bytes)"""
+        return self._data.nbytes
+
+    def clear(self) -> None:
+        """Descarta todas as amostras, mantendo a alocação"""
+        self._start = self._size = self._total = 0
+        self._end_time = 0.0
+        self._dt = None
+        if self._variable:
+            self._variable = False
+            self._dtype = np.dtype([(name, self._values_dtype) for name in RESULT_COLUMNS])
+            self._data = np.empty(self._data.shape[0], dtype=self._dtype)
+
+    def truncate(self, total: int) -> None:
+        """
+        Descarta as amostras a partir da posição total (contada desde a criação), para simular de novo a partir dali
+        :param int total: Amostras mantidas (as primeiras total recebidas)
+        :raises ValueError: Se as amostras anteriores a total já foram descartadas pelo buffer circular
+        """
+        remove = self._total - total
+        if remove <= 0:
+            return
+        if remove > self._size:
+            raise ValueError(f"Amostra {total} fora do buffer (amostras {self._total - self._size} a {self._total - 1})")
+        if self._variable:
+            last = (self._start + self._size - remove - 1) % self._data.shape[0]
+            self._end_time = float(self._data["Tempo"][last] + self._data["dt"][last]) if self._size > remove else \
+                float(self._data["Tempo"][self._start])
+        else:
+            self._end_time -= remove * self._dt
+        self._size -= remove
+        self._total = total
+
+    def _check_steps(self, dts: np.ndarray) -> None:
+        """Passa a guardar "Tempo" e "dt" por amostra na primeira vez em que o passo deixa de ser constante"""
+        if self._variable:
+            return
+        if self._dt is None and self._size == 0:
+            self._dt = float(dts[0])
+        if np.all(dts == self._dt):
+            return
+
+        times = self._end_time - self._size * self._dt + np.arange(self._size) * self._dt
+        self._dtype = np.dtype([(name, np.float64 if name in ("Tempo", "dt") else self._values_dtype) for name in TRACE_COLUMNS])
+        data = np.empty(self._data.shape[0], dtype=self._dtype)
+        ordered = self.array()
+        for name in RESULT_COLUMNS:
+            data[name][:self._size] = ordered[name]
+        data["Tempo"][:self._size] = times
+        data["dt"][:self._size] = self._dt
+        self._data, self._start = data, 0
+        self._variable = True
+        self._dt = None
+
+    def _reserve(self, n: int) -> None:
+        """Garante espaço para mais n amostras (sem buffer circular)"""
+        if self._size + n <= self._data.shape[0]:
+            return
+        data = np.empty(max(2 * self._data.shape[0], self._size + n), dtype=self._dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, dt: float, *values) -> None:
+        """
+        Acrescenta um passo (laço passo a passo)
+        :param float dt: Duração do passo (s)
+        :param values: Valores na ordem de engine.RESULT_COLUMNS
+        """
+        if not self._variable and self._dt != dt:
+            self._check_steps(np.array([dt], dtype=np.float64))
+        if self._ring:
+            index = (self._start + self._size) % self._data.shape[0]
+            if self._size == self._data.shape[0]:
+                self._start = (self._start + 1) % self._data.shape[0]
+            else:
+                self._size += 1
+        else:
+            self._reserve(1)
+            index = self._size
+            self._size += 1
+        self._data[index] = (self._end_time, dt, *values) if self._variable else values
+        self._end_time += dt
+        self._total += 1
+
+    def extend(self, results: dict, dt=1) -> None:
+        """
+        Acrescenta os vetores de um trecho simulado
+        :param dict results: Vetores com as colunas de engine.RESULT_COLUMNS
+        :param float|array dt: Intervalo de tempo de cada passo (s)
+        """
+        n = np.shape(results[RESULT_COLUMNS[0]])[0]
+        if n == 0:
+            return
+        dts = np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,))
+        self._check_steps(dts)
+        ends = np.cumsum(dts) + self._end_time
+        chunk = {"Tempo": ends - dts, "dt": dts, **results}
+        self._end_time = float(ends[-1])
+        self._total += n
+        names = self._dtype.names
+
+        if not self._ring:
+            self._reserve(n)
+            for name in names:
+                self._data[name][self._size:self._size + n] = chunk[name]
+            self._size += n
+            return
+
+        capacity = self._data.shape[0]
+        skip = max(n - capacity, 0)                     # Só as últimas capacity amostras do trecho cabem
+        index = (self._start + self._size + np.arange(skip, n)) % capacity
+        for name in names:
+            self._data[name][index] = np.asarray(chunk[name])[skip:]
+        overflow = max(self._size + n - capacity, 0)
+        self._start = (self._start + overflow) % capacity
+        self._size = min(self._size + n, capacity)
+
+    def array(self) -> np.ndarray:
+        """
+        Amostras em ordem cronológica, como guardadas
+        :return np.ndarray: Vetor estruturado (colunas RESULT_COLUMNS, mais "Tempo" e "dt" se o passo variar);
+                            visão do buffer se não houver volta do circular
+        """
+        end = self._start + self._size
+        if end <= self._data.shape[0]:
+            return self._data[self._start:end]
+        return np.concatenate((self._data[self._start:], self._data[:end - self._data.shape[0]]))
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Uma série em ordem cronológica
+        :param str name: Coluna (TRACE_COLUMNS)
+        :return np.ndarray: Valores da série
+        """
+        if name in ("Tempo", "dt") and not self._variable:
+            dt = 0.0 if self._dt is None else self._dt
+            if name == "dt":
+                return np.full(self._size, dt)
+            return self._end_time - self._size * dt + np.arange(self._size) * dt
+        return self.array()[name]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Resultados como DataFrame, com "Tempo" e as colunas de engine.RESULT_COLUMNS
+        :return pd.DataFrame: Séries temporais (float)
+        """
+        data = self.array()
+        return pd.DataFrame({"Tempo": self.column("Tempo"), **{name: data[name] for name in RESULT_COLUMNS}}, dtype=float)